@@ -0,0 +1,13 @@
+"""
+Image categories of the dental classifier
+
+Kept apart from dental_ai_model so that modules which must not import torch
+(the inference client in the web workers) report the same classes as the
+model. The order is the order of the network's output units.
+"""
+
+CATEGORIES = [
+    'extraoral_frontal', 'extraoral_full_face_smile', 'extraoral_right',
+    'extraoral_zoomed_smile', 'intraoral_front', 'intraoral_left',
+    'intraoral_right', 'lower_occlusal', 'upper_occlusal'
+]
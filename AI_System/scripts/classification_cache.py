@@ -0,0 +1,247 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+from .image_io import ImageSource, load_rgb_image
+
+
+def image_content_hash(image: Image.Image) -> str:
+    """SHA-256 of a decoded image's mode, size and pixel bytes"""
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode('utf-8'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str) -> Optional[str]:
+    """SHA-256 of a file's contents, or None if the file does not exist"""
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ClassificationCache:
+    """
+    Two-tier cache of classification results keyed by image content and model version
+
+    The first tier is an in-process LRU dict. The optional second tier is a
+    SQLite file shared by all worker processes that survives restarts.
+    Every key includes the model fingerprint, so results produced by older
+    weights are never returned once the model file changes.
+    """
+
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.model_fingerprint = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.db_path:
+            self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _init_db(self):
+        """Create the on-disk cache table if needed"""
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS classification_cache ("
+                    " image_hash TEXT NOT NULL,"
+                    " model_fingerprint TEXT NOT NULL,"
+                    " result TEXT NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " PRIMARY KEY (image_hash, model_fingerprint))"
+                )
+        except Exception as e:
+            logging.error(f"Disabling on-disk classification cache at {self.db_path}: {e}")
+            self.db_path = None
+
+    def set_model_fingerprint(self, fingerprint: Optional[str]):
+        """Switch to a new model version, dropping results from the previous one"""
+        with self._lock:
+            if fingerprint == self.model_fingerprint:
+                return
+            self.model_fingerprint = fingerprint
+            self._entries.clear()
+
+        if fingerprint and self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM classification_cache WHERE model_fingerprint != ?", (fingerprint,))
+            except Exception as e:
+                logging.warning(f"Could not prune on-disk classification cache: {e}")
+
+        logging.info(f"Classification cache keyed to model fingerprint {str(fingerprint)[:12]}")
+
+    def get(self, image_hash: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result for an image hash, or None"""
+        fingerprint = self.model_fingerprint
+        if fingerprint is None:
+            return None
+
+        key = (image_hash, fingerprint)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT result FROM classification_cache WHERE image_hash = ? AND model_fingerprint = ?",
+                        key
+                    ).fetchone()
+                if row:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                    return copy.deepcopy(result)
+            except Exception as e:
+                logging.warning(f"On-disk classification cache lookup failed: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, image_hash: str, result: Dict[str, Any]):
+        """Store a classification result for an image hash under the current model"""
+        fingerprint = self.model_fingerprint
+        if fingerprint is None:
+            return
+
+        result = {k: v for k, v in result.items() if k != 'image_path'}
+        key = (image_hash, fingerprint)
+        self._remember(key, copy.deepcopy(result))
+
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO classification_cache VALUES (?, ?, ?, ?)",
+                        (image_hash, fingerprint, json.dumps(result), time.time())
+                    )
+            except Exception as e:
+                logging.warning(f"On-disk classification cache write failed: {e}")
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached result from both tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM classification_cache")
+            except Exception as e:
+                logging.warning(f"Could not clear on-disk classification cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for status endpoints"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'disk_cache': self.db_path,
+                'model_fingerprint': self.model_fingerprint[:12] if self.model_fingerprint else None
+            }
+
+
+# Global classification cache instance
+_classification_cache = None
+
+def get_classification_cache() -> ClassificationCache:
+    """
+    Get the shared classification result cache
+
+    CLASSIFICATION_CACHE_SIZE sets the in-process LRU size and
+    CLASSIFICATION_CACHE_DB enables the on-disk SQLite tier.
+    """
+    global _classification_cache
+
+    if _classification_cache is None:
+        _classification_cache = ClassificationCache(
+            max_entries=int(os.environ.get('CLASSIFICATION_CACHE_SIZE', 1024)),
+            db_path=os.environ.get('CLASSIFICATION_CACHE_DB') or None
+        )
+
+    return _classification_cache
+
+
+def classify_with_cache(classifier, cache: ClassificationCache, images: List[ImageSource],
+                        batch_size: Optional[int] = None, num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Classify images with a classifier, serving repeats from the cache
+
+    Each image is hashed on its decoded RGB pixels; only cache misses reach
+    the classifier, in a single classify_bulk_images call.
+    """
+    classifier.reload_if_model_changed()
+    cache.set_model_fingerprint(classifier.model_fingerprint if classifier.is_trained else None)
+
+    results = [None] * len(images)
+    misses = []
+    for index, image in enumerate(images):
+        try:
+            rgb_image = load_rgb_image(image)
+        except Exception as e:
+            logging.error(f"Could not decode image for classification: {e}")
+            rgb_image = None
+
+        image_hash = image_content_hash(rgb_image) if rgb_image is not None else None
+        cached = cache.get(image_hash) if image_hash else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            misses.append((index, image_hash, rgb_image if rgb_image is not None else image))
+
+    if misses:
+        classified = classifier.classify_bulk_images([source for _, _, source in misses],
+                                                     batch_size=batch_size, num_workers=num_workers)
+        for (index, image_hash, _), result in zip(misses, classified):
+            # Fallback results carry an 'error' key and are not worth remembering
+            if image_hash and 'error' not in result:
+                cache.put(image_hash, result)
+            results[index] = result
+
+    for image, result in zip(images, results):
+        if isinstance(image, str):
+            result['image_path'] = image
+    return results
@@ -8,13 +8,19 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 import base64
 import io
-from typing import List, Dict, Any, Optional, Tuple
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from PIL import Image, ImageFilter, ImageStat
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import classification_report, accuracy_score
 from datetime import datetime
+from .categories import CATEGORIES
+from .classification_cache import classify_with_cache, file_fingerprint, get_classification_cache
+from .image_io import ImageSource, load_rgb_image
 
 # Try to import PyTorch, fall back to sklearn if not available
 try:
@@ -31,6 +37,32 @@ except ImportError:
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Cheap (size, mtime) signature used to detect a replaced model file"""
+    try:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None
+
+def _replace_file(path: str, write: Callable[[str], None]):
+    """Write a file beside path and rename it into place
+
+    Processes that memory-mapped the old weights keep reading the old inode
+    until they reload, instead of seeing the file change (or shrink) under
+    their parameters.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 class FallbackDentalClassifier:
     """
     Fallback classifier when PyTorch is not available
@@ -42,13 +74,12 @@ class FallbackDentalClassifier:
         self.last_train_accuracy = None
         self.last_val_accuracy = None
         self.last_training_time = None
+        self.model_fingerprint = None  # Version of the loaded model file, used for cache keys
+        self._model_file_signature = None
+        self.feature_batch_size = 32  # Images featurized per stacked array in classify_bulk_images
 
         # Categories matching your training data
-        self.categories = [
-            'extraoral_frontal', 'extraoral_full_face_smile', 'extraoral_right', 
-            'extraoral_zoomed_smile', 'intraoral_front', 'intraoral_left', 
-            'intraoral_right', 'lower_occlusal', 'upper_occlusal'
-        ]
+        self.categories = list(CATEGORIES)
 
         # Initialize fallback model
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
@@ -60,6 +91,8 @@ class FallbackDentalClassifier:
 
     def load_model(self):
         """Load the trained fallback model"""
+        self._model_file_signature = _file_signature(self.model_path)
+        self.model_fingerprint = None
         try:
             if os.path.exists(self.model_path):
                 with open(self.model_path, 'rb') as f:
@@ -68,6 +101,7 @@ class FallbackDentalClassifier:
                     self.scaler = model_data.get('scaler', self.scaler)
                     self.label_encoder = model_data.get('label_encoder', self.label_encoder)
 
+                self.model_fingerprint = f"sklearn:{file_fingerprint(self.model_path)}"
                 self.is_trained = True
                 self.last_training_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 logging.info("Fallback dental classifier loaded successfully")
@@ -78,166 +112,222 @@ class FallbackDentalClassifier:
             logging.error(f"Failed to load fallback model: {e}")
             self.is_trained = False
 
-    def extract_features(self, image_path: str) -> np.ndarray:
+    def reload_if_model_changed(self) -> bool:
+        """Reload the model if its file was replaced since it was loaded"""
+        if _file_signature(self.model_path) == self._model_file_signature:
+            return False
+        logging.info(f"Fallback model file {self.model_path} changed, reloading")
+        self.load_model()
+        return True
+
+    def _load_feature_array(self, image_path: ImageSource) -> np.ndarray:
+        """Decode an image once into the (224, 224, 3) uint8 array all features are computed from"""
+        with load_rgb_image(image_path) as img:
+            return np.asarray(img.resize((224, 224)))
+
+    def extract_batch_features(self, batch: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Compute model features and extraoral refinement statistics for an (N, 224, 224, 3) batch
+
+        Grayscale and gradients are computed once for the whole batch and
+        shared by the 17 model features and the refinement rules. Returns an
+        (N, 17) feature matrix and a dict of per-image statistic arrays.
+        """
+        pixels = batch.astype(np.float64)
+        height, width = pixels.shape[1:3]
+        h_mid, w_mid = height // 2, width // 2
+
+        # Color features
+        mean_rgb = pixels.mean(axis=(1, 2))
+        std_rgb = pixels.std(axis=(1, 2))
+
+        # Texture features
+        gray = pixels.mean(axis=3)
+        gradient_y, gradient_x = np.gradient(gray, axis=(1, 2))
+        abs_gradient_x = np.abs(gradient_x).mean(axis=(1, 2))
+        abs_gradient_y = np.abs(gradient_y).mean(axis=(1, 2))
+        gray_std = gray.std(axis=(1, 2))
+        brightness_mean = gray.mean(axis=(1, 2))
+        aspect_ratio = np.full(len(batch), width / height)
+
+        # Regional analysis (divide into halves)
+        top_brightness = gray[:, :h_mid, :].mean(axis=(1, 2))
+        bottom_brightness = gray[:, h_mid:, :].mean(axis=(1, 2))
+        left_brightness = gray[:, :, :w_mid].mean(axis=(1, 2))
+        right_brightness = gray[:, :, w_mid:].mean(axis=(1, 2))
+
+        features = np.column_stack([
+            mean_rgb,
+            std_rgb,
+            abs_gradient_x,
+            abs_gradient_y,
+            gray_std,
+            (abs_gradient_x + abs_gradient_y) / 2,  # Edge density over both gradient axes
+            aspect_ratio,
+            brightness_mean,
+            gray_std,
+            top_brightness,
+            bottom_brightness,
+            left_brightness,
+            right_brightness
+        ])
+
+        # Edge magnitude for smile detection (more edges in the mouth area)
+        edges = np.sqrt(gradient_x ** 2 + gradient_y ** 2)
+        stats = {
+            'aspect_ratio': aspect_ratio,
+            'brightness': brightness_mean,
+            'brightness_std': pixels.std(axis=(1, 2, 3)),
+            'bottom_half_brightness': bottom_brightness,
+            'left_brightness': left_brightness,
+            'right_brightness': right_brightness,
+            'edge_mean': edges.mean(axis=(1, 2)),
+            'bottom_center_edges': edges[:, int(height * 0.6):int(height * 0.9),
+                                         int(width * 0.3):int(width * 0.7)].mean(axis=(1, 2))
+        }
+        return features, stats
+
+    def extract_features(self, image_path: ImageSource) -> np.ndarray:
         """Extract enhanced features from image for better extraoral classification"""
         try:
-            with Image.open(image_path) as img:
-                # Convert to RGB if needed
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                # Resize to standard size
-                img = img.resize((224, 224))
-
-                # Extract basic color and texture features
-                img_array = np.array(img)
-
-                # Color features
-                mean_rgb = np.mean(img_array, axis=(0, 1))
-                std_rgb = np.std(img_array, axis=(0, 1))
-
-                # Enhanced texture features for extraoral distinction
-                gray = np.mean(img_array, axis=2)
-                gradient_x = np.gradient(gray, axis=1)
-                gradient_y = np.gradient(gray, axis=0)
-                
-                # Additional features to distinguish extraoral types
-                # Face detection features (simple edge detection for face boundaries)
-                edges = np.gradient(gray)
-                edge_density = np.mean(np.abs(edges))
-                
-                # Aspect ratio and shape features
-                height, width = gray.shape
-                aspect_ratio = width / height
-                
-                # Brightness distribution (helpful for smile detection)
-                brightness_mean = np.mean(gray)
-                brightness_std = np.std(gray)
-                
-                # Regional analysis (divide into quadrants)
-                h_mid, w_mid = height // 2, width // 2
-                top_brightness = np.mean(gray[:h_mid, :])
-                bottom_brightness = np.mean(gray[h_mid:, :])
-                left_brightness = np.mean(gray[:, :w_mid])
-                right_brightness = np.mean(gray[:, w_mid:])
-                
-                texture_features = [
-                    np.mean(np.abs(gradient_x)),
-                    np.mean(np.abs(gradient_y)),
-                    np.std(gray),
-                    edge_density,
-                    aspect_ratio,
-                    brightness_mean,
-                    brightness_std,
-                    top_brightness,
-                    bottom_brightness,
-                    left_brightness,
-                    right_brightness
-                ]
-
-                # Combine all features
-                features = np.concatenate([mean_rgb, std_rgb, texture_features])
-                return features
-
+            features, _ = self.extract_batch_features(self._load_feature_array(image_path)[np.newaxis])
+            return features[0]
         except Exception as e:
             logging.error(f"Feature extraction failed: {e}")
             return np.zeros(17)  # Return zero features on error (updated size)
 
-    def _rule_based_extraoral_refinement(self, image_path: str, predicted_category: str, confidence: float, probabilities: dict) -> Dict[str, Any]:
-        """Apply rule-based refinement for extraoral images"""
-        try:
-            # Only apply to extraoral images
-            if not predicted_category.startswith('extraoral'):
-                return None
-                
-            # Extract additional features for rule-based classification
-            with Image.open(image_path) as img:
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                img = img.resize((224, 224))
-                img_array = np.array(img)
-                
-                # Analyze image characteristics
-                height, width = img_array.shape[:2]
-                aspect_ratio = width / height
-                
-                # Color analysis
-                brightness = np.mean(img_array)
-                
-                # Regional brightness analysis
-                h_mid, w_mid = height // 2, width // 2
-                center_brightness = np.mean(img_array[h_mid-50:h_mid+50, w_mid-50:w_mid+50])
-                bottom_half_brightness = np.mean(img_array[h_mid:, :])
-                
-                # Edge detection for smile (more edges in mouth area)
-                gray = np.mean(img_array, axis=2)
-                # Simple gradient-based edge detection (no scipy needed)
-                grad_x = np.gradient(gray, axis=1)
-                grad_y = np.gradient(gray, axis=0)
-                edges = np.sqrt(grad_x**2 + grad_y**2)
-                bottom_center_edges = np.mean(edges[int(height*0.6):int(height*0.9), int(width*0.3):int(width*0.7)])
-                
-                # Rule-based logic
-                rules_applied = []
-                
-                # Rule 1: Zoomed smile detection
-                if (bottom_center_edges > np.mean(edges) * 1.5 and 
-                    bottom_half_brightness > brightness * 0.9 and
-                    confidence < 0.8):
-                    rules_applied.append("high_mouth_detail")
-                    predicted_category = 'extraoral_zoomed_smile'
-                    confidence = min(0.85, confidence + 0.2)
-                
-                # Rule 2: Right view detection (asymmetric lighting)
-                left_brightness = np.mean(img_array[:, :w_mid])
-                right_brightness = np.mean(img_array[:, w_mid:])
-                brightness_asymmetry = abs(left_brightness - right_brightness) / max(left_brightness, right_brightness)
-                
-                if (brightness_asymmetry > 0.15 and 
-                    aspect_ratio > 1.1 and
-                    confidence < 0.8):
-                    rules_applied.append("asymmetric_lighting")
-                    predicted_category = 'extraoral_right'
-                    confidence = min(0.85, confidence + 0.2)
-                
-                # Rule 3: Full face smile (wide aspect ratio + high brightness variation)
-                brightness_std = np.std(img_array)
-                if (aspect_ratio > 1.3 and 
-                    brightness_std > np.mean(img_array) * 0.3 and
-                    confidence < 0.8):
-                    rules_applied.append("wide_face_view")
-                    predicted_category = 'extraoral_full_face_smile'
-                    confidence = min(0.85, confidence + 0.2)
-                
-                if rules_applied:
-                    logging.info(f"Rule-based refinement applied: {rules_applied} -> {predicted_category}")
-                    return {
-                        'classification': predicted_category,
-                        'confidence': confidence,
-                        'rules_applied': rules_applied
-                    }
-                    
-        except Exception as e:
-            logging.error(f"Rule-based refinement failed: {e}")
-            
+    def _rule_based_extraoral_refinement(self, stats: Dict[str, float], predicted_category: str, confidence: float, probabilities: dict) -> Dict[str, Any]:
+        """Apply rule-based refinement for extraoral images from precomputed image statistics"""
+        # Only apply to extraoral images
+        if not predicted_category.startswith('extraoral'):
+            return None
+
+        rules_applied = []
+        brightness = stats['brightness']
+        aspect_ratio = stats['aspect_ratio']
+
+        # Rule 1: Zoomed smile detection
+        if (stats['bottom_center_edges'] > stats['edge_mean'] * 1.5 and
+            stats['bottom_half_brightness'] > brightness * 0.9 and
+            confidence < 0.8):
+            rules_applied.append("high_mouth_detail")
+            predicted_category = 'extraoral_zoomed_smile'
+            confidence = min(0.85, confidence + 0.2)
+
+        # Rule 2: Right view detection (asymmetric lighting)
+        left_brightness, right_brightness = stats['left_brightness'], stats['right_brightness']
+        brightness_asymmetry = abs(left_brightness - right_brightness) / max(left_brightness, right_brightness)
+
+        if (brightness_asymmetry > 0.15 and
+            aspect_ratio > 1.1 and
+            confidence < 0.8):
+            rules_applied.append("asymmetric_lighting")
+            predicted_category = 'extraoral_right'
+            confidence = min(0.85, confidence + 0.2)
+
+        # Rule 3: Full face smile (wide aspect ratio + high brightness variation)
+        if (aspect_ratio > 1.3 and
+            stats['brightness_std'] > brightness * 0.3 and
+            confidence < 0.8):
+            rules_applied.append("wide_face_view")
+            predicted_category = 'extraoral_full_face_smile'
+            confidence = min(0.85, confidence + 0.2)
+
+        if rules_applied:
+            logging.info(f"Rule-based refinement applied: {rules_applied} -> {predicted_category}")
+            return {
+                'classification': predicted_category,
+                'confidence': confidence,
+                'rules_applied': rules_applied
+            }
+
         return None
 
-    def classify_image(self, image_path: str) -> Dict[str, Any]:
+    def classify_image(self, image_path: ImageSource) -> Dict[str, Any]:
         """Classify a dental image using fallback model with rule-based refinement"""
-        try:
-            if not self.is_trained:
-                return self._fallback_classification()
+        result = self.classify_bulk_images([image_path])[0]
+        result.pop('image_path', None)
+        return result
 
-            # Extract features
-            features = self.extract_features(image_path)
-            features = self.scaler.transform([features])
+    def _fallback_classification(self) -> Dict[str, Any]:
+        """Ultimate fallback classification"""
+        return {
+            'classification': 'intraoral_front',
+            'confidence': 0.3,
+            'probabilities': {cat: 1.0/len(self.categories) for cat in self.categories},
+            'category_name': 'Intraoral Front (Fallback)',
+            'error': 'Model not trained',
+            'model_used': 'fallback_default'
+        }
 
-            # Make prediction
-            prediction = self.model.predict(features)[0]
-            probabilities = self.model.predict_proba(features)[0]
+    def classify_bulk_images(self, image_paths: List[ImageSource], batch_size: Optional[int] = None,
+                             num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Classify multiple images with a single predict_proba call
 
-            # Get category
-            predicted_category = self.label_encoder.inverse_transform([prediction])[0]
+        Each image is decoded once; features are computed on stacked
+        (N, 224, 224, 3) chunks of batch_size images to bound memory.
+        num_workers is accepted for interface compatibility.
+        """
+        batch_size = max(1, batch_size or self.feature_batch_size)
+        results = [None] * len(image_paths)
+
+        if not self.is_trained:
+            results = [self._fallback_classification() for _ in image_paths]
+        else:
+            indices, arrays = [], []
+            for index, image_path in enumerate(image_paths):
+                try:
+                    arrays.append(self._load_feature_array(image_path))
+                    indices.append(index)
+                except Exception as e:
+                    logging.error(f"Enhanced classification failed for {image_path}: {e}")
+                    results[index] = self._fallback_classification()
+
+            if arrays:
+                try:
+                    self._classify_feature_arrays(indices, arrays, batch_size, results)
+                except Exception as e:
+                    logging.error(f"Enhanced batch classification failed: {e}")
+                    for index in indices:
+                        results[index] = self._fallback_classification()
+
+        for image_path, result in zip(image_paths, results):
+            if isinstance(image_path, str):
+                result['image_path'] = image_path
+        return results
+
+    def _classify_feature_arrays(self, indices: List[int], arrays: List[np.ndarray], batch_size: int,
+                                 results: List[Optional[Dict[str, Any]]]):
+        """Featurize decoded arrays in chunks, predict once, and fill results at indices"""
+        feature_chunks, stat_chunks = [], []
+        for start in range(0, len(arrays), batch_size):
+            features, stats = self.extract_batch_features(np.stack(arrays[start:start + batch_size]))
+            feature_chunks.append(features)
+            stat_chunks.append(stats)
+        features = np.concatenate(feature_chunks)
+        stats = {key: np.concatenate([chunk[key] for chunk in stat_chunks]) for key in stat_chunks[0]}
+
+        all_probabilities = self.model.predict_proba(self.scaler.transform(features))
+        predictions = self.model.classes_.take(np.argmax(all_probabilities, axis=1))
+        predicted_categories = self.label_encoder.inverse_transform(predictions)
+
+        # Map to user-friendly names
+        category_names = {
+            'extraoral_frontal': 'Extraoral Frontal',
+            'extraoral_full_face_smile': 'Extraoral Full Face Smile',
+            'extraoral_right': 'Extraoral Right',
+            'extraoral_zoomed_smile': 'Extraoral Zoomed Smile',
+            'intraoral_front': 'Intraoral Front',
+            'intraoral_left': 'Intraoral Left',
+            'intraoral_right': 'Intraoral Right',
+            'lower_occlusal': 'Lower Occlusal',
+            'upper_occlusal': 'Upper Occlusal'
+        }
+
+        for row, index in enumerate(indices):
+            probabilities = all_probabilities[row]
+            predicted_category = predicted_categories[row]
             confidence = max(probabilities)
 
             # Create probability dictionary
@@ -246,25 +336,13 @@ class FallbackDentalClassifier:
                 prob_dict[category] = probabilities[i] if i < len(probabilities) else 0.0
 
             # Apply rule-based refinement for extraoral images
-            refinement = self._rule_based_extraoral_refinement(image_path, predicted_category, confidence, prob_dict)
+            image_stats = {key: values[row] for key, values in stats.items()}
+            refinement = self._rule_based_extraoral_refinement(image_stats, predicted_category, confidence, prob_dict)
             if refinement:
                 predicted_category = refinement['classification']
                 confidence = refinement['confidence']
                 # Update probabilities to reflect rule-based decision
                 prob_dict[predicted_category] = confidence
-                
-            # Map to user-friendly names
-            category_names = {
-                'extraoral_frontal': 'Extraoral Frontal',
-                'extraoral_full_face_smile': 'Extraoral Full Face Smile',
-                'extraoral_right': 'Extraoral Right',
-                'extraoral_zoomed_smile': 'Extraoral Zoomed Smile',
-                'intraoral_front': 'Intraoral Front',
-                'intraoral_left': 'Intraoral Left',
-                'intraoral_right': 'Intraoral Right',
-                'lower_occlusal': 'Lower Occlusal',
-                'upper_occlusal': 'Upper Occlusal'
-            }
 
             logging.info(f"Enhanced classification: {predicted_category} (confidence: {confidence:.3f})")
 
@@ -275,36 +353,11 @@ class FallbackDentalClassifier:
                 'category_name': category_names.get(predicted_category, 'Unknown'),
                 'model_used': 'fallback_sklearn_enhanced'
             }
-            
+
             if refinement and 'rules_applied' in refinement:
                 result['rules_applied'] = refinement['rules_applied']
-                
-            return result
-
-        except Exception as e:
-            logging.error(f"Enhanced classification failed for {image_path}: {e}")
-            return self._fallback_classification()
-
-    def _fallback_classification(self) -> Dict[str, Any]:
-        """Ultimate fallback classification"""
-        return {
-            'classification': 'intraoral_front',
-            'confidence': 0.3,
-            'probabilities': {cat: 1.0/len(self.categories) for cat in self.categories},
-            'category_name': 'Intraoral Front (Fallback)',
-            'error': 'Model not trained',
-            'model_used': 'fallback_default'
-        }
-
-    def classify_bulk_images(self, image_paths: List[str]) -> List[Dict[str, Any]]:
-        """Classify multiple images efficiently"""
-        results = []
-        for image_path in image_paths:
-            result = self.classify_image(image_path)
-            result['image_path'] = image_path
-            results.append(result)
-        return results
 
+            results[index] = result
 
 if PYTORCH_AVAILABLE:
     class PyTorchDentalClassifier:
@@ -312,23 +365,28 @@ if PYTORCH_AVAILABLE:
         PyTorch-based dental image classifier using the trained modelmhanna model
         """
 
-        def __init__(self, model_path: str = "AI_System/models/dental_classifier.pt"):
+        def __init__(self, model_path: str = "AI_System/models/dental_classifier.pt", batch_size: int = 8,
+                     num_workers: int = 4, prefetch_batches: int = 2, mmap_weights: bool = False,
+                     backend: str = 'eager'):
             if not PYTORCH_AVAILABLE:
                 raise ImportError("PyTorch not available")
 
             self.model_path = model_path
+            self.mmap_weights = mmap_weights  # Back parameters with the mapped weights file
+            self.backend = backend  # 'eager', 'torchscript' or 'int8' to run an exported artifact
+            self.batch_size = batch_size  # Images per forward pass in classify_bulk_images
+            self.num_workers = num_workers  # Preprocessing threads; 0 preprocesses on the calling thread
+            self.prefetch_batches = prefetch_batches  # Batches decoded ahead of the forward pass
             self.device = torch.device('cpu')  # Use CPU for compatibility
             self.is_trained = False
             self.last_train_accuracy = None
             self.last_val_accuracy = None
             self.last_training_time = None
+            self.model_fingerprint = None  # Version of the loaded weights, used for cache keys
+            self._model_file_signature = None
 
             # Categories matching the modelmhanna training data (9 classes)
-            self.categories = [
-                'extraoral_frontal', 'extraoral_full_face_smile', 'extraoral_right', 
-                'extraoral_zoomed_smile', 'intraoral_front', 'intraoral_left', 
-                'intraoral_right', 'lower_occlusal', 'upper_occlusal'
-            ]
+            self.categories = list(CATEGORIES)
 
             # Image preprocessing pipeline (matching modelmhanna preprocessing)
             self.transform = transforms.Compose([
@@ -341,18 +399,26 @@ if PYTORCH_AVAILABLE:
             self.model = models.resnet34(weights=None)  # Updated to ResNet34 to match trained models
             self.model.fc = nn.Linear(self.model.fc.in_features, 9)  # 9 classes
             self.model.to(self.device)
+            self.inference_model = self.model  # Module used for forward passes; eager or TorchScript
 
             # Load trained weights from modelmhanna
             self.load_model()
 
         def load_model(self):
             """Load the trained modelmhanna PyTorch model"""
+            self._model_file_signature = _file_signature(self.model_path)
+            self.model_fingerprint = None
             try:
                 if os.path.exists(self.model_path):
                     logging.info(f"Loading modelmhanna PyTorch model from {self.model_path}")
-                    state_dict = torch.load(self.model_path, map_location=self.device)
-                    self.model.load_state_dict(state_dict)
+                    self._load_state_dict()
                     self.model.eval()
+                    self.model_fingerprint = f"pytorch:{file_fingerprint(self.model_path)}"
+                    self.inference_model = self.model
+                    if self.backend == 'torchscript':
+                        self._load_torchscript()
+                    elif self.backend == 'int8':
+                        self._load_quantized()
                     self.is_trained = True
                     self.last_training_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                     logging.info("Modelmhanna dental classifier loaded successfully")
@@ -363,17 +429,152 @@ if PYTORCH_AVAILABLE:
                 logging.error(f"Failed to load modelmhanna PyTorch model: {e}")
                 self.is_trained = False
 
-        def preprocess_image(self, image_path: str) -> torch.Tensor:
+        def _load_state_dict(self):
+            """Load the weights, memory-mapping the file when torch supports it
+
+            With mmap=True and assign=True the parameters are views of the
+            file's pages instead of private copies. Those pages come from the
+            OS page cache, so every process that loads the same file (for
+            example forked gunicorn workers) shares one copy of the weights.
+            Only the AI_PRELOAD path turns this on; writers replace the file
+            by rename (_replace_file) so mapped pages never change underneath.
+            """
+            if self.mmap_weights:
+                try:
+                    state_dict = torch.load(self.model_path, map_location=self.device, mmap=True, weights_only=True)
+                    self.model.load_state_dict(state_dict, assign=True)
+                    logging.info("Modelmhanna weights memory-mapped from disk")
+                    return
+                except (TypeError, RuntimeError) as e:
+                    # Older torch, or a legacy (non-zip) checkpoint that cannot be mapped
+                    logging.info(f"Memory-mapped weight loading unavailable, copying weights: {e}")
+
+            state_dict = torch.load(self.model_path, map_location=self.device)
+            self.model.load_state_dict(state_dict)
+
+        def _load_torchscript(self, path: str = None):
+            """Switch inference to the exported TorchScript artifact if it matches the weights
+
+            The artifact is saved frozen (constants inlined, batch norm folded
+            into the convolutions); optimize_for_inference then fuses ops for
+            the CPU it is loaded on. Missing or stale artifacts leave the eager
+            model in place.
+            """
+            module = self._load_artifact(path or torchscript_path(self.model_path), 'TorchScript')
+            if module is not None:
+                self.inference_model = torch.jit.optimize_for_inference(module)
+                # Fused kernels round differently, so cached eager results are not reused
+                self.model_fingerprint = f"{self.model_fingerprint}:torchscript"
+
+        def _load_quantized(self, path: str = None):
+            """Switch inference to the INT8 quantized artifact if it matches the weights"""
+            module = self._load_artifact(path or quantized_path(self.model_path), 'INT8')
+            if module is not None:
+                self.inference_model = module
+                self.model_fingerprint = f"{self.model_fingerprint}:int8"
+
+        def _load_artifact(self, path: str, label: str):
+            """Load an exported TorchScript module, or None if it is missing or stale"""
+            if not os.path.exists(path):
+                logging.warning(f"{label} artifact {path} not found, using eager model")
+                return None
+
+            try:
+                extra_files = {'source_fingerprint': '', 'quantized_engine': ''}
+                module = torch.jit.load(path, map_location=self.device, _extra_files=extra_files)
+                extra = {key: value.decode('utf-8') if isinstance(value, bytes) else value
+                         for key, value in extra_files.items()}
+                if extra['source_fingerprint'] != self.model_fingerprint:
+                    logging.warning(f"{label} artifact {path} was exported from other weights, using eager model")
+                    return None
+
+                if extra['quantized_engine']:
+                    # Quantized kernels must run on the engine they were packed for
+                    torch.backends.quantized.engine = extra['quantized_engine']
+                logging.info(f"Modelmhanna {label} model loaded from {path}")
+                return module
+            except Exception as e:
+                logging.error(f"Failed to load {label} artifact {path}, using eager model: {e}")
+                return None
+
+        def export_torchscript(self, output_path: str = None) -> str:
+            """Trace and freeze the loaded weights into a TorchScript artifact"""
+            if not self.is_trained:
+                raise RuntimeError("No trained weights to export")
+
+            path = output_path or torchscript_path(self.model_path)
+            self.model.eval()
+            example = torch.zeros(1, 3, 224, 224, device=self.device)
+            with torch.no_grad():
+                module = torch.jit.freeze(torch.jit.trace(self.model, example))
+            torch.jit.save(module, path, _extra_files={'source_fingerprint': f"pytorch:{file_fingerprint(self.model_path)}"})
+            logging.info(f"Modelmhanna TorchScript model exported to {path}")
+            return path
+
+        def export_quantized(self, calibration_images: List[ImageSource], output_path: str = None,
+                             batch_size: int = 8) -> str:
+            """Quantize the loaded weights to INT8 and save them as a TorchScript artifact
+
+            Uses post-training static quantization: conv/bn/relu are fused,
+            observers record activation ranges over calibration_images, and
+            weights and activations are then converted to int8.
+            """
+            if not self.is_trained:
+                raise RuntimeError("No trained weights to quantize")
+            if not calibration_images:
+                raise ValueError("Static quantization needs calibration images")
+
+            from torch.ao import quantization
+            from torchvision.models.quantization.resnet import QuantizableBasicBlock, QuantizableResNet
+
+            engine = quantization_engine()
+            torch.backends.quantized.engine = engine
+
+            # ResNet34 layout; module names match models.resnet34, so the fp32 state dict loads as-is
+            model = QuantizableResNet(QuantizableBasicBlock, [3, 4, 6, 3])
+            model.fc = nn.Linear(model.fc.in_features, len(self.categories))
+            model.load_state_dict(self.model.state_dict())
+            model.eval()
+            model.fuse_model()
+            model.qconfig = quantization.get_default_qconfig(engine)
+            quantization.prepare(model, inplace=True)
+
+            with torch.no_grad():
+                for start in range(0, len(calibration_images), batch_size):
+                    chunk = calibration_images[start:start + batch_size]
+                    model(torch.cat([self.preprocess_image(image) for image in chunk]))
+            quantization.convert(model, inplace=True)
+
+            path = output_path or quantized_path(self.model_path)
+            example = torch.zeros(1, 3, 224, 224, device=self.device)
+            with torch.no_grad():
+                module = torch.jit.freeze(torch.jit.trace(model, example))
+            torch.jit.save(module, path, _extra_files={
+                'source_fingerprint': f"pytorch:{file_fingerprint(self.model_path)}",
+                'quantized_engine': engine
+            })
+            logging.info(f"Modelmhanna INT8 model ({engine}) calibrated on {len(calibration_images)} images, saved to {path}")
+            return path
+
+        def reload_if_model_changed(self) -> bool:
+            """Reload the weights if the model file was replaced since they were loaded"""
+            if _file_signature(self.model_path) == self._model_file_signature:
+                return False
+            logging.info(f"Modelmhanna model file {self.model_path} changed, reloading")
+            self.load_model()
+            return True
+
+        def preprocess_image(self, image_path: ImageSource) -> torch.Tensor:
             """Preprocess image for modelmhanna PyTorch model"""
             try:
-                image = Image.open(image_path).convert('RGB')
+                image = load_rgb_image(image_path)
                 image_tensor = self.transform(image).unsqueeze(0)
                 return image_tensor.to(self.device)
             except Exception as e:
                 logging.error(f"Image preprocessing failed: {e}")
                 raise
 
-        def classify_image(self, image_path: str) -> Dict[str, Any]:
+        def classify_image(self, image_path: ImageSource) -> Dict[str, Any]:
             """Classify a dental image using modelmhanna PyTorch model"""
             try:
                 if not self.is_trained:
@@ -383,42 +584,12 @@ if PYTORCH_AVAILABLE:
                 image_tensor = self.preprocess_image(image_path)
 
                 # Make prediction using modelmhanna model
-                with torch.no_grad():
-                    logits = self.model(image_tensor)
-                    probabilities = torch.softmax(logits, dim=1)
-                    predicted_idx = torch.argmax(logits, dim=1).item()
-                    confidence = probabilities[0][predicted_idx].item()
-
-                # Get category
-                predicted_category = self.categories[predicted_idx]
-
-                # Create probability dictionary
-                prob_dict = {}
-                for i, category in enumerate(self.categories):
-                    prob_dict[category] = probabilities[0][i].item()
-
-                # Map to user-friendly names
-                category_names = {
-                    'extraoral_frontal': 'Extraoral Frontal',
-                    'extraoral_full_face_smile': 'Extraoral Full Face Smile',
-                    'extraoral_right': 'Extraoral Right',
-                    'extraoral_zoomed_smile': 'Extraoral Zoomed Smile',
-                    'intraoral_front': 'Intraoral Front',
-                    'intraoral_left': 'Intraoral Left',
-                    'intraoral_right': 'Intraoral Right',
-                    'lower_occlusal': 'Lower Occlusal',
-                    'upper_occlusal': 'Upper Occlusal'
-                }
-
-                logging.info(f"Modelmhanna classification: {predicted_category} (confidence: {confidence:.3f})")
-
-                return {
-                    'classification': predicted_category,
-                    'confidence': confidence,
-                    'probabilities': prob_dict,
-                    'category_name': category_names.get(predicted_category, 'Unknown'),
-                    'model_used': 'modelmhanna_pytorch'
-                }
+                probabilities = self._predict_probabilities(image_tensor)
+                result = self._format_prediction(probabilities[0])
+
+                logging.info(f"Modelmhanna classification: {result['classification']} (confidence: {result['confidence']:.3f})")
+
+                return result
 
             except Exception as e:
                 logging.error(f"Modelmhanna PyTorch classification failed for {image_path}: {e}")
@@ -435,15 +606,77 @@ if PYTORCH_AVAILABLE:
                 'model_used': 'fallback'
             }
 
-        def classify_bulk_images(self, image_paths: List[str]) -> List[Dict[str, Any]]:
-            """Classify multiple images efficiently using modelmhanna model"""
-            results = []
-            for image_path in image_paths:
-                result = self.classify_image(image_path)
-                result['image_path'] = image_path
-                results.append(result)
+        def classify_bulk_images(self, image_paths: List[ImageSource], batch_size: Optional[int] = None,
+                                 num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+            """Classify multiple images using one forward pass per batch
+
+            Images are decoded and preprocessed on a thread pool of num_workers
+            threads, at most prefetch_batches batches ahead, so decoding the next
+            batch overlaps the forward pass of the current one.
+            """
+            batch_size = max(1, batch_size or self.batch_size)
+            num_workers = self.num_workers if num_workers is None else num_workers
+            results = [None] * len(image_paths)
+
+            if not self.is_trained:
+                results = [self._fallback_classification() for _ in image_paths]
+            else:
+                for indices, tensors in self._iter_preprocessed_batches(image_paths, batch_size, num_workers, results):
+                    if not tensors:
+                        continue
+
+                    try:
+                        probabilities = self._predict_probabilities(torch.cat(tensors))
+                        for index, row in zip(indices, probabilities):
+                            results[index] = self._format_prediction(row)
+                    except Exception as e:
+                        logging.error(f"Modelmhanna batch classification failed: {e}")
+                        for index in indices:
+                            results[index] = self._fallback_classification()
+
+                    logging.info(f"Modelmhanna batch classification: {len(indices)} images in one forward pass")
+
+            for image_path, result in zip(image_paths, results):
+                if isinstance(image_path, str):
+                    result['image_path'] = image_path
             return results
 
+        def _iter_preprocessed_batches(self, image_paths: List[ImageSource], batch_size: int,
+                                       num_workers: int, results: List[Optional[Dict[str, Any]]]):
+            """Yield (indices, tensors) per batch, filling results for images that fail to preprocess"""
+            batch_starts = iter(range(0, len(image_paths), batch_size))
+
+            def collect(start, outcomes):
+                indices, tensors = [], []
+                for index, outcome in zip(range(start, start + batch_size), outcomes):
+                    try:
+                        tensors.append(outcome())
+                        indices.append(index)
+                    except Exception as e:
+                        logging.error(f"Modelmhanna preprocessing failed for image {index}: {e}")
+                        results[index] = self._fallback_classification()
+                return indices, tensors
+
+            if num_workers <= 0:
+                for start in batch_starts:
+                    chunk = image_paths[start:start + batch_size]
+                    yield collect(start, [lambda path=path: self.preprocess_image(path) for path in chunk])
+                return
+
+            with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='dental-preprocess') as pool:
+                def submit(start):
+                    chunk = image_paths[start:start + batch_size]
+                    return start, [pool.submit(self.preprocess_image, path) for path in chunk]
+
+                # Bounded queue of batches being decoded ahead of the model
+                pending = deque(submit(start) for _, start in zip(range(max(1, self.prefetch_batches)), batch_starts))
+                while pending:
+                    start, futures = pending.popleft()
+                    next_start = next(batch_starts, None)
+                    if next_start is not None:
+                        pending.append(submit(next_start))
+                    yield collect(start, [future.result for future in futures])
+
         def train(self, data_path: str = "modelmhanna/data", validation_split: float = 0.2):
             """Train the modelmhanna PyTorch model"""
             try:
@@ -495,7 +728,12 @@ if PYTORCH_AVAILABLE:
                     logging.info(f"Epoch {epoch+1}/3 - Loss: {epoch_loss:.4f}, Accuracy: {epoch_acc:.2f}%")
 
                 # Save model
-                torch.save(self.model.state_dict(), self.model_path)
+                state_dict = self.model.state_dict()
+                _replace_file(self.model_path, lambda path: torch.save(state_dict, path))
+                self.model.eval()
+                self.inference_model = self.model  # Any exported artifact is now stale
+                self._model_file_signature = _file_signature(self.model_path)
+                self.model_fingerprint = f"pytorch:{file_fingerprint(self.model_path)}"
 
                 self.is_trained = True
                 self.last_train_accuracy = epoch_acc / 100
@@ -513,18 +751,28 @@ if PYTORCH_AVAILABLE:
             """Save the trained modelmhanna model"""
             try:
                 path = save_path or self.model_path
-                torch.save(self.model.state_dict(), path)
+                state_dict = self.model.state_dict()
+                _replace_file(path, lambda temp_path: torch.save(state_dict, temp_path))
                 logging.info(f"Modelmhanna model saved to {path}")
             except Exception as e:
                 logging.error(f"Failed to save modelmhanna model: {e}")
 
         def _predict(self, input_tensor: torch.Tensor) -> Dict[str, Any]:
             """Internal prediction method for modelmhanna model"""
+            probabilities = self._predict_probabilities(input_tensor)
+            return self._format_prediction(probabilities[0])
+
+        def _predict_probabilities(self, input_tensor: torch.Tensor) -> torch.Tensor:
+            """Run one forward pass over an (N, 3, 224, 224) batch and return softmax rows"""
             with torch.no_grad():
-                logits = self.model(input_tensor)
-                probabilities = torch.softmax(logits, dim=1)
-                predicted_idx = torch.argmax(logits, dim=1).item()
-                confidence = probabilities[0][predicted_idx].item()
+                logits = self.inference_model(input_tensor)
+                return torch.softmax(logits, dim=1)
+
+        def _format_prediction(self, probabilities: torch.Tensor) -> Dict[str, Any]:
+            """Build the per-image result dict from one row of class probabilities"""
+            probabilities = probabilities.tolist()
+            predicted_idx = max(range(len(probabilities)), key=probabilities.__getitem__)
+            confidence = probabilities[predicted_idx]
 
             # Get category
             predicted_category = self.categories[predicted_idx]
@@ -532,7 +780,7 @@ if PYTORCH_AVAILABLE:
             # Create probability dictionary
             prob_dict = {}
             for i, category in enumerate(self.categories):
-                prob_dict[category] = probabilities[0][i].item()
+                prob_dict[category] = probabilities[i]
 
             # Map to user-friendly names
             category_names = {
@@ -554,6 +802,22 @@ if PYTORCH_AVAILABLE:
                 'category_name': category_names.get(predicted_category, 'Unknown'),
                 'model_used': 'modelmhanna_pytorch'
             }
+
+    def torchscript_path(model_path: str) -> str:
+        """Path of the TorchScript artifact exported from a weights file"""
+        return f"{os.path.splitext(model_path)[0]}.torchscript.pt"
+
+    def quantized_path(model_path: str) -> str:
+        """Path of the INT8 quantized artifact exported from a weights file"""
+        return f"{os.path.splitext(model_path)[0]}.int8.pt"
+
+    def quantization_engine() -> str:
+        """Best quantized kernel backend for this CPU"""
+        supported = torch.backends.quantized.supported_engines
+        for engine in ('x86', 'fbgemm', 'qnnpack'):
+            if engine in supported:
+                return engine
+        raise RuntimeError("No quantized engine available")
 else:
     # Create a dummy class when PyTorch is not available
     class PyTorchDentalClassifier:
@@ -573,7 +837,12 @@ def get_dental_classifier():
         if PYTORCH_AVAILABLE:
             try:
                 # Try to use modelmhanna PyTorch classifier first
-                _classifier = PyTorchDentalClassifier("AI_System/models/dental_classifier.pt")
+                _classifier = PyTorchDentalClassifier(
+                    "AI_System/models/dental_classifier.pt",
+                    backend=os.environ.get('AI_MODEL_BACKEND', 'eager'),
+                    # Share mapped weights only where workers fork from a preloaded master
+                    mmap_weights=os.environ.get('AI_PRELOAD', 'false').lower() == 'true'
+                )
                 if _classifier.is_trained:
                     logging.info("Using modelmhanna PyTorch dental classifier")
                 else:
@@ -604,16 +873,28 @@ def initialize_dental_classifier():
         logging.error(f"Failed to initialize dental classifier: {e}")
         return None
 
+def classify_images_cached(images: List[ImageSource], batch_size: Optional[int] = None,
+                           num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Classify images through the content-hash cache"""
+    return classify_with_cache(get_dental_classifier(), get_classification_cache(), images,
+                               batch_size=batch_size, num_workers=num_workers)
+
+def classify_image_cached(image: ImageSource) -> Dict[str, Any]:
+    """Classify a single image through the content-hash cache"""
+    result = classify_images_cached([image])[0]
+    result.pop('image_path', None)
+    return result
+
 # Compatibility functions for existing code
-def classify_dental_image(image_path: str) -> Dict[str, Any]:
+def classify_dental_image(image_path: ImageSource) -> Dict[str, Any]:
     """Main function to classify dental images"""
-    classifier = get_dental_classifier()
-    return classifier.classify_image(image_path)
+    return classify_image_cached(image_path)
 
-def classify_bulk_images(image_paths: List[str]) -> List[Dict[str, Any]]:
+def classify_bulk_images(image_paths: List[ImageSource], batch_size: Optional[int] = None,
+                         num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
     """Bulk classification function"""
     classifier = get_dental_classifier()
-    return classifier.classify_bulk_images(image_paths)
+    return classifier.classify_bulk_images(image_paths, batch_size=batch_size, num_workers=num_workers)
 
 def encode_image_to_base64(image_path: str, max_size: tuple = (512, 512)) -> str:
     """Encode image to base64 (compatibility function)"""
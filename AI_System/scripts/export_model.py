@@ -0,0 +1,89 @@
+"""
+Export the dental classifier to TorchScript and check it against the eager model
+
+    python -m AI_System.scripts.export_model [--model AI_System/models/dental_classifier.pt]
+
+Writes <model>.torchscript.pt next to the weights, then compares the
+exported model's probabilities with the eager model's on sample images and
+reports per-image latency for both. Set AI_MODEL_BACKEND=torchscript to
+serve the exported artifact.
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+
+import torch
+
+from .dental_ai_model import PyTorchDentalClassifier
+from .model_benchmark import IMAGE_EXTENSIONS, benchmark
+
+
+def sample_images(image_dir: str, limit: int):
+    """Up to limit image paths from a directory tree"""
+    paths = sorted(path for path in glob.glob(os.path.join(image_dir, '**', '*'), recursive=True)
+                   if path.lower().endswith(IMAGE_EXTENSIONS))
+    return paths[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the dental classifier to TorchScript')
+    parser.add_argument('--model', default='AI_System/models/dental_classifier.pt', help='fp32 weights file')
+    parser.add_argument('--output', default=None, help='Artifact path (default: <model>.torchscript.pt)')
+    parser.add_argument('--images', default='AI_System/training_data/pytorch_training',
+                        help='Directory of sample images for the parity check')
+    parser.add_argument('--samples', type=int, default=16, help='Number of sample images')
+    parser.add_argument('--tolerance', type=float, default=1e-4, help='Maximum allowed probability difference')
+    parser.add_argument('--runs', type=int, default=10, help='Timed forward passes per benchmark')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    eager = PyTorchDentalClassifier(args.model, backend='eager')
+    if not eager.is_trained:
+        print(f"❌ No trained weights at {args.model}")
+        return 1
+
+    output = eager.export_torchscript(args.output)
+    print(f"✅ Exported TorchScript model to {output}")
+
+    scripted = PyTorchDentalClassifier(args.model, backend='eager')
+    scripted._load_torchscript(output)
+    if scripted.inference_model is scripted.model:
+        print("❌ Exported artifact could not be loaded")
+        return 1
+
+    paths = sample_images(args.images, args.samples)
+    if paths:
+        batch = torch.cat([eager.preprocess_image(path) for path in paths])
+        print(f"📷 Parity check on {len(paths)} images from {args.images}")
+    else:
+        batch = torch.randn(args.samples, 3, 224, 224)
+        print(f"📷 No images in {args.images}, parity check on {args.samples} random inputs")
+
+    eager_probs = eager._predict_probabilities(batch)
+    scripted_probs = scripted._predict_probabilities(batch)
+    max_diff = (eager_probs - scripted_probs).abs().max().item()
+    agreement = (eager_probs.argmax(dim=1) == scripted_probs.argmax(dim=1)).float().mean().item()
+    print(f"   Max probability difference: {max_diff:.2e} (tolerance {args.tolerance:.0e})")
+    print(f"   Top-1 agreement: {agreement:.1%}")
+
+    print(f"\n⏱️  Per-image latency ({torch.get_num_threads()} threads, {args.runs} runs)")
+    for batch_size in (1, min(8, batch.shape[0])):
+        sub_batch = batch[:batch_size]
+        eager_ms = benchmark(eager, sub_batch, args.runs)
+        scripted_ms = benchmark(scripted, sub_batch, args.runs)
+        print(f"   batch {batch_size}: eager {eager_ms:.1f} ms, torchscript {scripted_ms:.1f} ms "
+              f"({eager_ms / scripted_ms:.2f}x)")
+
+    if max_diff > args.tolerance:
+        print(f"\n❌ TorchScript model differs from eager model by {max_diff:.2e}")
+        return 1
+
+    print("\n✅ TorchScript model matches eager model")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,14 @@
+from typing import Union
+
+from PIL import Image
+
+# An image source is either a file path or an already-decoded PIL image
+ImageSource = Union[str, Image.Image]
+
+
+def load_rgb_image(image: ImageSource) -> Image.Image:
+    """Return an RGB copy of an image path or decoded PIL image"""
+    if isinstance(image, Image.Image):
+        return image.convert('RGB')
+    with Image.open(image) as img:
+        return img.convert('RGB')
@@ -0,0 +1,177 @@
+import logging
+import os
+from multiprocessing.connection import Client
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from .categories import CATEGORIES
+from .classification_cache import classify_with_cache, get_classification_cache
+from .image_io import ImageSource, load_rgb_image
+
+DEFAULT_SOCKET = '/tmp/dental-inference.sock'
+
+# Images are resized to the network input size before they cross the socket,
+# with the same bilinear resize torchvision's Resize((224, 224)) applies
+INPUT_SIZE = (224, 224)
+
+def inference_address() -> str:
+    """Unix socket path of the inference server"""
+    return os.environ.get('INFERENCE_SOCKET') or DEFAULT_SOCKET
+
+
+def inference_authkey() -> bytes:
+    """Shared secret used to authenticate connections to the inference server"""
+    authkey = os.environ.get('INFERENCE_AUTHKEY')
+    if not authkey:
+        # A built-in default would let any local process drive the server
+        raise RuntimeError("INFERENCE_AUTHKEY must be set to use the inference server")
+    return authkey.encode('utf-8')
+
+
+def encode_image(image: ImageSource) -> Tuple[str, Tuple[int, int], bytes]:
+    """Resize an image to the network input size and pack it for the socket"""
+    rgb_image = load_rgb_image(image).resize(INPUT_SIZE, Image.BILINEAR)
+    return rgb_image.mode, rgb_image.size, rgb_image.tobytes()
+
+
+def decode_image(payload: Tuple[str, Tuple[int, int], bytes]) -> Image.Image:
+    """Rebuild a PIL image packed by encode_image"""
+    mode, size, data = payload
+    return Image.frombytes(mode, size, data)
+
+
+class RemoteDentalClassifier:
+    """
+    Client for the out-of-process inference server
+
+    Exposes the same interface as PyTorchDentalClassifier, so the cache and
+    the upload routes work unchanged. Model weights live only in the server
+    process; web workers never import torch. If the server is unreachable,
+    images get the usual fallback result with an 'error' key.
+    """
+
+    def __init__(self, address: Optional[str] = None, authkey: Optional[bytes] = None, timeout: float = 30.0):
+        self.address = address or inference_address()
+        self.authkey = authkey or inference_authkey()
+        self.timeout = timeout
+        self.is_trained = False
+        self.model_path = None
+        self.model_type = None
+        self.model_fingerprint = None
+        self.last_train_accuracy = None
+        self.last_val_accuracy = None
+        self.last_training_time = None
+        self.categories = list(CATEGORIES)
+        self.server_stats = {}
+        self.refresh_status()
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        with Client(self.address, family='AF_UNIX', authkey=self.authkey) as conn:
+            conn.send(message)
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"Inference server did not answer within {self.timeout}s")
+            reply = conn.recv()
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply
+
+    def refresh_status(self) -> bool:
+        """Fetch model metadata from the server; returns False if it is unreachable"""
+        try:
+            status = self._request({'op': 'status'})
+        except Exception as e:
+            logging.warning(f"Inference server at {self.address} unavailable: {e}")
+            self.is_trained = False
+            return False
+
+        for key in ('is_trained', 'model_path', 'model_type', 'model_fingerprint', 'categories',
+                    'last_train_accuracy', 'last_val_accuracy', 'last_training_time'):
+            setattr(self, key, status.get(key))
+        self.server_stats = status.get('stats', {})
+        return True
+
+    def reload_if_model_changed(self) -> bool:
+        """Pick up a new model fingerprint from the server"""
+        previous = self.model_fingerprint
+        self.refresh_status()
+        return self.model_fingerprint != previous
+
+    def _fallback_classification(self) -> Dict[str, Any]:
+        """Fallback classification when the inference server cannot be reached"""
+        return {
+            'classification': 'intraoral_front',
+            'confidence': 0.3,
+            'probabilities': {cat: 1.0/len(self.categories) for cat in self.categories},
+            'category_name': 'Intraoral Front (Fallback)',
+            'error': 'Inference server unavailable',
+            'model_used': 'fallback'
+        }
+
+    def classify_image(self, image_path: ImageSource) -> Dict[str, Any]:
+        """Classify a single image on the inference server"""
+        result = self.classify_bulk_images([image_path])[0]
+        result.pop('image_path', None)
+        return result
+
+    def classify_bulk_images(self, image_paths: List[ImageSource], batch_size: Optional[int] = None,
+                             num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Classify images in one round trip to the inference server
+
+        batch_size and num_workers are accepted for interface compatibility;
+        the server chooses its own micro-batches.
+        """
+        results = [None] * len(image_paths)
+        payloads = []
+        for index, image in enumerate(image_paths):
+            try:
+                payloads.append((index, encode_image(image)))
+            except Exception as e:
+                logging.error(f"Error preparing {image if isinstance(image, str) else 'image'} for inference: {e}")
+                results[index] = self._fallback_classification()
+
+        if payloads:
+            try:
+                reply = self._request({'op': 'classify', 'images': [payload for _, payload in payloads]})
+                for (index, _), result in zip(payloads, reply['results']):
+                    results[index] = result
+            except Exception as e:
+                logging.error(f"Remote classification failed: {e}")
+                for index, _ in payloads:
+                    results[index] = self._fallback_classification()
+
+        for image, result in zip(image_paths, results):
+            if isinstance(image, str):
+                result['image_path'] = image
+        return results
+
+    def train(self, *args, **kwargs):
+        raise RuntimeError("Training runs in the inference server process")
+
+
+# Global client instance
+_classifier = None
+
+def get_dental_classifier() -> RemoteDentalClassifier:
+    """Get the shared inference server client"""
+    global _classifier
+
+    if _classifier is None:
+        _classifier = RemoteDentalClassifier()
+        if _classifier.is_trained:
+            logging.info(f"Using {_classifier.model_type} on inference server {_classifier.address}")
+
+    return _classifier
+
+def classify_images_cached(images: List[ImageSource], batch_size: Optional[int] = None,
+                           num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Classify images through the content-hash cache and the inference server"""
+    return classify_with_cache(get_dental_classifier(), get_classification_cache(), images,
+                               batch_size=batch_size, num_workers=num_workers)
+
+def classify_image_cached(image: ImageSource) -> Dict[str, Any]:
+    """Classify a single image through the content-hash cache and the inference server"""
+    result = classify_images_cached([image])[0]
+    result.pop('image_path', None)
+    return result
@@ -0,0 +1,199 @@
+"""
+Out-of-process inference server for the dental classifier
+
+Run one instance next to the web workers:
+
+    INFERENCE_SOCKET=/tmp/dental-inference.sock INFERENCE_AUTHKEY=<secret> \
+        python -m AI_System.scripts.inference_server
+
+The web workers need the same INFERENCE_AUTHKEY.
+
+The server owns the only copy of the model. Requests from all web workers
+share one queue, and a single batching thread coalesces them into
+micro-batches of up to --max-batch-size images, waiting at most
+--max-wait-ms after the first queued request for more to arrive.
+"""
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Listener
+from multiprocessing import AuthenticationError
+from typing import Any, Dict, List
+
+from .inference_client import decode_image, inference_address, inference_authkey
+
+
+class PendingRequest:
+    """Images from one client request waiting for a batch slot"""
+
+    def __init__(self, images: List[Any]):
+        self.images = images
+        self.results = None
+        self.done = threading.Event()
+
+
+class InferenceServer:
+    """Unix socket server that micro-batches classification requests"""
+
+    def __init__(self, address: str, authkey: bytes, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.address = address
+        self.authkey = authkey
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.classifier = None
+        self.stats = {'requests': 0, 'images': 0, 'batches': 0, 'started_at': None}
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+
+    def load_model(self):
+        """Load the classifier into this process"""
+        from .dental_ai_model import get_dental_classifier
+        self.classifier = get_dental_classifier()
+        logging.info(f"Inference server loaded {type(self.classifier).__name__}")
+
+    def serve_forever(self):
+        """Accept connections until interrupted"""
+        if self.classifier is None:
+            self.load_model()
+
+        # A server that exited uncleanly leaves its socket file behind
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+        threading.Thread(target=self._batch_loop, name='inference-batcher', daemon=True).start()
+        self.stats['started_at'] = time.time()
+
+        with Listener(self.address, family='AF_UNIX', authkey=self.authkey) as listener:
+            os.chmod(self.address, 0o600)
+            logging.info(f"Inference server listening on {self.address} "
+                         f"(max batch {self.max_batch_size}, max wait {self.max_wait * 1000:.1f}ms)")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError) as e:
+                    logging.warning(f"Rejected inference connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                while True:
+                    try:
+                        message = conn.recv()
+                    except EOFError:
+                        return
+
+                    op = message.get('op')
+                    if op == 'status':
+                        conn.send(self.status())
+                    elif op == 'classify':
+                        pending = PendingRequest([decode_image(payload) for payload in message['images']])
+                        self._queue.put(pending)
+                        pending.done.wait()
+                        conn.send({'results': pending.results})
+                    else:
+                        conn.send({'error': f"Unknown inference op: {op}"})
+            except Exception as e:
+                logging.error(f"Inference connection failed: {e}")
+                try:
+                    conn.send({'error': str(e)})
+                except Exception:
+                    pass
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            count = len(batch[0].images)
+            deadline = time.monotonic() + self.max_wait
+
+            while count < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                count += len(pending.images)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[PendingRequest]):
+        images = [image for pending in batch for image in pending.images]
+        try:
+            self.classifier.reload_if_model_changed()
+            # Images arrive already resized, so preprocessing stays on this thread
+            results = self.classifier.classify_bulk_images(images, batch_size=self.max_batch_size, num_workers=0)
+        except Exception as e:
+            logging.error(f"Inference batch of {len(images)} images failed: {e}")
+            results = [self.classifier._fallback_classification() for _ in images]
+
+        offset = 0
+        for pending in batch:
+            pending.results = results[offset:offset + len(pending.images)]
+            offset += len(pending.images)
+            pending.done.set()
+
+        with self._stats_lock:
+            self.stats['requests'] += len(batch)
+            self.stats['images'] += len(images)
+            self.stats['batches'] += 1
+
+    def status(self) -> Dict[str, Any]:
+        """Model metadata and batching counters returned for the status op"""
+        classifier = self.classifier
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['avg_batch_images'] = round(stats['images'] / stats['batches'], 2) if stats['batches'] else 0.0
+        stats['queued_requests'] = self._queue.qsize()
+        return {
+            'is_trained': classifier.is_trained,
+            'model_path': getattr(classifier, 'model_path', None),
+            'model_type': type(classifier).__name__,
+            'model_fingerprint': classifier.model_fingerprint,
+            'categories': classifier.categories,
+            'last_train_accuracy': classifier.last_train_accuracy,
+            'last_val_accuracy': classifier.last_val_accuracy,
+            'last_training_time': classifier.last_training_time,
+            'stats': stats
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dental classifier inference server')
+    parser.add_argument('--socket', default=inference_address(), help='Unix socket path')
+    parser.add_argument('--max-batch-size', type=int, default=int(os.environ.get('INFERENCE_MAX_BATCH', 16)))
+    parser.add_argument('--max-wait-ms', type=float, default=float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5)))
+    parser.add_argument('--no-background-training', action='store_true',
+                        help='Do not start the background training service in this process')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = InferenceServer(args.socket, inference_authkey(),
+                             max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    server.load_model()
+
+    # Web workers talking to this server do not train, so training runs here
+    if not args.no_background_training:
+        try:
+            from .background_trainer import start_background_training
+            start_background_training()
+        except ImportError as e:
+            logging.warning(f"Background trainer not available: {e}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Inference server stopped")
+    finally:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+"""
+Helpers shared by the model export and quantization scripts
+
+    export_model    TorchScript artifact vs the eager model
+    quantize_model  INT8 artifact vs the fp32 model
+"""
+import time
+
+import torch
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def benchmark(classifier, batch: torch.Tensor, runs: int) -> float:
+    """Mean milliseconds per image over runs forward passes, after one warm-up pass"""
+    classifier._predict_probabilities(batch)
+    started = time.perf_counter()
+    for _ in range(runs):
+        classifier._predict_probabilities(batch)
+    return (time.perf_counter() - started) * 1000 / (runs * batch.shape[0])
@@ -0,0 +1,95 @@
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class LazyModelLoader:
+    """
+    Loads the dental AI module and classifier off the request path
+
+    Importing torch/torchvision and loading the ResNet34 weights takes
+    several seconds, so it runs in a warm-up thread (start) or on the first
+    request that needs the model (module). Requests that never touch the
+    model never wait for it.
+    """
+
+    def __init__(self, module_name: str = "dental_ai_model", on_ready: Optional[Callable[[], None]] = None):
+        self.module_name = module_name
+        self.on_ready = on_ready
+        self.state = 'not_loaded'  # not_loaded, loading, ready, error
+        self.error = None
+        self.load_seconds = None
+        self._module = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start loading the model in a background thread if not already loading"""
+        with self._lock:
+            if self.state in ('loading', 'ready'):
+                return
+            self.state = 'loading'
+            self.error = None
+            self._ready.clear()
+            thread = threading.Thread(target=self._load, name='dental-model-loader', daemon=True)
+            thread.start()
+
+    def load(self):
+        """Load the model synchronously on the calling thread
+
+        Used by gunicorn's preload mode, where the model must be fully loaded
+        in the master before workers are forked.
+        """
+        with self._lock:
+            if self.state == 'ready':
+                return
+            self.state = 'loading'
+            self.error = None
+            self._ready.clear()
+        self._load()
+
+    def _load(self):
+        started = time.monotonic()
+        logging.info(f"Loading dental AI model from {self.module_name}")
+        try:
+            module = importlib.import_module(self.module_name)
+            module.get_dental_classifier()
+            self._module = module
+            self.state = 'ready'
+            self.load_seconds = round(time.monotonic() - started, 2)
+            logging.info(f"Dental AI model ready after {self.load_seconds}s")
+        except Exception as e:
+            self.state = 'error'
+            self.error = str(e)
+            logging.error(f"Failed to load dental AI model: {e}")
+        finally:
+            self._ready.set()
+
+        if self.state == 'ready' and self.on_ready:
+            try:
+                self.on_ready()
+            except Exception as e:
+                logging.error(f"Dental AI model on_ready hook failed: {e}")
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == 'ready'
+
+    def module(self, timeout: Optional[float] = None) -> Any:
+        """Return the loaded AI module, starting and waiting for the load if needed"""
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Dental AI model is still loading")
+        if self._module is None:
+            raise RuntimeError(f"Dental AI model failed to load: {self.error}")
+        return self._module
+
+    def status(self) -> Dict[str, Any]:
+        """Loader state for status endpoints"""
+        return {
+            'state': self.state,
+            'error': self.error,
+            'load_seconds': self.load_seconds
+        }
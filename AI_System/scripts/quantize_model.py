@@ -0,0 +1,167 @@
+"""
+Build the INT8 quantized dental classifier and compare it with the fp32 model
+
+    python -m AI_System.scripts.quantize_model [--model AI_System/models/dental_classifier.pt]
+
+Splits AI_System/training_data/pytorch_training per category into a held-out
+calibration slice and an evaluation set, calibrates and writes
+<model>.int8.pt next to the weights, then reports per-category accuracy for
+both models, per-image latency, and artifact size and peak RSS. Set
+AI_MODEL_BACKEND=int8 to serve the quantized artifact.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+
+import torch
+
+from .dental_ai_model import PyTorchDentalClassifier
+from .model_benchmark import IMAGE_EXTENSIONS, benchmark
+
+
+def split_dataset(data_dir: str, categories, calibration_fraction: float):
+    """Deterministically split each category folder into calibration and evaluation images"""
+    stride = max(1, round(1 / calibration_fraction)) if calibration_fraction > 0 else 0
+    calibration, evaluation = [], []
+    for name in sorted(os.listdir(data_dir)):
+        folder = os.path.join(data_dir, name)
+        if not os.path.isdir(folder):
+            continue
+        if name not in categories:
+            logging.warning(f"Skipping {folder}: not one of the classifier categories")
+            continue
+
+        paths = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+        for index, path in enumerate(paths):
+            if stride and index % stride == 0:
+                calibration.append(path)
+            else:
+                evaluation.append((path, name))
+    return calibration, evaluation
+
+
+def evaluate(classifier: PyTorchDentalClassifier, evaluation):
+    """Per-category (correct, total) counts and the predicted label per image"""
+    counts = {category: [0, 0] for category in classifier.categories}
+    predictions = []
+    results = classifier.classify_bulk_images([path for path, _ in evaluation], num_workers=0)
+    for (_, label), result in zip(evaluation, results):
+        counts[label][1] += 1
+        counts[label][0] += int(result['classification'] == label)
+        predictions.append(result['classification'])
+    return counts, predictions
+
+
+def _peak_rss_worker(model_path: str, backend: str, artifact_path: str, queue):
+    classifier = PyTorchDentalClassifier(model_path, backend='eager')
+    if backend == 'int8':
+        classifier._load_quantized(artifact_path)
+    classifier._predict_probabilities(torch.zeros(8, 3, 224, 224))
+
+    # VmHWM is the peak resident set of this process image (Linux only)
+    peak_kb = None
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                peak_kb = int(line.split()[1])
+    queue.put(peak_kb)
+
+
+def peak_rss(model_path: str, backend: str, artifact_path: str):
+    """Peak RSS in MB of a fresh process that loads one backend and runs a batch of 8"""
+    if not os.path.exists('/proc/self/status'):
+        return None
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_peak_rss_worker, args=(model_path, backend, artifact_path, queue))
+    process.start()
+    try:
+        peak_kb = queue.get(timeout=600)
+    except Exception:
+        peak_kb = None  # The worker died before reporting
+    process.join()
+    return round(peak_kb / 1024, 1) if peak_kb else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantize the dental classifier to INT8')
+    parser.add_argument('--model', default='AI_System/models/dental_classifier.pt', help='fp32 weights file')
+    parser.add_argument('--output', default=None, help='Artifact path (default: <model>.int8.pt)')
+    parser.add_argument('--data', default='AI_System/training_data/pytorch_training',
+                        help='Category folders used for calibration and evaluation')
+    parser.add_argument('--calibration-fraction', type=float, default=0.2,
+                        help='Share of each category held out for calibration')
+    parser.add_argument('--runs', type=int, default=10, help='Timed forward passes per benchmark')
+    parser.add_argument('--report', default=None, help='Also write the comparison to this JSON file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    fp32 = PyTorchDentalClassifier(args.model, backend='eager')
+    if not fp32.is_trained:
+        print(f"❌ No trained weights at {args.model}")
+        return 1
+
+    calibration, evaluation = split_dataset(args.data, fp32.categories, args.calibration_fraction)
+    if not calibration or not evaluation:
+        print(f"❌ Need images for both calibration and evaluation in {args.data}")
+        return 1
+    print(f"📷 {len(calibration)} calibration images, {len(evaluation)} evaluation images from {args.data}")
+
+    output = fp32.export_quantized(calibration, args.output)
+    print(f"✅ Exported INT8 model to {output}")
+
+    int8 = PyTorchDentalClassifier(args.model, backend='eager')
+    int8._load_quantized(output)
+    if int8.inference_model is int8.model:
+        print("❌ Quantized artifact could not be loaded")
+        return 1
+
+    fp32_counts, fp32_predictions = evaluate(fp32, evaluation)
+    int8_counts, int8_predictions = evaluate(int8, evaluation)
+    agreement = sum(a == b for a, b in zip(fp32_predictions, int8_predictions)) / len(evaluation)
+
+    report = {'calibration_images': len(calibration), 'evaluation_images': len(evaluation),
+              'top1_agreement': round(agreement, 4), 'categories': {}, 'latency_ms': {}, 'memory_mb': {}}
+
+    print("\n📊 Accuracy per category (fp32 → int8)")
+    for category in fp32.categories:
+        (fp32_correct, total), (int8_correct, _) = fp32_counts[category], int8_counts[category]
+        if not total:
+            print(f"   {category:26s} no evaluation images")
+            report['categories'][category] = None
+            continue
+        fp32_acc, int8_acc = fp32_correct / total, int8_correct / total
+        print(f"   {category:26s} {fp32_acc:6.1%} → {int8_acc:6.1%} ({int8_acc - fp32_acc:+.1%}, n={total})")
+        report['categories'][category] = {'images': total, 'fp32_accuracy': round(fp32_acc, 4),
+                                          'int8_accuracy': round(int8_acc, 4),
+                                          'delta': round(int8_acc - fp32_acc, 4)}
+    print(f"   Top-1 agreement: {agreement:.1%}")
+
+    batch = torch.cat([fp32.preprocess_image(path) for path, _ in evaluation[:8]])
+    print(f"\n⏱️  Per-image latency ({torch.get_num_threads()} threads, {args.runs} runs)")
+    for batch_size in (1, batch.shape[0]):
+        fp32_ms = benchmark(fp32, batch[:batch_size], args.runs)
+        int8_ms = benchmark(int8, batch[:batch_size], args.runs)
+        print(f"   batch {batch_size}: fp32 {fp32_ms:.1f} ms, int8 {int8_ms:.1f} ms ({fp32_ms / int8_ms:.2f}x)")
+        report['latency_ms'][f"batch_{batch_size}"] = {'fp32': round(fp32_ms, 2), 'int8': round(int8_ms, 2)}
+
+    print("\n💾 Memory")
+    for backend, path in (('fp32', args.model), ('int8', output)):
+        size_mb = round(os.path.getsize(path) / (1024 * 1024), 1)
+        rss_mb = peak_rss(args.model, backend, output)
+        print(f"   {backend}: {size_mb} MB on disk, peak RSS {rss_mb if rss_mb is not None else 'n/a'} MB")
+        report['memory_mb'][backend] = {'artifact': size_mb, 'peak_rss': rss_mb}
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.report}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,29 @@
 import os
 import logging
 import json
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, session, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, session, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
+from sqlalchemy import tuple_
+from sqlalchemy.orm import defer, load_only
 from PIL import Image, ExifTags
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+from reportlab.lib.pagesizes import letter
 from reportlab.lib.utils import ImageReader
-from reportlab.lib import colors
+import base64
 import tempfile
+import threading
 import uuid
 from datetime import datetime, timedelta
-from dental_ai_model import get_dental_classifier, initialize_dental_classifier, classify_bulk_images, get_classification_summary
 from AI_System.scripts.training_setup import TrainingDataManager
+from AI_System.scripts.model_loader import LazyModelLoader
 from config.database import db
+from pdf_renderer import PDF_COMPRESSION_PROFILES, compression_profile, create_pdf, stream_pdf, rerender_deck_text
+from case_export import stream_case_zip, stream_combined_pdf
+from image_edits import ImageEditStore, operations_from_request
+from patient_search import install_patient_search, search_patients as find_patients
+from dashboard_counters import get_dashboard_counters
 import json
 
 # Configure logging
@@ -53,7 +58,7 @@ CORS(app,
      origins=cors_origins, 
      supports_credentials=True,  # CRITICAL: Allow credentials/cookies
      allow_headers=['Content-Type', 'Authorization', 'X-Requested-With'],
-     expose_headers=['Content-Type', 'Authorization'],
+     expose_headers=['Content-Type', 'Authorization', 'X-Next-Cursor', 'X-Export-Count', 'X-Export-Skipped'],
      methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])  # Allow all methods
 
 # Configure the database
@@ -88,17 +93,24 @@ def load_user(user_id):
 # Initialize database with models
 with app.app_context():
     # Import models here to avoid circular import
-    from config.models import User, Patient, Case, UserSettings
-    db.create_all()
+    from config.models import User, Patient, Case, RenderJob, UserSettings
+    from config.database import add_missing_columns, add_missing_indexes, schema_lock
+    # Runs once in the master under gunicorn --preload; otherwise every worker runs
+    # it under schema_lock. SCHEMA_SETUP=false skips it in web processes when a
+    # release step (see Procfile) has already brought the schema up to date.
+    if os.environ.get('SCHEMA_SETUP', 'true').lower() != 'false':
+        with schema_lock():
+            db.create_all()
+            add_missing_columns()
+            add_missing_indexes()
+            install_patient_search()
+    else:
+        install_patient_search(create=False)
 
 # Initialize background training
 def initialize_background_training():
-    """Initialize background AI training service"""
+    """Initialize background AI training service once the classifier is loaded"""
     try:
-        # Initialize dental classifier which will auto-train if needed
-        from dental_ai_model import get_dental_classifier
-        classifier = get_dental_classifier()
-
         # Start background training service
         try:
             from AI_System.scripts.background_trainer import start_background_training
@@ -110,52 +122,136 @@ def initialize_background_training():
     except Exception as e:
         logging.error(f"Failed to initialize background training: {e}")
 
-# Start background training on app startup
-initialize_background_training()
+# Load torch and the classifier off the request path so the server binds immediately;
+# set AI_WARMUP=false to defer the load to the first classification request.
+# With AI_PRELOAD=true (gunicorn --preload, see gunicorn.conf.py) the model is loaded
+# synchronously in the master so forked workers share its memory-mapped weights,
+# and background training is started per worker from the post_fork hook instead.
+# With INFERENCE_SOCKET set, classification goes to the inference server
+# (python -m AI_System.scripts.inference_server), which also owns training.
+AI_PRELOAD = os.environ.get('AI_PRELOAD', 'false').lower() == 'true'
+INFERENCE_SOCKET = os.environ.get('INFERENCE_SOCKET')
+model_loader = LazyModelLoader(
+    module_name='AI_System.scripts.inference_client' if INFERENCE_SOCKET else 'dental_ai_model',
+    on_ready=None if (AI_PRELOAD or INFERENCE_SOCKET) else initialize_background_training
+)
+if AI_PRELOAD:
+    model_loader.load()
+elif os.environ.get('AI_WARMUP', 'true').lower() != 'false':
+    model_loader.start()
+
+def dental_ai():
+    """Return the dental AI module, waiting for the model to finish loading"""
+    return model_loader.module()
+
+def model_loading_response():
+    """Model status payload served while the classifier is still loading"""
+    model_loader.start()
+    loader_status = model_loader.status()
+    return jsonify({
+        'status': 'error' if loader_status['state'] == 'error' else 'loading',
+        'loader': loader_status,
+        'is_trained': False,
+        'categories': [],
+        'model_type': 'loading',
+        'performance_level': 'basic',
+        'performance_description': 'AI model is loading'
+    })
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'gif'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB per file
 MAX_IMAGES = 8  # 3 extra-oral + 5 intra-oral images for medical template
+CLASSIFICATION_BATCH_SIZE = int(os.environ.get('CLASSIFICATION_BATCH_SIZE', 8))  # Images per classifier forward pass
+CLASSIFICATION_WORKERS = int(os.environ.get('CLASSIFICATION_WORKERS', 4))  # Image preprocessing threads
+PDF_RENDER_ASYNC = os.environ.get('PDF_RENDER_ASYNC', 'false').lower() == 'true'  # Queue /upload renders by default
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', 2))  # Background PDF render threads per process
+PDF_RENDER_TIMEOUT = int(os.environ.get('PDF_RENDER_TIMEOUT', 600))  # Seconds before an unfinished job is reported failed
+PATIENT_SEARCH_LIMIT = 20  # Patients returned per search by default
+PATIENT_SEARCH_MAX = 100  # Largest limit a search request may ask for
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Rotate/crop edits are kept as operation lists against the original upload. Their cached
+# renders are capped by size and age; a render is kept while a queued PDF may still read it.
+IMAGE_EDIT_CACHE_MB = int(os.environ.get('IMAGE_EDIT_CACHE_MB', 256))  # Disk budget for rendered edits
+IMAGE_EDIT_CACHE_DAYS = int(os.environ.get('IMAGE_EDIT_CACHE_DAYS', 7))  # Unused renders older than this are removed
+image_edit_store = ImageEditStore(UPLOAD_FOLDER, os.path.join(UPLOAD_FOLDER, 'image_edits'),
+                                  cache_max_bytes=IMAGE_EDIT_CACHE_MB * 1024 * 1024,
+                                  cache_max_age=IMAGE_EDIT_CACHE_DAYS * 24 * 3600,
+                                  cache_min_age=PDF_RENDER_TIMEOUT)
+
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB total
 
+def _apply_exif_orientation(img):
+    """Rotate a decoded image according to its EXIF orientation tag"""
+    try:
+        # Use ImageOps to handle EXIF orientation automatically
+        from PIL import ImageOps
+        return ImageOps.exif_transpose(img)
+    except (AttributeError, TypeError, ImportError):
+        # Fallback to manual EXIF handling if ImageOps not available
+        try:
+            exif = img._getexif()
+            if exif is not None:
+                orientation = exif.get(274)  # Orientation tag
+                if orientation == 3:
+                    img = img.rotate(180, expand=True)
+                elif orientation == 6:
+                    img = img.rotate(270, expand=True)
+                elif orientation == 8:
+                    img = img.rotate(90, expand=True)
+        except:
+            pass
+        return img
+
+def normalize_image(img, max_size=(800, 600)):
+    """Apply orientation, mode conversion and downscaling to a decoded image"""
+    img = _apply_exif_orientation(img)
+
+    # Convert to RGB if needed
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGB')
+
+    # Resize if too large
+    if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+    return img
+
+def ingest_upload(file, file_path, max_size=(800, 600), quality=70):
+    """Decode an uploaded file once, normalize it and write it to disk.
+
+    The upload stream is decoded in memory (JPEGs are DCT-downscaled while
+    decoding), oriented, converted and resized, then written with a single
+    JPEG encode. The returned image is the same decoded object that was
+    written, so callers can hand it to the classifier without reopening the
+    file. Returns None if the stream could not be decoded, in which case the
+    raw upload is stored unchanged.
+    """
+    try:
+        img = Image.open(file.stream)
+        # Let the JPEG decoder scale down by powers of two; the longest side
+        # is used because EXIF orientation may swap width and height
+        longest_side = max(max_size)
+        img.draft('RGB', (longest_side, longest_side))
+        img = normalize_image(img, max_size)
+        img.save(file_path, 'JPEG', quality=quality, optimize=True)
+        return img
+    except Exception as e:
+        logging.error(f"Error ingesting upload {file_path}: {str(e)}")
+        file.stream.seek(0)
+        file.save(file_path)
+        return None
+
 def optimize_image_for_pdf(image_path, max_size=(800, 600), quality=70):
     """Quickly optimize image for PDF generation"""
     try:
         with Image.open(image_path) as img:
-            # Handle EXIF orientation to prevent unwanted rotation
-            try:
-                # Use ImageOps to handle EXIF orientation automatically
-                from PIL import ImageOps
-                img = ImageOps.exif_transpose(img)
-            except (AttributeError, TypeError, ImportError):
-                # Fallback to manual EXIF handling if ImageOps not available
-                try:
-                    exif = img._getexif()
-                    if exif is not None:
-                        orientation = exif.get(274)  # Orientation tag
-                        if orientation == 3:
-                            img = img.rotate(180, expand=True)
-                        elif orientation == 6:
-                            img = img.rotate(270, expand=True)
-                        elif orientation == 8:
-                            img = img.rotate(90, expand=True)
-                except:
-                    pass
-            
-            # Convert to RGB if needed
-            if img.mode in ('RGBA', 'LA', 'P'):
-                img = img.convert('RGB')
-
-            # Resize if too large
-            if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            img = normalize_image(img, max_size)
 
             # Save directly over the original file to save memory
             img.save(image_path, 'JPEG', quality=quality, optimize=True)
@@ -208,486 +304,93 @@ def optimize_image(image_path, max_width=800, max_height=600, quality=85):
         logging.error(f"Error optimizing image {image_path}: {str(e)}")
         return image_path
 
-def create_classic_layout(images, heading_style, styles, pagesize):
-    """Classic template - one image per slide"""
-    story = []
-    from reportlab.platypus import PageBreak
-
-    # Standard dimensions for faster processing
-    max_width = 5 * inch
-    max_height = 4 * inch
-
-    for i, image_path in enumerate(images, 1):
-        try:
-            story.append(Paragraph(f"Slide {i}", heading_style))
-
-            # Use fixed dimensions for speed
-            img_obj = RLImage(image_path, width=max_width, height=max_height)
-            story.append(img_obj)
-            story.append(Spacer(1, 0.3*inch))
-
-            if i < len(images):
-                story.append(PageBreak())
-
-        except Exception as e:
-            logging.error(f"Error adding image {image_path}: {str(e)}")
-            story.append(Paragraph(f"Error loading image {i}", styles['Normal']))
-
-    return story
-
-def create_modern_layout(images, heading_style, styles, pagesize, notes):
-    """Modern template - image with sidebar notes"""
-    story = []
-    from reportlab.platypus import PageBreak, Table, TableStyle
-    from reportlab.lib import colors
-
-    for i, image_path in enumerate(images, 1):
-        try:
-            story.append(Paragraph(f"Slide {i}", heading_style))
-
-            with Image.open(image_path) as img:
-                img_width, img_height = img.size
-                aspect_ratio = img_width / img_height
-
-                width = 4.5 * inch
-                height = width / aspect_ratio
-                if height > 3.5 * inch:
-                    height = 3.5 * inch
-                    width = height * aspect_ratio
-
-            img_obj = RLImage(image_path, width=width, height=height)
-
-            # Create notes content
-            note_content = notes if notes else f"Image {i} description"
-            note_para = Paragraph(note_content, styles['Normal'])
-
-            # Create table with image and notes
-            table_data = [[img_obj, note_para]]
-            table = Table(table_data, colWidths=[width + 0.5*inch, 2*inch])
-            table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('LEFTPADDING', (1, 0), (1, 0), 10),
-            ]))
-
-            story.append(table)
-            story.append(Spacer(1, 0.3*inch))
-
-            if i < len(images):
-                story.append(PageBreak())
-
-        except Exception as e:
-            logging.error(f"Error adding image {image_path}: {str(e)}")
-            story.append(Paragraph(f"Error loading image {i}", styles['Normal']))
-
-    return story
-
-def create_grid_layout(images, heading_style, styles, pagesize, images_per_slide):
-    """Grid template - multiple images per slide"""
-    story = []
-    from reportlab.platypus import PageBreak, Table, TableStyle
-
-    # Fixed dimensions for speed
-    if images_per_slide == 2:
-        img_width, img_height = 3*inch, 2*inch
-    elif images_per_slide == 4:
-        img_width, img_height = 2.5*inch, 1.5*inch
-    elif images_per_slide == 6:
-        img_width, img_height = 2*inch, 1.2*inch
-    else:
-        img_width, img_height = 5*inch, 3*inch
-
-    slide_num = 1
-    for i in range(0, len(images), images_per_slide):
-        slide_images = images[i:i + images_per_slide]
-
-        story.append(Paragraph(f"Slide {slide_num}", heading_style))
-
-        # Simple layout for speed
-        for img_path in slide_images:
-            try:
-                img_obj = RLImage(img_path, width=img_width, height=img_height)
-                story.append(img_obj)
-                story.append(Spacer(1, 0.2*inch))
-            except Exception as e:
-                logging.error(f"Error adding image {img_path}: {str(e)}")
-
-        story.append(Spacer(1, 0.3*inch))
-        slide_num += 1
-
-        if i + images_per_slide < len(images):
-            story.append(PageBreak())
-
-    return story
-
-def create_timeline_layout(images, heading_style, styles, pagesize):
-    """Timeline template - chronological layout"""
-    story = []
-    from reportlab.platypus import PageBreak
-
-    for i, image_path in enumerate(images, 1):
-        try:
-            # Add timeline marker
-            timeline_style = ParagraphStyle(
-                'Timeline',
-                parent=styles['Normal'],
-                fontSize=12,
-                textColor='blue',
-                leftIndent=20
-            )
-            story.append(Paragraph(f"Step {i}", timeline_style))
-
-            with Image.open(image_path) as img:
-                img_width, img_height = img.size
-                aspect_ratio = img_width / img_height
-
-                width = 5 * inch
-                height = width / aspect_ratio
-                if height > 3 * inch:
-                    height = 3 * inch
-                    width = height * aspect_ratio
-
-            img_obj = RLImage(image_path, width=width, height=height)
-            story.append(img_obj)
-            story.append(Spacer(1, 0.5*inch))
-
-            # Add connector line (except for last image)
-            if i < len(images):
-                story.append(Paragraph("↓", styles['Normal']))
-                story.append(Spacer(1, 0.2*inch))
-
-        except Exception as e:
-            logging.error(f"Error adding image {image_path}: {str(e)}")
-            story.append(Paragraph(f"Error loading image {i}", styles['Normal']))
-
-    return story
-
-def create_comparison_layout(images, heading_style, styles, pagesize):
-    """Comparison template - side-by-side layout"""
-    story = []
-    from reportlab.platypus import PageBreak, Table, TableStyle
-
-    # Process images in pairs
-    for i in range(0, len(images), 2):
-        slide_num = (i // 2) + 1
-        story.append(Paragraph(f"Comparison {slide_num}", heading_style))
-
-        img1_path = images[i]
-        img2_path = images[i + 1] if i + 1 < len(images) else None
-
+# Background PDF rendering
+_pdf_render_pool = None
+_pdf_render_pool_lock = threading.Lock()
+
+def get_pdf_render_pool():
+    """Thread pool that renders queued PDFs outside the request"""
+    global _pdf_render_pool
+    with _pdf_render_pool_lock:
+        if _pdf_render_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _pdf_render_pool = ThreadPoolExecutor(max_workers=PDF_RENDER_WORKERS, thread_name_prefix='pdf-render')
+        return _pdf_render_pool
+
+def submit_pdf_render(case, images, patient_info, on_complete=None):
+    """Queue a render for a saved case and return its RenderJob
+
+    The job renders the case's deck from images, sets case.pdf_filename when
+    the PDF is written, then calls on_complete(success).
+    """
+    job = RenderJob(id=str(uuid.uuid4()), case_id=case.id, user_id=case.user_id, status='queued')
+    db.session.add(job)
+    db.session.commit()
+
+    render_args = (images, case.title, case.notes, case.template, case.orientation, case.images_per_slide, patient_info,
+                   case.compression_profile)
+    get_pdf_render_pool().submit(run_pdf_render_job, job.id, case.id, render_args, on_complete)
+    logging.info(f"Queued PDF render job {job.id} for case {case.id}")
+    return job
+
+def run_pdf_render_job(job_id, case_id, render_args, on_complete=None):
+    """Render a queued case PDF and record the outcome"""
+    success = False
+    with app.app_context():
         try:
-            img_width = 3 * inch
-            img_height = 2.5 * inch
+            job = db.session.get(RenderJob, job_id)
+            job.status = 'running'
+            job.started_at = datetime.now()
+            db.session.commit()
 
-            img1_obj = RLImage(img1_path, width=img_width, height=img_height)
+            pdf_filename = f"slides_{uuid.uuid4()}.pdf"
+            pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], pdf_filename)
+            success = create_pdf(render_args[0], render_args[1], render_args[2], pdf_path, *render_args[3:])
 
-            if img2_path:
-                img2_obj = RLImage(img2_path, width=img_width, height=img_height)
-                table_data = [[img1_obj, img2_obj]]
-                table = Table(table_data, colWidths=[img_width + 0.5*inch, img_width + 0.5*inch])
+            if success:
+                case = db.session.get(Case, case_id)
+                case.pdf_filename = pdf_filename
+                job.status = 'done'
             else:
-                table_data = [[img1_obj, ""]]
-                table = Table(table_data, colWidths=[img_width + 0.5*inch, img_width + 0.5*inch])
-
-            table.setStyle(TableStyle([
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-            ]))
-
-            story.append(table)
-            story.append(Spacer(1, 0.3*inch))
-
-            if i + 2 < len(images):
-                story.append(PageBreak())
-
+                job.status = 'failed'
+                job.error = 'Error generating PDF'
+            job.finished_at = datetime.now()
+            db.session.commit()
+            logging.info(f"PDF render job {job_id} for case {case_id}: {job.status}")
         except Exception as e:
-            logging.error(f"Error creating comparison layout: {str(e)}")
-            story.append(Paragraph(f"Error loading comparison {slide_num}", styles['Normal']))
-
-    return story
-
-def create_medical_layout(images, heading_style, styles, pagesize):
-    """Medical case template - professional case presentation matching the design"""
-    story = []
-    from reportlab.platypus import PageBreak, Table, TableStyle, HRFlowable
-    from reportlab.lib import colors
-    from reportlab.lib.styles import ParagraphStyle
-    from reportlab.lib.enums import TA_LEFT
-
-    # Create custom styles matching the design
-    section_style = ParagraphStyle(
-        'SectionHeader',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.gray,  # Gray color like in the design
-        spaceAfter=6,
-        fontName='Helvetica',
-        alignment=TA_LEFT
-    )
-
-    # Split images into extra-oral and intra-oral sections
-    # First 3 images go to extra-oral, remaining go to intra-oral
-    extra_oral = images[:3] if len(images) >= 3 else images
-    intra_oral = images[3:] if len(images) > 3 else []
-
-    # Remove empty strings that might cause ReportLab errors
-    extra_oral = [img for img in extra_oral if img and img.strip()]
-    intra_oral = [img for img in intra_oral if img and img.strip()]
-
-    # Extra-oral section: 3 images next to each other (enlarged to fit page)
-    if extra_oral:
-        story.append(Paragraph("Extra-oral", section_style))
-        story.append(Spacer(1, 0.15*inch))
-
-        # Single row: 3 images next to each other, larger size
-        img_row = []
-        for img_path in extra_oral:
-            if img_path:
-                try:
-                    img_obj = RLImage(img_path, width=2.2*inch, height=1.8*inch)
-                    img_row.append(img_obj)
-                except Exception as e:
-                    logging.error(f"Error adding image {img_path}: {str(e)}")
-                    img_row.append("")
-            else:
-                img_row.append("")
-
-        # Fill to 3 columns if needed
-        while len(img_row) < 3:
-            img_row.append("")
-
-        table = Table([img_row], colWidths=[2.3*inch, 2.3*inch, 2.3*inch])
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 2),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-        ]))
-        story.append(table)
-        story.append(Spacer(1, 0.3*inch))
-
-    # Intra-oral section: 5 images total - 3 on top row, 2 centered below
-    if intra_oral:
-        story.append(Paragraph("Intra oral:", section_style))
-        story.append(Spacer(1, 0.15*inch))
-
-        # First row: 3 images next to each other
-        first_row = intra_oral[:3]
-        img_row = []
-        for img_path in first_row:
-            if img_path:
-                try:
-                    img_obj = RLImage(img_path, width=2.2*inch, height=1.6*inch)
-                    img_row.append(img_obj)
-                except Exception as e:
-                    logging.error(f"Error adding image {img_path}: {str(e)}")
-                    img_row.append("")
-            else:
-                img_row.append("")
-
-        # Fill to 3 columns if needed
-        while len(img_row) < 3:
-            img_row.append("")
-
-        table = Table([img_row], colWidths=[2.3*inch, 2.3*inch, 2.3*inch])
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 2),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-        ]))
-        story.append(table)
-        story.append(Spacer(1, 0.15*inch))
-
-        # Second row: 2 images centered below (4th and 5th images)
-        if len(intra_oral) > 3:
-            second_row = intra_oral[3:5]  # Take 4th and 5th images
-            if len(second_row) >= 1:
-                img_row = []
-
-                # Add spacing columns to center the images
-                if len(second_row) == 1:
-                    # Single image centered
-                    img_row = [""]
-                    try:
-                        img_obj = RLImage(second_row[0], width=2.2*inch, height=1.6*inch)
-                        img_row.append(img_obj)
-                    except Exception as e:
-                        logging.error(f"Error adding centered image: {str(e)}")
-                        img_row.append("")
-                    img_row.append("")
-
-                elif len(second_row) == 2:
-                    # Two images centered
-                    img_row = [""]
-                    for img_path in second_row:
-                        try:
-                            img_obj = RLImage(img_path, width=2.2*inch, height=1.6*inch)
-                            img_row.append(img_obj)
-                        except Exception as e:
-                            logging.error(f"Error adding image: {str(e)}")
-                            img_row.append("")
-                    img_row.append("")
-
-                # Create table with proper centering
-                if len(second_row) == 1:
-                    centered_table = Table([img_row], colWidths=[2.3*inch, 2.3*inch, 2.3*inch])
-                    centered_table.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('GRID', (1, 0), (1, 0), 0.5, colors.lightgrey),
-                    ]))
-                else:
-                    # For 2 images, use 4-column layout for better centering
-                    centered_table = Table([img_row], colWidths=[1.15*inch, 2.3*inch, 2.3*inch, 1.15*inch])
-                    centered_table.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('GRID', (1, 0), (2, 0), 0.5, colors.lightgrey),
-                    ]))
-
-                story.append(centered_table)
-
-    return story
-
-def create_pdf(images, case_title, notes, output_path, template='classic', orientation='portrait', images_per_slide=1, patient_info=None):
-    """Create PDF slide deck from images and text"""
-    try:
-        # Filter out empty, None, or invalid image paths
-        valid_images = []
-        for img in images:
-            if img and isinstance(img, str) and img.strip() and os.path.exists(img):
-                valid_images.append(img)
-            elif img:
-                logging.warning(f"Invalid image path skipped: {img}")
-
-        images = valid_images
-
-        # Handle case with no valid images - log warning but continue
-        if not images:
-            logging.warning(f"Creating PDF with no valid images for case: {case_title}")
-
-        # Set page size based on orientation
-        pagesize = A4 if orientation == 'portrait' else (A4[1], A4[0])
-
-        doc = SimpleDocTemplate(output_path, pagesize=pagesize, 
-                              topMargin=0.5*inch, bottomMargin=0.5*inch,
-                              leftMargin=0.5*inch, rightMargin=0.5*inch)
-
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Title'],
-            fontSize=24,
-            spaceAfter=12,
-            spaceBefore=12,
-            alignment=1,  # Center alignment
-            textColor=colors.Color(int(0.8*255), int(0.6*255), int(0.2*255)),
-            fontName='Helvetica-Bold'
-        )
-
-        patient_style = ParagraphStyle(
-            'PatientInfo',
-            parent=styles['Normal'],
-            fontSize=20,
-            spaceAfter=8,
-            alignment=1,  # Center alignment
-            textColor=colors.Color(int(0.4*255), int(0.4*255), int(0.4*255)),
-            fontName='Helvetica-Bold'
-        )
-
-        visit_style = ParagraphStyle(
-            'VisitInfo',
-            parent=styles['Normal'],
-            fontSize=18,
-            spaceAfter=16,
-            alignment=1,  # Center alignment
-            textColor=colors.Color(int(0.6*255), int(0.6*255), int(0.6*255)),
-            fontName='Helvetica'
-        )
-
-        subtitle_style = ParagraphStyle(
-            'Subtitle',
-            parent=styles['Normal'],
-            fontSize=12,
-            spaceAfter=24,
-            alignment=1,  # Center alignment
-            textColor=colors.Color(int(0.5*255), int(0.5*255), int(0.5*255)),
-            fontName='Helvetica'
-        )
-
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=8,
-            spaceBefore=16,
-            textColor=colors.Color(int(0.3*255), int(0.3*255), int(0.3*255)),
-            fontName='Helvetica-Bold'
-        )
-
-        story = []
-
-        # Title page matching the medical design
-        story.append(Paragraph(case_title, title_style))
-
-        # Add patient information if available
-        if patient_info:
-            story.append(Paragraph(f"Patient: {patient_info['name']}", patient_style))
-            story.append(Paragraph(f"MRN: {patient_info['mrn']} | Clinic: {patient_info['clinic']}", visit_style))
-            story.append(Paragraph(f"Visit Type: {patient_info['visit_type']}", visit_style))
-
-        if notes:
-            # Add patient/case identifier in gray below title
-            story.append(Paragraph(notes[:50] + "..." if len(notes) > 50 else notes, subtitle_style))
-        story.append(Spacer(1, 0.5*inch))
-
-        if notes:
-            story.append(Paragraph("Case Notes:", heading_style))
-            story.append(Paragraph(notes, styles['Normal']))
-
-        story.append(Spacer(1, 0.5*inch))
-        story.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal']))
-
-        # Add page break before images
-        from reportlab.platypus import PageBreak
-        story.append(PageBreak())
-
-        # Add images based on template (handle empty image list)
-        if images:
-            if template == 'classic':
-                story.extend(create_classic_layout(images, heading_style, styles, pagesize))
-            elif template == 'modern':
-                story.extend(create_modern_layout(images, heading_style, styles, pagesize, notes))
-            elif template == 'grid':
-                story.extend(create_grid_layout(images, heading_style, styles, pagesize, images_per_slide))
-            elif template == 'timeline':
-                story.extend(create_timeline_layout(images, heading_style, styles, pagesize))
-            elif template == 'comparison':
-                story.extend(create_comparison_layout(images, heading_style, styles, pagesize))
-            elif template == 'medical':
-                story.extend(create_medical_layout(images, heading_style, styles, pagesize))
-            else:
-                story.extend(create_classic_layout(images, heading_style, styles, pagesize))
-        else:
-            # No images provided - add placeholder message
-            story.append(Paragraph("No images were uploaded for this case.", heading_style))
-            story.append(Spacer(1, 0.5*inch))
-
-        # Build PDF
-        doc.build(story)
-        return True
-
-    except Exception as e:
-        logging.error(f"Error creating PDF: {str(e)}")
-        return False
+            logging.error(f"PDF render job {job_id} failed: {str(e)}")
+            db.session.rollback()
+            try:
+                job = db.session.get(RenderJob, job_id)
+                job.status = 'failed'
+                job.error = str(e)
+                job.finished_at = datetime.now()
+                db.session.commit()
+            except Exception as record_error:
+                logging.error(f"Could not record failure of render job {job_id}: {str(record_error)}")
+        finally:
+            if on_complete:
+                on_complete(success)
+            db.session.remove()
+
+def render_job_status(job):
+    """Status payload for a render job, failing jobs that outlived PDF_RENDER_TIMEOUT"""
+    status = job.status
+    error = job.error
+    if status in ('queued', 'running') and (datetime.now() - job.created_at).total_seconds() > PDF_RENDER_TIMEOUT:
+        # The process that owned the job died or the render hung
+        status = 'failed'
+        error = f'Render did not finish within {PDF_RENDER_TIMEOUT} seconds'
+
+    return {
+        'job_id': job.id,
+        'case_id': job.case_id,
+        'status': status,
+        'error': error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
 
 # API-only Flask backend - no HTML template routes
 # React frontend handles all UI rendering
@@ -784,23 +487,20 @@ def save_draft():
 @app.route('/search_patients', methods=['POST'])
 @login_required
 def search_patients():
-    """Search for patients by MRN"""
+    """Search for patients by MRN or name"""
     data = request.get_json()
     mrn_search = data.get('mrn', '').strip()
 
     if len(mrn_search) < 2:
         return jsonify({'patients': []})
 
-    # Search patients by MRN or name (partial match) for current user only
-    patients = Patient.query.filter(
-        Patient.user_id == current_user.id,
-        db.or_(
-            Patient.mrn.ilike(f'%{mrn_search}%'),
-            Patient.first_name.ilike(f'%{mrn_search}%'),
-            Patient.last_name.ilike(f'%{mrn_search}%'),
-            db.func.concat(Patient.first_name, ' ', Patient.last_name).ilike(f'%{mrn_search}%')
-        )
-    ).all()
+    try:
+        limit = min(max(int(data.get('limit', PATIENT_SEARCH_LIMIT)), 1), PATIENT_SEARCH_MAX)
+    except (TypeError, ValueError):
+        return jsonify({'patients': [], 'error': 'limit must be a number'}), 400
+
+    # Search patients by MRN or name (partial match) for current user only, best match first
+    patients = find_patients(current_user.id, mrn_search, limit)
 
     patients_data = []
     for patient in patients:
@@ -819,6 +519,11 @@ def search_patients():
 def download_case(case_id):
     """Download PDF for a specific case"""
     case = Case.query.filter_by(id=case_id, user_id=current_user.id).first_or_404()
+    if not case.pdf_filename:
+        job = RenderJob.query.filter_by(case_id=case.id).order_by(RenderJob.created_at.desc()).first()
+        if job:
+            return jsonify({'error': 'PDF is not ready', 'render': render_job_status(job)}), 409
+        return jsonify({'error': 'PDF file not found'}), 404
     pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], case.pdf_filename)
 
     if os.path.exists(pdf_path):
@@ -828,6 +533,194 @@ def download_case(case_id):
     else:
         return jsonify({'error': 'PDF file not found'}), 404
 
+@app.route('/api/cases/<int:case_id>/render-status', methods=['GET', 'OPTIONS'])
+@login_required
+def case_render_status(case_id):
+    """Status of the latest background PDF render for a case"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'message': 'OK'})
+        response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET,OPTIONS')
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        return response
+
+    try:
+        case = Case.query.filter_by(id=case_id, user_id=current_user.id).first()
+        if not case:
+            return jsonify({'success': False, 'error': 'Case not found'}), 404
+
+        job = RenderJob.query.filter_by(case_id=case.id).order_by(RenderJob.created_at.desc()).first()
+        if job:
+            render = render_job_status(job)
+        else:
+            # Rendered synchronously, or never rendered
+            render = {'job_id': None, 'case_id': case.id, 'status': 'done' if case.pdf_filename else 'none', 'error': None}
+
+        return jsonify({
+            'success': True,
+            'render': render,
+            'pdf_filename': case.pdf_filename,
+            'download_url': url_for('download_case', case_id=case.id) if case.pdf_filename else None
+        })
+    except Exception as e:
+        logging.error(f"Error getting render status for case {case_id}: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def case_patient_info(case):
+    """Patient block of a case's title page, as passed to the PDF renderer"""
+    if not case.patient:
+        return None
+    return {
+        'name': f"{case.patient.first_name} {case.patient.last_name}",
+        'mrn': case.patient.mrn,
+        'clinic': case.patient.clinic,
+        'visit_type': case.visit_type
+    }
+
+@app.route('/api/cases/<int:case_id>', methods=['PUT', 'OPTIONS'])
+@login_required
+def update_case(case_id):
+    """Update a case's text fields, re-rendering only the PDF title page when title or notes change"""
+    if request.method == 'OPTIONS':
+        response = jsonify({'message': 'OK'})
+        response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'PUT,OPTIONS')
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        return response
+
+    try:
+        case = Case.query.filter_by(id=case_id, user_id=current_user.id).first()
+        if not case:
+            return jsonify({'success': False, 'error': 'Case not found'}), 404
+
+        data = request.get_json() or {}
+        if 'title' in data and not str(data['title']).strip():
+            return jsonify({'success': False, 'error': 'Case title cannot be empty'}), 400
+
+        text_fields = ['title', 'notes', 'visit_description', 'priority', 'category',
+                       'chief_complaint', 'treatment_plan', 'diagnosis']
+        values = {field: str(data[field] or '').strip() for field in text_fields if field in data}
+        changed = [field for field, value in values.items() if value != (getattr(case, field) or '')]
+        rendered_title, rendered_notes = case.title, case.notes
+        for field in changed:
+            setattr(case, field, values[field])
+
+        # Only the title and notes are printed in the PDF
+        pdf_updated = None
+        if case.pdf_filename and {'title', 'notes'} & set(changed):
+            pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], case.pdf_filename)
+            pdf_updated = rerender_deck_text(pdf_path, case.title, case.notes, case.template, case.orientation,
+                                             case.images_per_slide, case_patient_info(case), case.compression_profile,
+                                             old_title=rendered_title, old_notes=rendered_notes)
+            if not pdf_updated:
+                # The source images are gone, so a full re-render is not possible either:
+                # keep the stored text matching what the deck prints
+                db.session.rollback()
+                logging.warning(f"Case {case.id} PDF could not be re-rendered, text update rejected")
+                return jsonify({
+                    'success': False,
+                    'error': 'The case PDF cannot be updated to show the new title or notes',
+                    'fields': sorted({'title', 'notes'} & set(changed))
+                }), 409
+
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'case_id': case.id,
+            'updated_fields': changed,
+            'pdf_updated': pdf_updated
+        })
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error updating case {case_id}: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/cases/export', methods=['GET', 'OPTIONS'])
+@login_required
+def export_cases():
+    """Stream every rendered case PDF for a patient and/or date range as one ZIP or combined PDF
+
+    Query parameters: patient_id, start and end (YYYY-MM-DD, inclusive) and
+    format ('zip', the default, or 'pdf'). Existing case PDFs are reused as-is;
+    cases without a rendered PDF are listed in the ZIP manifest and counted
+    in the X-Export-Skipped header.
+    """
+    if request.method == 'OPTIONS':
+        response = jsonify({'message': 'OK'})
+        response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
+        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+        response.headers.add('Access-Control-Allow-Methods', 'GET,OPTIONS')
+        response.headers.add('Access-Control-Allow-Credentials', 'true')
+        return response
+
+    try:
+        export_format = request.args.get('format', 'zip').lower()
+        if export_format not in ('zip', 'pdf'):
+            return jsonify({'success': False, 'error': "format must be 'zip' or 'pdf'"}), 400
+
+        query = Case.query.filter_by(user_id=current_user.id)
+        patient = None
+        patient_id = request.args.get('patient_id', type=int)
+        if patient_id is not None:
+            patient = Patient.query.filter_by(id=patient_id, user_id=current_user.id).first()
+            if not patient:
+                return jsonify({'success': False, 'error': 'Patient not found'}), 404
+            query = query.filter_by(patient_id=patient.id)
+
+        try:
+            if request.args.get('start'):
+                query = query.filter(Case.created_at >= datetime.strptime(request.args['start'], '%Y-%m-%d'))
+            if request.args.get('end'):
+                end = datetime.strptime(request.args['end'], '%Y-%m-%d') + timedelta(days=1)
+                query = query.filter(Case.created_at < end)
+        except ValueError:
+            return jsonify({'success': False, 'error': 'start and end must be YYYY-MM-DD dates'}), 400
+
+        cases = query.order_by(Case.created_at.asc(), Case.id.asc()).all()
+
+        entries = []
+        manifest = []
+        for case in cases:
+            pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], case.pdf_filename) if case.pdf_filename else None
+            exported = bool(pdf_path and os.path.exists(pdf_path))
+            arcname = f"{case.created_at.strftime('%Y-%m-%d')}_{case.id}_{secure_filename(case.title) or 'case'}.pdf"
+            if exported:
+                entries.append((arcname, pdf_path))
+            manifest.append({
+                'case_id': case.id,
+                'title': case.title,
+                'visit_type': case.visit_type,
+                'created_at': case.created_at.isoformat(),
+                'patient_id': case.patient_id,
+                'compression_profile': case.compression_profile,
+                'file': arcname if exported else None,
+                'status': 'exported' if exported else 'pdf_not_rendered' if not case.pdf_filename else 'pdf_missing'
+            })
+
+        if not entries:
+            return jsonify({'success': False, 'error': 'No rendered case PDFs match this export', 'cases': manifest}), 404
+
+        name = secure_filename(f"{patient.last_name}_{patient.mrn}" if patient else 'cases') or 'cases'
+        headers = {
+            'X-Export-Count': str(len(entries)),
+            'X-Export-Skipped': str(len(manifest) - len(entries))
+        }
+        logging.info(f"Exporting {len(entries)} case PDFs as {export_format} for user {current_user.id}")
+
+        if export_format == 'pdf':
+            headers['Content-Disposition'] = f'attachment; filename="{name}_history.pdf"'
+            return Response(stream_with_context(stream_combined_pdf(path for _, path in entries)),
+                            mimetype='application/pdf', headers=headers)
+
+        headers['Content-Disposition'] = f'attachment; filename="{name}_history.zip"'
+        return Response(stream_with_context(stream_case_zip(entries, manifest)),
+                        mimetype='application/zip', headers=headers)
+    except Exception as e:
+        logging.error(f"Error exporting cases: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/upload', methods=['POST'])
 @login_required
 def upload_files():
@@ -853,6 +746,11 @@ def upload_files():
         template = request.form.get('template', 'medical')
         orientation = request.form.get('orientation', 'portrait')
         images_per_slide = int(request.form.get('images_per_slide', 1))
+        profile_name = request.form.get('compression_profile', '').strip() or None
+        if profile_name and profile_name not in PDF_COMPRESSION_PROFILES:
+            flash(f'Unknown compression profile {profile_name}.', 'error')
+            return redirect(url_for('new_case'))
+        profile_name, profile = compression_profile(profile_name)
 
         if not case_title:
             flash('Please provide a case title.', 'error')
@@ -920,6 +818,7 @@ def upload_files():
             'intra_oral_left', 'intra_oral_right'
         ]
         uploaded_files = []
+        case_images = []  # In slot order; cached renders of edited images are not removed after the PDF
 
         for field_name in image_fields:
             if field_name in request.files:
@@ -936,14 +835,29 @@ def upload_files():
                     file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
 
                     try:
-                        file.save(file_path)
-                        # Optimize image immediately after upload
-                        optimize_image_for_pdf(file_path)
+                        # Decode, optimize and write the upload in one pass, at the size the profile prints
+                        ingest_upload(file, file_path, max_size=profile['max_size'], quality=profile['quality'])
                         uploaded_files.append(file_path)
+                        case_images.append(file_path)
                     except Exception as e:
                         logging.error(f"Error saving file {filename}: {str(e)}")
                         flash(f'Error saving file {filename}.', 'error')
                         return redirect(url_for('index'))
+                    continue
+
+            # A slot can instead name an image edited through /edit_image; its
+            # operations are applied to the original in one pass at the profile's size
+            edited_filename = secure_filename(request.form.get(f'{field_name}_filename', ''))
+            if edited_filename:
+                try:
+                    edited_path = image_edit_store.render(edited_filename, profile['max_size'], profile['quality'])
+                except Exception as e:
+                    logging.error(f"Error rendering edited image {edited_filename}: {str(e)}")
+                    edited_path = None
+                if not edited_path:
+                    flash(f'Edited image for {field_name.upper()} was not found.', 'error')
+                    return redirect(url_for('index'))
+                case_images.append(edited_path)
 
         # Generate PDF
         pdf_filename = f"slides_{uuid.uuid4()}.pdf"
@@ -961,42 +875,102 @@ def upload_files():
                     'visit_type': visit_type
                 }
 
-        if create_pdf(uploaded_files, case_title, notes, pdf_path, template, orientation, images_per_slide, patient_info):
-            # Save case to database with visit information for current user
-            case = Case(
-                title=case_title,
-                notes=notes,
-                template=template,
-                orientation=orientation,
-                images_per_slide=images_per_slide,
-                image_count=len(uploaded_files),
-                pdf_filename=pdf_filename,
-                visit_type=visit_type,
-                patient_id=patient_id,
-                visit_description=visit_description,
-                user_id=current_user.id,
-                priority=priority,
-                category=category,
-                chief_complaint=chief_complaint,
-                treatment_plan=treatment_plan,
-                diagnosis=diagnosis,
-                image_categories=image_categories_json
-            )
-            db.session.add(case)
-            db.session.commit()
+        # Case with visit information for current user
+        case = Case(
+            title=case_title,
+            notes=notes,
+            template=template,
+            orientation=orientation,
+            images_per_slide=images_per_slide,
+            image_count=len(case_images),
+            pdf_filename=pdf_filename,
+            compression_profile=profile_name,
+            visit_type=visit_type,
+            patient_id=patient_id,
+            visit_description=visit_description,
+            user_id=current_user.id,
+            priority=priority,
+            category=category,
+            chief_complaint=chief_complaint,
+            treatment_plan=treatment_plan,
+            diagnosis=diagnosis,
+            image_categories=image_categories_json
+        )
 
-            # Clean up uploaded image files
+        def remove_uploaded_images(success=True):
+            """Clean up uploaded image files once the PDF is rendered"""
             for file_path in uploaded_files:
                 try:
                     os.unlink(file_path)
                 except:
                     pass
 
+        async_render = request.form.get('async_render', str(PDF_RENDER_ASYNC)).lower() == 'true'
+        if async_render:
+            # Save the case now and render in the background; poll /api/cases/<id>/render-status
+            case.pdf_filename = None
+            db.session.add(case)
+            db.session.commit()
+            job = submit_pdf_render(case, case_images, patient_info, on_complete=remove_uploaded_images)
+            return jsonify({
+                'success': True,
+                'case_id': case.id,
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': url_for('case_render_status', case_id=case.id)
+            }), 202
+
+        if request.form.get('stream_pdf', 'false').lower() == 'true':
+            # Send the deck back while it renders; the same bytes are saved as the case PDF.
+            # The case gets its pdf_filename, and the job its outcome, once the file is complete.
+            case.pdf_filename = None
+            db.session.add(case)
+            db.session.commit()
+            job = RenderJob(id=str(uuid.uuid4()), case_id=case.id, user_id=case.user_id, status='running',
+                            started_at=datetime.now())
+            db.session.add(job)
+            db.session.commit()
+            case_id, job_id = case.id, job.id
+
+            def finish_streamed_render(success):
+                """Record the streamed render like a background job, then clean up the uploads"""
+                try:
+                    job = db.session.get(RenderJob, job_id)
+                    if success:
+                        db.session.get(Case, case_id).pdf_filename = pdf_filename
+                        job.status = 'done'
+                    else:
+                        job.status = 'failed'
+                        job.error = 'Error generating PDF'
+                    job.finished_at = datetime.now()
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Could not record streamed render of case {case_id}: {str(e)}")
+                finally:
+                    remove_uploaded_images(success)
+
+            chunks = stream_pdf(case_images, case_title, notes, template, orientation, images_per_slide,
+                                patient_info, profile_name, write_through=pdf_path, on_complete=finish_streamed_render)
+            download_name = secure_filename(f"{case_title}_slides.pdf") or "slides.pdf"
+            return Response(stream_with_context(chunks), mimetype='application/pdf', headers={
+                'Content-Disposition': f'attachment; filename="{download_name}"',
+                'X-Case-Id': str(case.id)
+            })
+
+        if create_pdf(case_images, case_title, notes, pdf_path, template, orientation, images_per_slide, patient_info,
+                      profile_name):
+            # Save case to database
+            db.session.add(case)
+            db.session.commit()
+
+            remove_uploaded_images()
+
             # Store success info in session for success page
             session['success_info'] = {
                 'case_title': case_title,
                 'template': template,
-                'image_count': len(uploaded_files),
+                'image_count': len(case_images),
                 'timestamp': datetime.now().strftime('%B %d, %Y at %I:%M %p'),
                 'case_id': case.id,
                 'show_success_animation': True
@@ -1049,8 +1023,7 @@ def upload_single_files():
             filepath = os.path.join(upload_folder, unique_filename)
             
             try:
-                file.save(filepath)
-                optimize_image_for_pdf(filepath)
+                ingest_upload(file, filepath)
                 
                 logging.info(f"DIRECT UPLOAD SUCCESS: {unique_filename} classified as {direct_classification}")
                 return jsonify({
@@ -1093,9 +1066,8 @@ def upload_single_files():
                 logging.info(f"Saving file: {filename} as {unique_filename}")
 
                 try:
-                    file.save(filepath)
-                    # Optimize the image
-                    if optimize_image_for_pdf(filepath):
+                    # Decode, optimize and write the image in one pass
+                    if ingest_upload(file, filepath) is not None:
                         uploaded_filenames.append(unique_filename)
                         logging.info(f"Successfully uploaded and optimized: {unique_filename}")
                     else:
@@ -1137,8 +1109,7 @@ def upload_cropped_image():
                 filepath = os.path.join(upload_folder, unique_filename)
 
                 try:
-                    cropped_file.save(filepath)
-                    optimize_image_for_pdf(filepath)
+                    ingest_upload(cropped_file, filepath)
 
                     logging.info(f"Successfully saved cropped image: {unique_filename}")
                     return jsonify({'success': True, 'filename': unique_filename})
@@ -1169,55 +1140,28 @@ def edit_image():
         if not image_filename:
             return jsonify({'success': False, 'error': 'No image filename provided'})
         
-        # Get the original image path
-        original_path = os.path.join(app.config['UPLOAD_FOLDER'], image_filename)
-        if not os.path.exists(original_path):
+        # Validate the source image, which may itself be an earlier edit
+        image_filename = secure_filename(image_filename)
+        if not (image_edit_store.load(image_filename) or
+                os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))):
             return jsonify({'success': False, 'error': 'Original image not found'})
-        
-        # Create edited image
-        with Image.open(original_path) as img:
-            # Apply rotation if specified
-            if rotation != 0:
-                img = img.rotate(-rotation, expand=True)  # Negative for correct direction
-            
-            # Apply cropping if specified
-            if crop_data:
-                # Convert relative crop coordinates to absolute
-                img_width, img_height = img.size
-                crop_x = int((crop_data['x'] / crop_data['imageWidth']) * img_width)
-                crop_y = int((crop_data['y'] / crop_data['imageHeight']) * img_height)
-                crop_w = int((crop_data['width'] / crop_data['imageWidth']) * img_width)
-                crop_h = int((crop_data['height'] / crop_data['imageHeight']) * img_height)
-                
-                # Ensure crop coordinates are within image bounds
-                crop_x = max(0, min(crop_x, img_width))
-                crop_y = max(0, min(crop_y, img_height))
-                crop_w = max(1, min(crop_w, img_width - crop_x))
-                crop_h = max(1, min(crop_h, img_height - crop_y))
-                
-                # Crop the image
-                img = img.crop((crop_x, crop_y, crop_x + crop_w, crop_y + crop_h))
-            
-            # Save the edited image with a new filename
-            edited_filename = f"{uuid.uuid4()}_edited_{image_filename}"
-            edited_path = os.path.join(app.config['UPLOAD_FOLDER'], edited_filename)
-            
-            # Convert to RGB if needed before saving
-            if img.mode in ('RGBA', 'LA', 'P'):
-                img = img.convert('RGB')
-            
-            img.save(edited_path, 'JPEG', quality=90, optimize=True)
-            
-            # Optimize for PDF
-            optimize_image_for_pdf(edited_path)
-            
-            logging.info(f"Successfully edited image: {edited_filename}")
-            return jsonify({
-                'success': True, 
-                'filename': edited_filename,
-                'message': 'Image edited successfully!'
-            })
-    
+
+        try:
+            operations = operations_from_request(rotation, crop_data)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f'Invalid edit: {str(e)}'})
+
+        # Record the operations against the original upload; pixels are only
+        # decoded and encoded when the edit is served or rendered into a PDF
+        edited_filename = image_edit_store.create(image_filename, operations)
+
+        logging.info(f"Successfully edited image: {edited_filename}")
+        return jsonify({
+            'success': True,
+            'filename': edited_filename,
+            'message': 'Image edited successfully!'
+        })
+
     except Exception as e:
         logging.error(f"Error editing image: {str(e)}")
         return jsonify({'success': False, 'error': f'Failed to edit image: {str(e)}'})
@@ -1252,7 +1196,8 @@ def bulk_upload_categorize():
             return category_mapping.get(ai_category, ai_category)
 
         results = []
-        classifier = get_dental_classifier()
+        ai = dental_ai()
+        classifier = ai.get_dental_classifier()
         
         # Log which model is being used
         model_info = "unknown"
@@ -1263,6 +1208,7 @@ def bulk_upload_categorize():
         
         logging.info(f"Using AI classifier: {model_info}")
 
+        uploads = []
         for file in files:
             if file and allowed_file(file.filename):
                 # Save file
@@ -1270,69 +1216,83 @@ def bulk_upload_categorize():
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 unique_filename = f"{timestamp}_{filename}"
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-                file.save(filepath)
 
-                # Optimize image for better AI classification
-                optimize_image_for_pdf(filepath)
+                # Decode and optimize once; the classifier reuses the decoded image
+                image = ingest_upload(file, filepath)
+                uploads.append((unique_filename, filename, image if image is not None else filepath))
 
-                # Classify with modelmhanna AI
-                try:
-                    classification_result = classifier.classify_image(filepath)
-                    logging.info(f"Modelmhanna AI classification for {filename}: {classification_result}")
-
-                    # Extract detailed information
-                    ai_classification = classification_result.get('classification', 'unknown')
-                    confidence = classification_result.get('confidence', 0.0)
-                    category_name = classification_result.get('category_name', ai_classification)
-                    model_used = classification_result.get('model_used', 'unknown')
-                    probabilities = classification_result.get('probabilities', {})
-
-                    # Map AI category to frontend expected format
-                    frontend_classification = map_ai_to_frontend_category(ai_classification)
-                    
-                    logging.info(f"Mapped {ai_classification} -> {frontend_classification} for {filename}")
-
-                    # Create detailed result
-                    result = {
-                        'filename': unique_filename,
-                        'original_name': filename,
-                        'classification': frontend_classification,  # Use mapped category
-                        'ai_classification': ai_classification,     # Keep original for reference
-                        'confidence': round(confidence, 3),
-                        'category_name': category_name,
-                        'model_used': model_used,
-                        'reasoning': f"Classified as {category_name} with {confidence:.1%} confidence using {model_used}",
-                        'probabilities': {k: round(v, 3) for k, v in probabilities.items()},
-                        'success': True
-                    }
+        # Classify the whole set with modelmhanna AI, one forward pass per batch of cache misses
+        try:
+            classification_results = ai.classify_images_cached(
+                [source for _, _, source in uploads],
+                batch_size=CLASSIFICATION_BATCH_SIZE,
+                num_workers=CLASSIFICATION_WORKERS
+            )
+        except Exception as e:
+            logging.error(f"Batch classification failed, classifying images individually: {e}")
+            classification_results = None
 
-                    # Add confidence level indicator
-                    if confidence >= 0.8:
-                        result['confidence_level'] = 'high'
-                    elif confidence >= 0.6:
-                        result['confidence_level'] = 'medium'
-                    else:
-                        result['confidence_level'] = 'low'
+        for index, (unique_filename, filename, source) in enumerate(uploads):
+            try:
+                if classification_results is not None:
+                    classification_result = classification_results[index]
+                else:
+                    classification_result = ai.classify_image_cached(source)
+                logging.info(f"Modelmhanna AI classification for {filename}: {classification_result}")
+
+                # Extract detailed information
+                ai_classification = classification_result.get('classification', 'unknown')
+                confidence = classification_result.get('confidence', 0.0)
+                category_name = classification_result.get('category_name', ai_classification)
+                model_used = classification_result.get('model_used', 'unknown')
+                probabilities = classification_result.get('probabilities', {})
+
+                # Map AI category to frontend expected format
+                frontend_classification = map_ai_to_frontend_category(ai_classification)
+                
+                logging.info(f"Mapped {ai_classification} -> {frontend_classification} for {filename}")
 
-                    results.append(result)
+                # Create detailed result
+                result = {
+                    'filename': unique_filename,
+                    'original_name': filename,
+                    'classification': frontend_classification,  # Use mapped category
+                    'ai_classification': ai_classification,     # Keep original for reference
+                    'confidence': round(confidence, 3),
+                    'category_name': category_name,
+                    'model_used': model_used,
+                    'reasoning': f"Classified as {category_name} with {confidence:.1%} confidence using {model_used}",
+                    'probabilities': {k: round(v, 3) for k, v in probabilities.items()},
+                    'success': True
+                }
 
-                except Exception as e:
-                    logging.error(f"Error during modelmhanna AI classification for {filename}: {e}")
-                    # Enhanced fallback classification
-                    results.append({
-                        'filename': unique_filename,
-                        'original_name': filename,
-                        'classification': 'intraoral_frontal_view',  # Use frontend format
-                        'ai_classification': 'intraoral_front',     # Original AI format
-                        'confidence': 0.3,
-                        'category_name': 'Intraoral Front (Fallback)',
-                        'model_used': 'fallback_error',
-                        'reasoning': f'Default classification due to error: {str(e)}',
-                        'probabilities': {},
-                        'confidence_level': 'low',
-                        'success': False,
-                        'error': str(e)
-                    })
+                # Add confidence level indicator
+                if confidence >= 0.8:
+                    result['confidence_level'] = 'high'
+                elif confidence >= 0.6:
+                    result['confidence_level'] = 'medium'
+                else:
+                    result['confidence_level'] = 'low'
+
+                results.append(result)
+
+            except Exception as e:
+                logging.error(f"Error during modelmhanna AI classification for {filename}: {e}")
+                # Enhanced fallback classification
+                results.append({
+                    'filename': unique_filename,
+                    'original_name': filename,
+                    'classification': 'intraoral_frontal_view',  # Use frontend format
+                    'ai_classification': 'intraoral_front',     # Original AI format
+                    'confidence': 0.3,
+                    'category_name': 'Intraoral Front (Fallback)',
+                    'model_used': 'fallback_error',
+                    'reasoning': f'Default classification due to error: {str(e)}',
+                    'probabilities': {},
+                    'confidence_level': 'low',
+                    'success': False,
+                    'error': str(e)
+                })
 
         # Generate classification summary
         total_files = len(results)
@@ -1411,6 +1371,84 @@ def index():
 def not_found(e):
     return jsonify({'error': 'Not found'}), 404
 
+# Listing pagination: newest first, keyset on (created_at, id)
+LIST_PAGE_MAX = 500
+
+def encode_list_cursor(row):
+    """Opaque cursor pointing just after row in a newest-first listing"""
+    return base64.urlsafe_b64encode(f"{row.created_at.isoformat()}|{row.id}".encode()).decode().rstrip('=')
+
+def decode_list_cursor(cursor):
+    """(created_at, id) from encode_list_cursor; raises ValueError"""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def list_args(allowed_fields):
+    """
+    limit, cursor and fields of a listing request; raises ValueError
+
+    Without limit or cursor a listing returns every row as before. fields
+    is a comma separated subset of allowed_fields (default: all of them).
+    """
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    if limit is not None:
+        if not limit.isdigit() or not 1 <= int(limit) <= LIST_PAGE_MAX:
+            raise ValueError(f'limit must be between 1 and {LIST_PAGE_MAX}')
+        limit = int(limit)
+    elif cursor:
+        limit = LIST_PAGE_MAX
+
+    fields = request.args.get('fields')
+    if fields:
+        fields = {field.strip() for field in fields.split(',') if field.strip()}
+        unknown = fields - set(allowed_fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    else:
+        fields = set(allowed_fields)
+    return limit, decode_list_cursor(cursor) if cursor else None, fields
+
+def keyset_page(query, model, limit, cursor, item=lambda row: row):
+    """
+    Rows of query newest first, after cursor, and the cursor of the next page
+
+    model supplies the created_at and id columns; item maps a result row to
+    its model instance when the query returns tuples.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = cursor
+        # A row-value comparison lets the (user_id, created_at, id) indexes seek straight to the page
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    if not limit:
+        return query.all(), None
+
+    # One extra row tells whether there is a next page without a COUNT
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_list_cursor(item(rows[-1]))
+
+def list_response(data, next_cursor):
+    """JSON array response carrying the next page cursor in X-Next-Cursor"""
+    response = jsonify(data)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+CASE_LIST_FIELDS = ['id', 'title', 'visit_type', 'created_at', 'image_count', 'compression_profile',
+                    'patient', 'visit_description']
+PATIENT_LIST_FIELDS = ['id', 'first_name', 'last_name', 'mrn', 'clinic', 'created_at', 'cases_count', 'cases']
+EXAM_LIST_FIELDS = ['id', 'patient_id', 'patient_name', 'file_number', 'patient_mrn', 'patient_clinic', 'created_at',
+                    'updated_at', 'case_id', 'date_of_birth', 'age', 'gender', 'phone_number', 'email',
+                    'medical_condition', 'previous_orthodontic_treatment', 'profile_type', 'molar_relation_right',
+                    'molar_relation_left', 'overjet', 'overbite', 'uploaded_photos']
+
 @app.route('/api/cases')
 def api_cases():
     """API endpoint for case history"""
@@ -1423,34 +1461,51 @@ def api_cases():
         else:
             return jsonify([])
 
-    cases = Case.query.filter_by(user_id=current_user.id).order_by(Case.created_at.desc()).all()
-    cases_data = []
+    try:
+        limit, cursor, fields = list_args(CASE_LIST_FIELDS)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    # Load only the requested columns; created_at and id are always needed for the cursor
+    columns = [getattr(Case, field) for field in fields if field not in ('id', 'created_at', 'patient')]
+    if 'patient' in fields:
+        columns.append(Case.patient_id)
+    query = Case.query.options(load_only(Case.id, Case.created_at, *columns)).filter_by(user_id=current_user.id)
+    cases, next_cursor = keyset_page(query, Case, limit, cursor)
+
+    # Patients of the page in one query rather than one lazy load per case
+    patients = {}
+    if 'patient' in fields:
+        patient_ids = {case.patient_id for case in cases if case.patient_id}
+        if patient_ids:
+            patients = {patient.id: patient for patient in Patient.query.filter(Patient.id.in_(patient_ids))}
 
+    cases_data = []
     for case in cases:
         case_data = {
             'id': case.id,
-            'title': case.title,
-            'visit_type': case.visit_type,
-            'created_at': case.created_at.isoformat(),
-            'image_count': case.image_count,
-            'patient': None
+            'created_at': case.created_at.isoformat()
         }
+        for field in ('title', 'visit_type', 'image_count', 'compression_profile'):
+            if field in fields:
+                case_data[field] = getattr(case, field)
 
-        if case.patient:
+        if 'patient' in fields:
+            patient = patients.get(case.patient_id)
             case_data['patient'] = {
-                'id': case.patient.id,
-                'first_name': case.patient.first_name,
-                'last_name': case.patient.last_name,
-                'mrn': case.patient.mrn,
-                'clinic': case.patient.clinic
-            }
-
-        if case.visit_description:
+                'id': patient.id,
+                'first_name': patient.first_name,
+                'last_name': patient.last_name,
+                'mrn': patient.mrn,
+                'clinic': patient.clinic
+            } if patient else None
+
+        if 'visit_description' in fields and case.visit_description:
             case_data['visit_description'] = case.visit_description
 
-        cases_data.append(case_data)
+        cases_data.append({key: value for key, value in case_data.items() if key in fields})
 
-    return jsonify(cases_data)
+    return list_response(cases_data, next_cursor)
 
 @app.route('/api/patients')
 def api_patients():
@@ -1464,13 +1519,27 @@ def api_patients():
         else:
             return jsonify([])
 
-    patients = Patient.query.filter_by(user_id=current_user.id).order_by(Patient.created_at.desc()).all()
-    patients_data = []
-
-    for patient in patients:
-        patient_cases = Case.query.filter_by(patient_id=patient.id, user_id=current_user.id).order_by(Case.created_at.desc()).all()
+    try:
+        limit, cursor, fields = list_args(PATIENT_LIST_FIELDS)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    patients, next_cursor = keyset_page(Patient.query.filter_by(user_id=current_user.id), Patient, limit, cursor)
+
+    # Cases of every listed patient in one query, grouped in memory, so the
+    # number of SQL statements does not grow with the patient count
+    case_filter = [Case.user_id == current_user.id, Case.patient_id.isnot(None)]
+    if limit:
+        case_filter.append(Case.patient_id.in_([patient.id for patient in patients]))
+
+    cases_by_patient = {}
+    case_counts = {}
+    if 'cases' in fields and patients:
+        patient_cases = Case.query.options(
+            load_only(Case.id, Case.patient_id, Case.title, Case.visit_type, Case.created_at,
+                      Case.image_count, Case.visit_description)
+        ).filter(*case_filter).order_by(Case.created_at.desc()).all()
 
-        cases_data = []
         for case in patient_cases:
             case_data = {
                 'id': case.id,
@@ -1481,8 +1550,14 @@ def api_patients():
             }
             if case.visit_description:
                 case_data['visit_description'] = case.visit_description
-            cases_data.append(case_data)
+            cases_by_patient.setdefault(case.patient_id, []).append(case_data)
+        case_counts = {patient_id: len(cases) for patient_id, cases in cases_by_patient.items()}
+    elif 'cases_count' in fields and patients:
+        case_counts = dict(db.session.query(Case.patient_id, db.func.count(Case.id))
+                           .filter(*case_filter).group_by(Case.patient_id).all())
 
+    patients_data = []
+    for patient in patients:
         patient_data = {
             'id': patient.id,
             'first_name': patient.first_name,
@@ -1490,13 +1565,13 @@ def api_patients():
             'mrn': patient.mrn,
             'clinic': patient.clinic,
             'created_at': patient.created_at.isoformat(),
-            'cases_count': len(cases_data),
-            'cases': cases_data
+            'cases_count': case_counts.get(patient.id, 0),
+            'cases': cases_by_patient.get(patient.id, [])
         }
 
-        patients_data.append(patient_data)
+        patients_data.append({key: value for key, value in patient_data.items() if key in fields})
 
-    return jsonify(patients_data)
+    return list_response(patients_data, next_cursor)
 
 @app.route('/api/user-settings', methods=['GET'])
 def api_user_settings():
@@ -1558,7 +1633,14 @@ def serve_profile_image(filename):
 @app.route('/uploads/<filename>')
 @login_required
 def serve_uploaded_file(filename):
-    """Serve uploaded files"""
+    """Serve uploaded files, rendering edited images from their operation list"""
+    try:
+        edited_path = image_edit_store.render(filename)
+    except Exception as e:
+        logging.error(f"Error rendering edited image {filename}: {str(e)}")
+        return jsonify({'success': False, 'error': 'Could not render edited image'}), 500
+    if edited_path:
+        return send_file(os.path.abspath(edited_path), mimetype='image/jpeg')
     return send_from_directory('uploads', filename)
 
 # Removed ai_test HTML route - React handles AI testing UI
@@ -1567,11 +1649,17 @@ def serve_uploaded_file(filename):
 @login_required
 def api_model_status():
     """Get current modelmhanna AI model status and training information"""
+    if not model_loader.is_ready:
+        return model_loading_response()
+
     try:
-        classifier = get_dental_classifier()
+        ai = dental_ai()
+        classifier = ai.get_dental_classifier()
         
         # Get basic model information
         model_info = {
+            'status': 'ready',
+            'loader': model_loader.status(),
             'is_trained': classifier.is_trained,
             'categories': classifier.categories,
             'train_accuracy': getattr(classifier, 'last_train_accuracy', None),
@@ -1591,6 +1679,9 @@ def api_model_status():
         else:
             model_info['model_type'] = 'fallback_sklearn'
 
+        # Classification cache hit/miss counters
+        model_info['classification_cache'] = ai.get_classification_cache().stats()
+
         # Get training data statistics
         try:
             from AI_System.scripts.training_setup import TrainingDataManager
@@ -1648,11 +1739,16 @@ def api_model_status():
 @app.route('/api/ai/model-status')
 def api_ai_model_status():
     """Frontend compatible AI model status endpoint (no login required)"""
+    if not model_loader.is_ready:
+        return model_loading_response()
+
     try:
-        classifier = get_dental_classifier()
+        classifier = dental_ai().get_dental_classifier()
         
         # Get basic model information
         model_info = {
+            'status': 'ready',
+            'loader': model_loader.status(),
             'is_trained': classifier.is_trained,
             'categories': classifier.categories,
             'train_accuracy': getattr(classifier, 'last_train_accuracy', None),
@@ -1818,15 +1914,13 @@ def test_ai_classification():
         # Save temporary file
         temp_filename = f"test_{uuid.uuid4()}_{secure_filename(file.filename)}"
         temp_path = os.path.join(app.config['UPLOAD_FOLDER'], temp_filename)
-        file.save(temp_path)
 
         try:
-            # Optimize image for better AI classification
-            optimize_image_for_pdf(temp_path)
+            # Decode and optimize once; the classifier reuses the decoded image
+            image = ingest_upload(file, temp_path)
 
-            # Classify the image using modelmhanna AI
-            classifier = get_dental_classifier()
-            result = classifier.classify_image(temp_path)
+            # Classify the image using modelmhanna AI (served from cache for repeat uploads)
+            result = dental_ai().classify_image_cached(image if image is not None else temp_path)
 
             # Log which model was used
             model_used = result.get('model_used', 'unknown')
@@ -1945,8 +2039,7 @@ def save_settings():
                 filepath = os.path.join(profiles_dir, filename)
 
                 # Save and optimize the image
-                file.save(filepath)
-                optimize_image_for_pdf(filepath, max_size=(300, 300), quality=80)
+                ingest_upload(file, filepath, max_size=(300, 300), quality=80)
                 profile_image_path = filepath
 
         # Clean up clinic names and ensure we have at least default clinics
@@ -2360,38 +2453,25 @@ def api_dashboard_stats():
         return response, 401
     
     try:
-        # Get counts from database for current user only
-        total_patients = Patient.query.filter_by(user_id=current_user.id).count()
-        total_cases = Case.query.filter_by(user_id=current_user.id).count()
-        
-        # Get cases from current month for current user
-        from datetime import datetime
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        
-        this_month_cases = Case.query.filter(
-            Case.user_id == current_user.id,
-            db.extract('month', Case.created_at) == current_month,
-            db.extract('year', Case.created_at) == current_year
-        ).count()
-        
-        # Get active patients (patients with cases in last 30 days) for current user
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        active_patients = db.session.query(Patient).join(Case).filter(
-            Case.user_id == current_user.id,
-            Case.created_at >= thirty_days_ago
-        ).distinct().count()
-        
-        # Get recent cases for the table for current user
-        recent_cases = Case.query.filter_by(user_id=current_user.id).order_by(Case.created_at.desc()).limit(5).all()
+        # Totals come from the user's materialized counters row (dashboard_counters.py)
+        counters = get_dashboard_counters(current_user.id)
+
+        # Get recent cases for the table for current user, with their patients in the same query
+        recent_cases = db.session.query(Case, Patient).outerjoin(
+            Patient, Case.patient_id == Patient.id
+        ).options(
+            load_only(Case.id, Case.created_at, Case.patient_id)
+        ).filter(
+            Case.user_id == current_user.id
+        ).order_by(Case.created_at.desc(), Case.id.desc()).limit(5).all()
         
         recent_cases_data = []
-        for case in recent_cases:
+        for case, patient in recent_cases:
             patient_name = 'Unknown'
-            if case.patient:
-                patient_name = f"{case.patient.first_name} {case.patient.last_name}".strip()
+            if patient:
+                patient_name = f"{patient.first_name} {patient.last_name}".strip()
                 if not patient_name:
-                    patient_name = case.patient.mrn or 'Unknown'
+                    patient_name = patient.mrn or 'Unknown'
             
             recent_cases_data.append({
                 'id': case.id,
@@ -2402,10 +2482,10 @@ def api_dashboard_stats():
             })
         
         response_data = {
-            'totalPatients': total_patients,
-            'totalCases': total_cases,
-            'thisMonth': this_month_cases,
-            'activePatients': active_patients,
+            'totalPatients': counters.patient_count,
+            'totalCases': counters.case_count,
+            'thisMonth': counters.month_case_count,
+            'activePatients': counters.active_patient_count,
             'recentCases': recent_cases_data
         }
         
@@ -2444,13 +2524,26 @@ def get_orthodontic_examinations():
     try:
         from config.models import OrthodonticExamination, Patient
         
-        # Get all examinations for current user with patient info
-        examinations = db.session.query(OrthodonticExamination, Patient).join(
+        try:
+            limit, cursor, fields = list_args(EXAM_LIST_FIELDS)
+        except ValueError as e:
+            response = jsonify({'success': False, 'error': str(e)})
+            response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
+            response.headers.add('Access-Control-Allow-Credentials', 'true')
+            return response, 400
+
+        # Get the examinations for current user with patient info
+        query = db.session.query(OrthodonticExamination, Patient).join(
             Patient, OrthodonticExamination.patient_id == Patient.id
         ).filter(
             OrthodonticExamination.user_id == current_user.id
-        ).order_by(OrthodonticExamination.created_at.desc()).all()
-        
+        )
+        if 'uploaded_photos' not in fields:
+            # The photo map is the largest column; skip loading it when the list does not show photos
+            query = query.options(defer(OrthodonticExamination.uploaded_photos))
+        examinations, next_cursor = keyset_page(query, OrthodonticExamination, limit, cursor,
+                                                item=lambda row: row[0])
+
         examinations_data = []
         for exam, patient in examinations:
             exam_data = {
@@ -2483,14 +2576,15 @@ def get_orthodontic_examinations():
                 'overbite': exam.overbite,
                 
                 # Photos
-                'uploaded_photos': json.loads(exam.uploaded_photos) if exam.uploaded_photos else {}
+                'uploaded_photos': json.loads(exam.uploaded_photos or '{}') if 'uploaded_photos' in fields else None
             }
-            examinations_data.append(exam_data)
+            examinations_data.append({key: value for key, value in exam_data.items() if key in fields})
         
         response = jsonify({
             'success': True,
             'examinations': examinations_data,
-            'total': len(examinations_data)
+            'total': len(examinations_data),
+            'next_cursor': next_cursor
         })
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
         response.headers.add('Access-Control-Allow-Credentials', 'true')
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+PDF render benchmarks
+
+    python benchmark_pdf_render.py suite [--megapixels 0.48 3 12] [--count 8] [--report pdf_bench.json]
+                                         [--baseline previous.json]
+    python benchmark_pdf_render.py parallel [--images 8 32 128] [--workers 4] [--templates classic modern timeline]
+
+suite renders synthetic phone-sized JPEGs with create_pdf across every
+template, both orientations and, for templates that take it from the case,
+1/2/4/6 images per slide. Each configuration runs in a fresh process with an
+empty pre-scaled image cache and records the cold and warm render time, peak
+RSS and PDF size; --report writes them as JSON to diff between commits, and
+--baseline prints the change against an earlier report. /upload shrinks
+images to 800x600 before rendering, so 0.48 MP is the production case and
+the larger sizes show the cost of skipping that step.
+
+parallel renders each deck size with the single doc.build path and with page
+groups on a process pool, checks the page counts match, and prints wall times.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+
+def make_images(directory, count, size=(800, 600), quality=70, prefix='image'):
+    """Synthetic photos; odd images are portrait like phone shots held upright"""
+    rng = np.random.default_rng(0)
+    paths = []
+    for index in range(count):
+        width, height = size if index % 2 == 0 else (size[1], size[0])
+        # Smooth gradients plus noise compress like photos rather than pure noise
+        x = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None, None]
+        base = (x * rng.random(3, dtype=np.float32) + y * rng.random(3, dtype=np.float32)) / 2
+        noise = rng.integers(-12, 13, (height, width, 3), dtype=np.int16)
+        pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+        path = os.path.join(directory, f"{prefix}_{index}.jpg")
+        Image.fromarray(pixels).save(path, quality=quality)
+        paths.append(path)
+    return paths
+
+
+def megapixel_size(megapixels):
+    """4:3 landscape pixel size with roughly the given number of megapixels"""
+    width = round((megapixels * 1e6 * 4 / 3) ** 0.5)
+    return width, round(width * 3 / 4)
+
+
+def page_count(path):
+    """Number of page objects in a PDF"""
+    with open(path, 'rb') as f:
+        return len(re.findall(rb'/Type\s*/Page(?![A-Za-z])', f.read()))
+
+
+def _status_mb(field):
+    """A memory field of /proc/self/status in MB (Linux only)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _suite_worker(config, images, work_dir, queue):
+    # Each configuration starts with its own empty pre-scaled image cache
+    os.environ['PDF_IMAGE_CACHE_DIR'] = tempfile.mkdtemp(prefix='cache_', dir=work_dir)
+    os.environ['PDF_PAGE_INDEX_DIR'] = os.path.join(work_dir, 'pages')
+    from pdf_renderer import create_pdf
+
+    result = dict(config, rss_before_mb=_status_mb('VmRSS'))
+    output = os.path.join(work_dir, f"{os.getpid()}.pdf")
+    for run in ('cold', 'warm'):
+        started = time.perf_counter()
+        if not create_pdf(images, 'Benchmark case', 'Benchmark notes', output, config['template'],
+                          config['orientation'], config['images_per_slide'], workers=0):
+            queue.put(dict(result, error='create_pdf failed'))
+            return
+        result[f"{run}_seconds"] = round(time.perf_counter() - started, 3)
+
+    # VmHWM is the peak resident set of this process image
+    result.update(peak_rss_mb=_status_mb('VmHWM'), pdf_bytes=os.path.getsize(output), pages=page_count(output))
+    os.unlink(output)
+    shutil.rmtree(os.environ['PDF_IMAGE_CACHE_DIR'], ignore_errors=True)
+    queue.put(result)
+
+
+def run_config(config, images, work_dir):
+    """Render one configuration in a fresh spawned process and return its measurements"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_suite_worker, args=(config, images, work_dir, queue))
+    process.start()
+    try:
+        result = queue.get(timeout=1800)
+    except Exception:
+        result = dict(config, error=f"worker exited with code {process.exitcode}")
+    process.join()
+    return result
+
+
+def suite_configs(templates, orientations, slide_counts):
+    """Every (template, orientation, images_per_slide) to render
+
+    images_per_slide is only varied for templates that take it from the case;
+    the others ignore it and run once at 1.
+    """
+    from pdf_templates import TEMPLATES
+
+    configs = []
+    for template in templates:
+        spec = TEMPLATES[template]
+        varies = spec.get('body', 'stack') != 'sections' and spec.get('images_per_slide') is None
+        for orientation in orientations:
+            for images_per_slide in (slide_counts if varies else [1]):
+                configs.append({'template': template, 'orientation': orientation,
+                                'images_per_slide': images_per_slide})
+    return configs
+
+
+def result_key(result):
+    return (result['template'], result['orientation'], result['images_per_slide'], result['megapixels'])
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_suite(args):
+    from pdf_templates import TEMPLATES
+    import reportlab
+    import PIL
+
+    templates = args.templates or list(TEMPLATES)
+    configs = suite_configs(templates, args.orientations, args.images_per_slide)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result_key(result): result for result in json.load(f)['results'] if 'error' not in result}
+
+    work_dir = tempfile.mkdtemp(prefix='pdf_suite_')
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'reportlab': reportlab.Version,
+            'pillow': PIL.__version__,
+            'cpu_count': os.cpu_count(),
+            'platform': platform.platform(),
+            'image_count': args.count,
+            'megapixels': args.megapixels
+        },
+        'results': []
+    }
+
+    try:
+        print(f"{len(configs) * len(args.megapixels)} renders of {args.count} images "
+              f"(cold = empty image cache, warm = second render)")
+        print(f"{'template':11s} {'orient':9s} {'per':>3s} {'MP':>5s} {'cold':>7s} {'warm':>7s} "
+              f"{'peak RSS':>9s} {'size':>8s} {'pages':>5s}")
+        for megapixels in args.megapixels:
+            size = megapixel_size(megapixels)
+            image_dir = os.path.join(work_dir, f"{megapixels}mp")
+            os.makedirs(image_dir)
+            images = make_images(image_dir, args.count, size, quality=90)
+
+            for config in configs:
+                result = run_config(dict(config, megapixels=megapixels, image_size=list(size)), images, work_dir)
+                report['results'].append(result)
+                if 'error' in result:
+                    print(f"{config['template']:11s} {config['orientation']:9s} {config['images_per_slide']:3d} "
+                          f"{megapixels:5g} ❌ {result['error']}")
+                    continue
+
+                line = (f"{result['template']:11s} {result['orientation']:9s} {result['images_per_slide']:3d} "
+                        f"{megapixels:5g} {result['cold_seconds']:6.2f}s {result['warm_seconds']:6.2f}s "
+                        f"{result['peak_rss_mb'] if result['peak_rss_mb'] is not None else 'n/a':>6} MB "
+                        f"{result['pdf_bytes'] / 1024:6.0f}KB {result['pages']:5d}")
+                previous = baseline.get(result_key(result))
+                if previous:
+                    line += (f"  vs baseline: cold {result['cold_seconds'] / previous['cold_seconds']:.2f}x, "
+                             f"size {result['pdf_bytes'] / previous['pdf_bytes']:.2f}x")
+                print(line)
+
+            shutil.rmtree(image_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report written to {args.report}")
+    return 1 if any('error' in result for result in report['results']) else 0
+
+
+def run_parallel(args):
+    work_dir = tempfile.mkdtemp(prefix='pdf_bench_')
+    os.environ.setdefault('PDF_IMAGE_CACHE_DIR', os.path.join(work_dir, 'pdf_cache'))
+    os.environ.setdefault('PDF_PAGE_INDEX_DIR', os.path.join(work_dir, 'pdf_pages'))
+    from pdf_renderer import create_pdf
+
+    try:
+        images = make_images(work_dir, max(args.images))
+        # Start the pool and fill the pre-scaled image cache for every template so both paths start equal
+        create_pdf(images[:4], 'Warm-up', '', os.path.join(work_dir, 'warmup.pdf'), workers=args.workers)
+        for template in args.templates:
+            create_pdf(images, 'Warm-up', '', os.path.join(work_dir, 'warmup.pdf'), template, workers=0)
+
+        print(f"{'template':10s} {'images':>6s} {'serial':>9s} {'parallel':>9s} {'speedup':>8s}  pages  ({args.workers} workers)")
+        for template in args.templates:
+            for count in args.images:
+                timings = {}
+                pages = {}
+                for mode, workers in (('serial', 0), ('parallel', args.workers)):
+                    output = os.path.join(work_dir, f"{template}_{count}_{mode}.pdf")
+                    started = time.perf_counter()
+                    if not create_pdf(images[:count], f"Benchmark {count}", 'Benchmark notes', output, template,
+                                      workers=workers):
+                        raise RuntimeError(f"{mode} render of {template}/{count} failed")
+                    timings[mode] = time.perf_counter() - started
+                    pages[mode] = page_count(output)
+
+                match = 'ok' if pages['serial'] == pages['parallel'] else f"MISMATCH {pages}"
+                print(f"{template:10s} {count:6d} {timings['serial']:8.2f}s {timings['parallel']:8.2f}s "
+                      f"{timings['serial'] / timings['parallel']:7.2f}x  {pages['serial']:5d} {match}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PDF rendering')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    suite = commands.add_parser('suite', help='Time, memory and size across templates, layouts and image sizes')
+    suite.add_argument('--megapixels', type=float, nargs='+', default=[0.48, 3, 12],
+                       help='Source image sizes; 0.48 MP is what /upload produces')
+    suite.add_argument('--count', type=int, default=8, help='Images per deck (the upload form has 8 slots)')
+    suite.add_argument('--templates', nargs='+', default=None, help='Default: every registered template')
+    suite.add_argument('--orientations', nargs='+', default=['portrait', 'landscape'])
+    suite.add_argument('--images-per-slide', type=int, nargs='+', default=[1, 2, 4, 6])
+    suite.add_argument('--report', default=None, help='Write the results to this JSON file')
+    suite.add_argument('--baseline', default=None, help='Earlier --report file to compare against')
+
+    parallel = commands.add_parser('parallel', help='Serial vs process-pool rendering of large decks')
+    parallel.add_argument('--images', type=int, nargs='+', default=[8, 32, 128])
+    parallel.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parallel.add_argument('--templates', nargs='+', default=['classic', 'modern', 'timeline'])
+
+    args = parser.parse_args()
+    return run_suite(args) if args.command == 'suite' else run_parallel(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
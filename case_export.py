@@ -0,0 +1,86 @@
+"""
+Bulk export of already-rendered case PDFs
+
+Both formats are generators so an export of hundreds of cases is sent as it
+is read from disk: stream_case_zip stores each PDF in a ZIP archive without
+recompressing it, and stream_combined_pdf splices the PDFs into one document
+through pdf_stream. Only one source PDF is held in memory at a time.
+"""
+import json
+import logging
+import zipfile
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from pdf_stream import PDFStreamWriter
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipOutput:
+    """Write-only file object whose contents are drained by the generator
+
+    It has no tell(), so zipfile treats it as unseekable and writes data
+    descriptors after each member instead of seeking back to patch headers.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_case_zip(entries: Iterable[Tuple[str, str]], manifest: Optional[list] = None) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of (archive name, file path) entries
+
+    PDFs are already compressed, so members are stored rather than deflated.
+    When manifest is given it is written last as manifest.json.
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for arcname, path in entries:
+            try:
+                with open(path, 'rb') as source:
+                    info = zipfile.ZipInfo.from_file(path, arcname)
+                    with archive.open(info, 'w') as member:
+                        for chunk in iter(lambda: source.read(READ_CHUNK_SIZE), b''):
+                            member.write(chunk)
+                            yield output.drain()
+            except OSError as e:
+                logging.warning(f"Skipping {path} in case export: {e}")
+            yield output.drain()
+
+        if manifest is not None:
+            archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+    yield output.drain()
+
+
+def stream_combined_pdf(paths: Iterable[str]) -> Iterator[bytes]:
+    """Yield one PDF containing every page of the given case PDFs in order
+
+    A file that is missing or that pdf_stream cannot parse is logged and
+    left out; the response is already streaming, so it cannot fail.
+    """
+    writer = PDFStreamWriter()
+    yield writer.header()
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # add_document changes the writer only once the whole file is serialized, so a bad file leaves it untouched
+            chunk = writer.add_document(data)
+        except (OSError, ValueError, AttributeError, KeyError) as e:
+            logging.warning(f"Skipping {path} in combined case export: {e}")
+            continue
+        yield chunk
+    yield writer.finish()
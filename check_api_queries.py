@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Query-count and pagination check for list endpoints
+
+Seeds a throwaway in-memory database with growing numbers of patients,
+cases and examinations, calls each endpoint as that user and counts the SQL
+statements it runs. The count must not depend on how many patients there
+are; a loop that queries per patient shows up as a count that grows with the
+data. Each endpoint is then read page by page with limit/cursor and the pages
+must add up to the unpaginated listing.
+
+    python check_api_queries.py [--patients 10 200 2000] [--page-size 7]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Use an empty database and skip loading the AI model before the app is imported
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ.setdefault('AI_WARMUP', 'false')
+
+from sqlalchemy import event
+
+from app import app, db
+from config.models import User, Patient, Case, OrthodonticExamination
+
+CASES_PER_PATIENT = 3
+
+
+def _patient_rows(response):
+    return response.get_json(), response.headers.get('X-Next-Cursor')
+
+
+def _case_rows(response):
+    return response.get_json(), response.headers.get('X-Next-Cursor')
+
+
+def _exam_rows(response):
+    data = response.get_json()
+    return data['examinations'], data['next_cursor']
+
+
+# url -> (rows and next cursor of a response, expected rows for n patients)
+ENDPOINTS = {
+    '/api/patients': (_patient_rows, lambda patients: patients),
+    '/api/cases': (_case_rows, lambda patients: patients * CASES_PER_PATIENT),
+    '/api/orthodontic-examinations': (_exam_rows, lambda patients: patients)
+}
+
+
+def seed(user, patient_count):
+    """Give user exactly patient_count patients, each with a few cases and an examination"""
+    OrthodonticExamination.query.filter_by(user_id=user.id).delete()
+    Case.query.filter_by(user_id=user.id).delete()
+    Patient.query.filter_by(user_id=user.id).delete()
+    started = datetime.now() - timedelta(days=patient_count)
+    for index in range(patient_count):
+        # Every other patient shares a timestamp with the previous one to exercise the id tie-breaker
+        created_at = started + timedelta(days=index - index % 2)
+        patient = Patient(mrn=f"Q{index:05d}", first_name='Query', last_name=f"Check {index}", clinic='KFMC',
+                          user_id=user.id, created_at=created_at)
+        db.session.add(patient)
+        db.session.flush()
+        for visit in range(CASES_PER_PATIENT):
+            db.session.add(Case(title=f"Visit {visit}", template='classic', orientation='portrait',
+                                visit_type='Orthodontic Visit', visit_description='Check' if visit else None,
+                                patient_id=patient.id, user_id=user.id, image_count=visit,
+                                created_at=created_at + timedelta(hours=visit)))
+        db.session.add(OrthodonticExamination(patient_id=patient.id, user_id=user.id, full_name=f"Check {index}",
+                                              file_number=f"F{index}", created_at=created_at,
+                                              uploaded_photos='{"extraoralFrontal": "front.jpg"}'))
+    db.session.commit()
+
+
+def count_queries(client, url):
+    """Response and number of SQL statements for one GET"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return response, len(statements)
+
+
+def read_pages(client, url, rows_of, page_size):
+    """Every row of a listing read page by page, and the number of pages"""
+    rows = []
+    pages = 0
+    cursor = None
+    while True:
+        response = client.get(f"{url}?limit={page_size}" + (f"&cursor={cursor}" if cursor else ''))
+        page, cursor = rows_of(response)
+        rows.extend(page)
+        pages += 1
+        if not cursor:
+            return rows, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that list endpoints run a constant number of queries')
+    parser.add_argument('--patients', type=int, nargs='+', default=[10, 200, 2000])
+    parser.add_argument('--page-size', type=int, default=7)
+    args = parser.parse_args()
+
+    with app.app_context():
+        user = User(email='query-check@example.com', password_hash='-', first_name='Query', last_name='Check',
+                    department='QA', position='QA')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+    failed = False
+    counts = {url: {} for url in ENDPOINTS}
+    for patient_count in args.patients:
+        with app.app_context():
+            seed(db.session.get(User, user_id), patient_count)
+
+        for url, (rows_of, expected) in ENDPOINTS.items():
+            response, statements = count_queries(client, url)
+            rows = rows_of(response)[0] if response.status_code == 200 else None
+            print(f"{url} with {patient_count:5d} patients: {statements} statements "
+                  f"(HTTP {response.status_code}, {len(rows) if rows is not None else 'no'} rows)")
+            counts[url][patient_count] = statements
+            if rows is None or len(rows) != expected(patient_count):
+                print(f"❌ {url} returned HTTP {response.status_code} without {expected(patient_count)} rows")
+                failed = True
+                continue
+
+            paged, pages = read_pages(client, url, rows_of, args.page_size)
+            if paged != rows:
+                print(f"❌ {url}: {pages} pages of {args.page_size} do not match the full listing")
+                failed = True
+
+            _, page_statements = count_queries(client, f"{url}?limit={args.page_size}&fields=id,created_at")
+            counts[url][f"{patient_count} paged"] = page_statements
+
+    for url, url_counts in counts.items():
+        full = {key: value for key, value in url_counts.items() if isinstance(key, int)}
+        paged = {key: value for key, value in url_counts.items() if not isinstance(key, int)}
+        if len(set(full.values())) == 1 and len(set(paged.values())) == 1:
+            print(f"✅ {url}: {next(iter(full.values()))} statements regardless of patient count, "
+                  f"{next(iter(paged.values()))} per page")
+        else:
+            print(f"❌ {url}: statement count grows with patients: {url_counts}")
+            failed = True
+
+    # Bad arguments are rejected rather than ignored
+    for query in ('limit=0', 'limit=abc', 'cursor=bogus', 'fields=id,password_hash'):
+        status = client.get(f"/api/cases?{query}").status_code
+        if status != 400:
+            print(f"❌ /api/cases?{query} returned HTTP {status}, expected 400")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
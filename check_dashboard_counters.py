@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Dashboard counter check
+
+Applies a random series of patient and case inserts and deletes to a
+throwaway in-memory database and checks after each write that the
+materialized counters (dashboard_counters.py) equal a full recount, then
+times /api/dashboard-stats and counts its SQL statements.
+
+    python check_dashboard_counters.py [--writes 300]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ.setdefault('AI_WARMUP', 'false')
+
+from sqlalchemy import event
+
+from app import app, db
+from config.models import User, Patient, Case, DashboardCounters
+from dashboard_counters import count_dashboard, get_dashboard_counters
+
+COUNTED = ('patient_count', 'case_count', 'month_case_count', 'active_patient_count')
+
+
+def stored_counts(user_id):
+    db.session.expire_all()
+    counters = db.session.get(DashboardCounters, user_id)
+    return {name: getattr(counters, name) for name in COUNTED}
+
+
+def recount(user_id):
+    totals = count_dashboard(user_id)
+    return {name: totals[name] for name in COUNTED}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check materialized dashboard counters against a recount')
+    parser.add_argument('--writes', type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    failed = False
+    with app.app_context():
+        users = []
+        for index in range(2):
+            user = User(email=f"dashboard-check-{index}@example.com", password_hash='-', first_name='Dash',
+                        last_name='Check', department='QA', position='QA')
+            db.session.add(user)
+            db.session.commit()
+            get_dashboard_counters(user.id)
+            users.append(user.id)
+
+        now = datetime.now()
+        for step in range(args.writes):
+            user_id = rng.choice(users)
+            patients = Patient.query.filter_by(user_id=user_id).all()
+            cases = Case.query.filter_by(user_id=user_id).all()
+            action = rng.random()
+            if action < 0.25 or not patients:
+                db.session.add(Patient(mrn=f"D{step}", first_name='Dash', last_name=f"Check {step}",
+                                       clinic='KFMC', user_id=user_id))
+                label = 'add patient'
+            elif action < 0.8:
+                # Cases from this month, earlier in the 30-day window and long ago
+                created_at = now - timedelta(days=rng.choice([0, 0, 3, 12, 29, 31, 45, 200]), minutes=step)
+                db.session.add(Case(title='Visit', template='classic', orientation='portrait',
+                                    visit_type='Orthodontic Visit', user_id=user_id, created_at=created_at,
+                                    patient_id=rng.choice(patients).id if rng.random() < 0.9 else None))
+                label = 'add case'
+            elif action < 0.95 and cases:
+                db.session.delete(rng.choice(cases))
+                label = 'delete case'
+            else:
+                patient = rng.choice(patients)
+                if Case.query.filter_by(patient_id=patient.id).count():
+                    continue
+                db.session.delete(patient)
+                label = 'delete patient'
+            db.session.commit()
+
+            stored, expected = stored_counts(user_id), recount(user_id)
+            if stored != expected:
+                print(f"❌ after step {step} ({label}): stored {stored}, recount {expected}")
+                failed = True
+                break
+
+        if not failed:
+            print(f"✅ counters matched a full recount after each of {args.writes} writes")
+        for user_id in users:
+            print(f"   user {user_id}: {stored_counts(user_id)}")
+
+    # The dashboard reads the counters row and the recent cases, whatever the history size
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(users[0])
+        sess['_fresh'] = True
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    client.get('/api/dashboard-stats')
+    event.listen(engine, 'before_cursor_execute', record)
+    started = time.perf_counter()
+    response = client.get('/api/dashboard-stats')
+    elapsed = (time.perf_counter() - started) * 1000
+    event.remove(engine, 'before_cursor_execute', record)
+    data = response.get_json()
+    print(f"/api/dashboard-stats: HTTP {response.status_code}, {len(statements)} statements, {elapsed:.1f} ms, "
+          f"{data.get('totalCases')} cases, {len(data.get('recentCases', []))} recent")
+    if response.status_code != 200:
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
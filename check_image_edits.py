@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Render cache check for image edits
+
+Builds an ImageEditStore in a throwaway directory, renders a series of
+edits and checks that prune_renders keeps the rendered-output cache within
+its size and age caps, evicting the least recently used renders first,
+never evicting a render used within cache_min_age, and that an evicted
+render is rebuilt on its next use.
+
+    python check_image_edits.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from image_edits import ImageEditStore
+
+RENDER_SIZE = (400, 300)
+
+
+def cached_renders(store):
+    return sorted(name for name in os.listdir(store.render_dir) if name.endswith('.jpg'))
+
+
+def cache_bytes(store):
+    return sum(os.path.getsize(os.path.join(store.render_dir, name)) for name in cached_renders(store))
+
+
+def set_last_use(path, seconds_ago):
+    stamp = time.time() - seconds_ago
+    os.utime(path, (stamp, stamp))
+
+
+def main():
+    root = tempfile.mkdtemp(prefix='image-edit-check-')
+    failed = False
+
+    def check(condition, message):
+        nonlocal failed
+        print(f"{'✅' if condition else '❌'} {message}")
+        failed = failed or not condition
+
+    try:
+        upload_dir = os.path.join(root, 'uploads')
+        os.makedirs(upload_dir)
+        Image.effect_noise((1600, 1200), 64).convert('RGB').save(os.path.join(upload_dir, 'source.jpg'), quality=95)
+
+        store = ImageEditStore(upload_dir, os.path.join(upload_dir, 'image_edits'), max_size=RENDER_SIZE,
+                               cache_max_bytes=10 ** 9, cache_max_age=3600, cache_min_age=60)
+        edits = [store.create('source.jpg', [{'op': 'rotate', 'degrees': 90 * (index % 4)},
+                                             {'op': 'crop', 'box': [0, 0, 1 - index / 40, 1]}])
+                 for index in range(8)]
+        paths = [store.render(edit) for edit in edits]
+        check(len(cached_renders(store)) == 8, f"8 edits render to 8 cached files ({cache_bytes(store)} bytes)")
+
+        # Oldest use first: edits[0] is the least recently used, edits[7] the most
+        for index, path in enumerate(paths):
+            set_last_use(path, 600 - index * 60 + 61)
+
+        # Size cap: keep roughly half the renders
+        render_size = cache_bytes(store) // 8
+        store.cache_max_bytes = render_size * 4
+        removed = store.prune_renders()
+        kept = {os.path.basename(path) for path in paths if os.path.exists(path)}
+        check(cache_bytes(store) <= store.cache_max_bytes,
+              f"size cap: {removed} evicted, {cache_bytes(store)} of {store.cache_max_bytes} bytes left")
+        check(not os.path.exists(paths[0]) and os.path.exists(paths[7]),
+              "size cap evicts the least recently used renders first")
+
+        # A render used moments ago survives even with no budget at all
+        set_last_use(paths[7], 0)
+        store.cache_max_bytes = 0
+        store.prune_renders()
+        check(os.path.exists(paths[7]), "a render used within cache_min_age is kept over the size cap")
+        check(len(cached_renders(store)) == 1, f"everything older is evicted ({len(kept)} were left before)")
+
+        # Age cap: with room to spare, renders unused for longer than cache_max_age go
+        store.cache_max_bytes = 10 ** 9
+        rebuilt = store.render(edits[0])
+        check(rebuilt == paths[0] and os.path.exists(rebuilt), "an evicted render is rebuilt on its next use")
+        set_last_use(rebuilt, store.cache_max_age + 1)
+        store.prune_renders()
+        check(not os.path.exists(rebuilt) and os.path.exists(paths[7]),
+              "age cap evicts renders unused for longer than cache_max_age")
+
+        # A cache hit counts as a use
+        set_last_use(paths[7], store.cache_max_age + 1)
+        store.render(edits[7])
+        store.prune_renders()
+        check(os.path.exists(paths[7]), "a cache hit refreshes the render's last use")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Patient search index check
+
+Seeds a throwaway database with many patients, then checks that the search
+index (patient_search.py) returns the same patients as the ILIKE query it
+replaced for more than one user, stays in sync when patients are added,
+renamed and deleted, and answers within the time budget.
+
+    python check_patient_search.py [--patients 100000] [--users 20] [--budget-ms 20]
+    DATABASE_URL=postgresql://... python check_patient_search.py
+
+The budget is the median of 5 warm calls of search_patients() at the
+endpoint's limit of 20, for one user's patients (patients / users of them)
+in a database of --patients, on a file SQLite database in the page cache or
+the given PostgreSQL server; it does not include HTTP or JSON encoding. The
+default of 20 ms is met with room to spare for 5,000 patients per user on a
+developer laptop; a user who owns most of a 100,000-patient database takes
+15-25 ms there for common names ('omar'), as every match is still read to
+rank it. Run with --users 1 to see that case on a given host.
+
+On SQLite the check also rebuilds an index left by the earlier layout (an
+unindexed owner column). On PostgreSQL it EXPLAINs the search query with
+sequential scans disabled and checks that it is planned on the
+ix_patient_search_trgm GIN index.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+if 'DATABASE_URL' not in os.environ:
+    # A file rather than :memory: so timings include real page reads
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='patient_search_'), 'check.db')}"
+os.environ.setdefault('AI_WARMUP', 'false')
+
+from sqlalchemy import event, text
+
+from app import app, db
+from config.models import User, Patient
+import patient_search
+
+CHECK_EMAIL = 'patient-search-check@example.com'
+FIRST_NAMES = ['Mohammed', 'Abdullah', 'Fatimah', 'Noura', 'Sara', 'Omar', 'Khalid', 'Layla', 'Yousef', 'Reem',
+               'Hassan', 'Aisha', 'Faisal', 'Huda', 'Turki', 'Maha', 'Saad', 'Lama', 'Nasser', 'Dana']
+LAST_NAMES = ['Aljabab', 'Alqahtani', 'Alharbi', 'Alghamdi', 'Alzahrani', 'Aldosari', 'Alshehri', 'Alotaibi',
+              'Almutairi', 'Alanazi', 'Alshammari', 'Alsubaie', 'Alomari', 'Alyami', 'Albalawi']
+
+
+def seed(patient_count, user_count):
+    """patient_count patients spread over user_count users; returns the checked user's id"""
+    users = []
+    for index in range(user_count):
+        email = CHECK_EMAIL if index == 0 else f"patient-search-check-{index}@example.com"
+        user = User.query.filter_by(email=email).first()
+        if user:
+            Patient.query.filter_by(user_id=user.id).delete()
+        else:
+            user = User(email=email, password_hash='-', first_name='Search', last_name='Check',
+                        department='QA', position='QA')
+            db.session.add(user)
+            db.session.flush()
+        users.append(user.id)
+
+    rng = random.Random(0)
+    rows = [{'mrn': f"{rng.randrange(10 ** 7):07d}{index}", 'first_name': rng.choice(FIRST_NAMES),
+             'last_name': rng.choice(LAST_NAMES) + (f"-{index % 997}" if index % 3 == 0 else ''),
+             'clinic': rng.choice(['KFMC', 'DC']), 'user_id': users[index % user_count]}
+            for index in range(patient_count)]
+    db.session.execute(Patient.__table__.insert(), rows)
+    db.session.commit()
+    return users
+
+
+def check_old_layout_rebuilt():
+    """An index in the earlier layout is replaced and backfilled; returns whether it worked"""
+    with db.engine.begin() as conn:
+        for statement in patient_search._SQLITE_RESET:
+            conn.execute(text(statement))
+        conn.execute(text("CREATE VIRTUAL TABLE patient_search USING fts5(search_text, owner UNINDEXED, "
+                          "tokenize='trigram')"))
+    patient_search.install_patient_search(create=False)
+    detected = patient_search._backend is None
+    patient_search.install_patient_search()
+    indexed = db.session.execute(text("SELECT count(*) FROM patient_search")).scalar()
+    return detected and patient_search._backend == 'fts5' and indexed == Patient.query.count()
+
+
+def check_trigram_plan(user_id):
+    """EXPLAIN of the PostgreSQL search query; returns (uses the GIN index, plan)"""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        patient_search.search_patients(user_id, 'alqahtani', limit=20)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    statement, parameters = next((statement, parameters) for statement, parameters in recorded
+                                 if 'word_similarity' in statement)
+    connection = db.session.connection()
+    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    plan = '\n'.join(row[0] for row in connection.exec_driver_sql(f"EXPLAIN {statement}", parameters))
+    db.session.rollback()
+    return 'ix_patient_search_trgm' in plan, plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the patient search index')
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=20, help='Users the patients are spread over')
+    parser.add_argument('--budget-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    failed = False
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        print(f"Search backend: {patient_search._backend or 'ILIKE fallback'} on {dialect}")
+        started = time.perf_counter()
+        users = seed(args.patients, args.users)
+        user_id = users[0]
+        print(f"Seeded {args.patients} patients over {args.users} users in {time.perf_counter() - started:.1f}s")
+
+        if dialect == 'sqlite':
+            ok = check_old_layout_rebuilt()
+            print(f"{'✅' if ok else '❌'} an index in the earlier layout is rebuilt")
+            failed = failed or not ok
+        elif dialect == 'postgresql':
+            ok, plan = check_trigram_plan(user_id)
+            print(f"{'✅' if ok else '❌'} the search query uses ix_patient_search_trgm")
+            print('   ' + plan.replace('\n', '\n   '))
+            failed = failed or not ok
+        own_patients = Patient.query.filter_by(user_id=user_id)
+        sample = own_patients.order_by(Patient.id).offset(own_patients.count() // 2).first()
+
+        terms = ['moh', 'aljab', 'ALQAHTANI', 'sara al', 'fatimah alharbi', sample.mrn, sample.mrn[2:7],
+                 'zzzz', 'omar', '-99', 'reem alo']
+
+        # Same patients as the ILIKE query, for the checked user and one other
+        for owner in sorted({user_id, users[-1]}):
+            for term in terms:
+                indexed = patient_search.search_patients(owner, term, limit=100000)
+                baseline = patient_search._ilike_search(owner, term, limit=100000)
+                if {p.id for p in indexed} != {p.id for p in baseline}:
+                    print(f"❌ user {owner}, '{term}': index found {len(indexed)} patients, ILIKE found {len(baseline)}")
+                    failed = True
+        if patient_search.search_patients(user_id, sample.mrn, limit=5)[0].id != sample.id:
+            print(f"❌ exact MRN {sample.mrn} is not the first result")
+            failed = True
+
+        # Timings with the response limit the endpoint uses, on a session that is not
+        # holding the patients loaded above
+        db.session.expunge_all()
+        timings = {}
+        for term in terms:
+            samples = []
+            for _ in range(5):
+                started = time.perf_counter()
+                patient_search.search_patients(user_id, term, limit=20)
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[term] = statistics.median(samples)
+        print(f"Median of 5 calls, limit 20, {own_patients.count()} of {args.patients} patients owned, "
+              f"budget {args.budget_ms:g} ms:")
+        for term, ms in timings.items():
+            status = '✅' if ms <= args.budget_ms else '❌'
+            failed = failed or ms > args.budget_ms
+            print(f"{status} '{term}': {ms:.1f} ms")
+
+        # Inserts, renames and deletes are visible to the next search
+        patient = Patient(mrn='SYNC-0001', first_name='Zubayda', last_name='Quartz', clinic='DC', user_id=user_id)
+        db.session.add(patient)
+        db.session.commit()
+        found_new = [p.id for p in patient_search.search_patients(user_id, 'zubayda')] == [patient.id]
+        patient.last_name = 'Obsidian'
+        db.session.commit()
+        found_renamed = ([p.id for p in patient_search.search_patients(user_id, 'obsidian')] == [patient.id]
+                         and not patient_search.search_patients(user_id, 'quartz'))
+        db.session.delete(patient)
+        db.session.commit()
+        found_deleted = not patient_search.search_patients(user_id, 'zubayda')
+        for label, ok in (('insert', found_new), ('update', found_renamed), ('delete', found_deleted)):
+            print(f"{'✅' if ok else '❌'} index follows patient {label}")
+            failed = failed or not ok
+
+        Patient.query.filter(Patient.user_id.in_(users)).delete()
+        db.session.commit()
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN check for the per-user listing and dashboard queries
+
+Calls the listing and dashboard endpoints through the test client, records
+every SQL statement they run and EXPLAINs each one with its parameters. Any
+statement that filters cases, patients or examinations by user_id or
+patient_id must be planned on one of the composite (user_id, created_at) or
+(patient_id, created_at) indexes from config/models.py.
+
+    python check_query_plans.py                          # in-memory SQLite
+    DATABASE_URL=postgresql://... python check_query_plans.py
+
+Against PostgreSQL the tables are created if missing and only the seeded
+rows of a throwaway user are touched; sequential scans are disabled for the
+EXPLAIN so the planner's choice on a near-empty table does not hide whether
+an index can be used.
+"""
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('AI_WARMUP', 'false')
+
+from sqlalchemy import event
+
+from app import app, db
+from config.models import User, Patient, Case, OrthodonticExamination
+
+CHECK_EMAIL = 'query-plan-check@example.com'
+
+# Tables whose per-user and per-patient statements must use a composite index
+INDEXED_TABLES = ('case', 'patient', 'orthodontic_examination')
+COMPOSITE_INDEXES = {index.name for model in (Patient, Case, OrthodonticExamination)
+                     for index in model.__table__.indexes if len(index.columns) > 1}
+
+
+def seed():
+    """A user with a few patients, cases and examinations; returns the user id"""
+    user = User.query.filter_by(email=CHECK_EMAIL).first()
+    if user:
+        OrthodonticExamination.query.filter_by(user_id=user.id).delete()
+        Case.query.filter_by(user_id=user.id).delete()
+        Patient.query.filter_by(user_id=user.id).delete()
+    else:
+        user = User(email=CHECK_EMAIL, password_hash='-', first_name='Plan', last_name='Check',
+                    department='QA', position='QA')
+        db.session.add(user)
+        db.session.flush()
+
+    for index in range(30):
+        created_at = datetime.now() - timedelta(days=index)
+        patient = Patient(mrn=f"P{index:04d}", first_name='Plan', last_name=f"Check {index}", clinic='KFMC',
+                          user_id=user.id, created_at=created_at)
+        db.session.add(patient)
+        db.session.flush()
+        db.session.add(Case(title='Visit', template='classic', orientation='portrait', visit_type='Registration',
+                            patient_id=patient.id, user_id=user.id, created_at=created_at))
+        db.session.add(OrthodonticExamination(patient_id=patient.id, user_id=user.id, full_name=f"Check {index}",
+                                              file_number=f"F{index}", created_at=created_at))
+    db.session.commit()
+    return user.id
+
+
+def record_statements(client, urls):
+    """(url, statement, parameters) for every SQL statement the GETs run"""
+    recorded = []
+    current = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append((current['url'], statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        for url in urls:
+            current['url'] = url
+            response = client.get(url)
+            b''.join(response.response)  # Streamed responses query as they are read
+            if response.status_code >= 500:
+                raise RuntimeError(f"{url} returned HTTP {response.status_code}")
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return recorded
+
+
+def needs_index(statement):
+    """Whether a statement filters one of the indexed tables by user or patient
+
+    Primary key lookups (WHERE <table>.id = ?) are left to the primary key.
+    """
+    if not statement.lstrip().upper().startswith('SELECT'):
+        return False
+    if re.search(r'\.id\s*=\s*(\?|%\(\w+\)s)', statement):
+        return False
+    tables = set(re.findall(r'\bFROM\s+"?(\w+)"?|\bJOIN\s+"?(\w+)"?', statement, re.IGNORECASE))
+    names = {name for pair in tables for name in pair if name}
+    return bool(names & set(INDEXED_TABLES)) and re.search(r'\.(user_id|patient_id)\s*(=|IN)', statement) is not None
+
+
+def explain(connection, statement, parameters):
+    """Query plan of a recorded statement as text"""
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        return '\n'.join(row[-1] for row in rows)
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+        return '\n'.join(row[0] for row in rows)
+    raise RuntimeError(f"No EXPLAIN support for {connection.dialect.name}")
+
+
+def main():
+    with app.app_context():
+        user_id = seed()
+        dialect = db.engine.dialect.name
+        patient_id = Patient.query.filter_by(user_id=user_id).first().id
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+    # A second page exercises the (created_at, id) cursor condition
+    cursors = {}
+    for url in ('/api/cases', '/api/patients'):
+        cursors[url] = client.get(f"{url}?limit=10").headers['X-Next-Cursor']
+    cursors['/api/orthodontic-examinations'] = client.get(
+        '/api/orthodontic-examinations?limit=10').get_json()['next_cursor']
+
+    urls = [
+        '/api/cases', f"/api/cases?limit=10&cursor={cursors['/api/cases']}",
+        '/api/patients', f"/api/patients?limit=10&cursor={cursors['/api/patients']}&fields=id,cases_count",
+        '/api/orthodontic-examinations',
+        f"/api/orthodontic-examinations?limit=10&cursor={cursors['/api/orthodontic-examinations']}",
+        '/api/dashboard-stats',
+        f"/api/cases/export?patient_id={patient_id}&format=zip"
+    ]
+    recorded = record_statements(client, urls)
+
+    failed = False
+    checked = 0
+    with app.app_context():
+        connection = db.session.connection()
+        for url, statement, parameters in recorded:
+            if not needs_index(statement):
+                continue
+            checked += 1
+            plan = explain(connection, statement, parameters)
+            used = sorted(name for name in COMPOSITE_INDEXES if name in plan)
+            status = '✅' if used else '❌'
+            failed = failed or not used
+            print(f"{status} {url}\n   {' '.join(statement.split())[:160]}")
+            print('   ' + plan.replace('\n', '\n   '))
+        db.session.rollback()
+
+    print(f"\n{checked} statements checked on {dialect}")
+    if failed:
+        print('❌ Some per-user queries are not using a composite index')
+    else:
+        print('✅ Every per-user listing and dashboard query uses a composite index')
+    return 1 if failed or not checked else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
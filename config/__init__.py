@@ -2,6 +2,6 @@
 # This package contains all configuration-related modules
 
 from .database import db
-from .models import User, Patient, Case, UserSettings
+from .models import User, Patient, Case, RenderJob, UserSettings
  
-__all__ = ['db', 'User', 'Patient', 'Case', 'UserSettings'] 
\ No newline at end of file
+__all__ = ['db', 'User', 'Patient', 'Case', 'RenderJob', 'UserSettings'] 
\ No newline at end of file
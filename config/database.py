@@ -1,7 +1,96 @@
+import logging
+from contextlib import contextmanager
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import DeclarativeBase
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base) 
\ No newline at end of file
+db = SQLAlchemy(model_class=Base)
+
+SCHEMA_LOCK_KEY = 4820193  # pg_advisory_lock key shared by every process that changes the schema
+
+@contextmanager
+def schema_lock():
+    """Let one process at a time run the startup schema changes
+
+    Gunicorn workers import the app, and with it the schema setup, at the
+    same moment. On PostgreSQL they queue on an advisory lock so each one
+    inspects the tables after the previous one's DDL. Elsewhere the helpers
+    below tolerate losing the race instead.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        yield
+        return
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': SCHEMA_LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': SCHEMA_LOCK_KEY})
+
+def add_missing_columns():
+    """Add model columns that existing tables are missing
+
+    db.create_all only creates missing tables, so a nullable column added to
+    a model later is added here with ALTER TABLE. Run it after create_all.
+    A column another process adds first is skipped rather than an error.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = db.engine.dialect.identifier_preparer
+    # SQLite has no ADD COLUMN IF NOT EXISTS; a duplicate there is caught below
+    if_not_exists = 'IF NOT EXISTS ' if db.engine.dialect.name == 'postgresql' else ''
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            if not column.nullable:
+                logging.error(f"Cannot add NOT NULL column {table.name}.{column.name} automatically")
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {preparer.quote(table.name)} "
+                                      f"ADD COLUMN {if_not_exists}{preparer.quote(column.name)} {column_type}"))
+            except DBAPIError:
+                if column.name not in {c['name'] for c in inspect(db.engine).get_columns(table.name)}:
+                    raise
+                logging.info(f"Column {table.name}.{column.name} was added by another process")
+                continue
+            logging.info(f"Added column {table.name}.{column.name} ({column_type})")
+
+def add_missing_indexes():
+    """Create model indexes that existing tables are missing
+
+    Like columns, indexes declared on a model after its table exists are not
+    created by db.create_all. Run it after create_all. CREATE INDEX IF NOT
+    EXISTS lets a process that loses the race to another one carry on.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    if_not_exists = db.engine.dialect.name in ('postgresql', 'sqlite')
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in present:
+                continue
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(CreateIndex(index, if_not_exists=if_not_exists))
+            except DBAPIError:
+                if index.name not in {i['name'] for i in inspect(db.engine).get_indexes(table.name)}:
+                    raise
+                logging.info(f"Index {index.name} was created by another process")
+                continue
+            logging.info(f"Created index {index.name} on {table.name} "
+                         f"({', '.join(column.name for column in index.columns)})")
@@ -81,7 +81,11 @@ class Patient(db.Model):
     cases = db.relationship('Case', backref='patient', lazy=True)
     
     # Unique constraint: MRN must be unique per user (not globally)
-    __table_args__ = (db.UniqueConstraint('mrn', 'user_id', name='unique_mrn_per_user'),)
+    # Listings are per user, newest first, with id breaking created_at ties
+    __table_args__ = (
+        db.UniqueConstraint('mrn', 'user_id', name='unique_mrn_per_user'),
+        db.Index('ix_patient_user_id_created_at', 'user_id', 'created_at', 'id'),
+    )
     
     def __repr__(self):
         return f'<Patient {self.mrn} - {self.first_name} {self.last_name}>'
@@ -95,6 +99,7 @@ class Case(db.Model):
     images_per_slide = db.Column(db.Integer, default=1)
     image_count = db.Column(db.Integer, default=0)
     pdf_filename = db.Column(db.String(255))
+    compression_profile = db.Column(db.String(20))  # screen, print, archive; NULL for decks rendered before profiles
     created_at = db.Column(db.DateTime, default=datetime.now)
     
     # User relationship - each case belongs to a specific user
@@ -112,10 +117,43 @@ class Case(db.Model):
     treatment_plan = db.Column(db.Text)  # Proposed treatment
     diagnosis = db.Column(db.Text)  # Clinical diagnosis and findings
     image_categories = db.Column(db.Text)  # JSON string of selected image categories
+
+    # Per-user and per-patient listings and dashboard counts, newest first
+    __table_args__ = (
+        db.Index('ix_case_user_id_created_at', 'user_id', 'created_at', 'id'),
+        db.Index('ix_case_patient_id_created_at', 'patient_id', 'created_at'),
+    )
     
     def __repr__(self):
         return f'<Case {self.title} - {self.visit_type}>'
 
+class RenderJob(db.Model):
+    """Background PDF render for a case; status is shared by all worker processes"""
+    id = db.Column(db.String(36), primary_key=True)  # UUID returned to the client
+    case_id = db.Column(db.Integer, db.ForeignKey('case.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<RenderJob {self.id} case={self.case_id} {self.status}>'
+
+class DashboardCounters(db.Model):
+    """Per-user dashboard totals, kept current by dashboard_counters.py"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    patient_count = db.Column(db.Integer, nullable=False, default=0)
+    case_count = db.Column(db.Integer, nullable=False, default=0)
+    month_start = db.Column(db.DateTime, nullable=False)  # First day of the month month_case_count covers
+    month_case_count = db.Column(db.Integer, nullable=False, default=0)
+    active_patient_count = db.Column(db.Integer, nullable=False, default=0)  # Patients with a case in the last 30 days
+    refreshed_at = db.Column(db.DateTime, nullable=False)  # Last full recount
+
+    def __repr__(self):
+        return f'<DashboardCounters user={self.user_id} patients={self.patient_count} cases={self.case_count}>'
+
 class OrthodonticExamination(db.Model):
     """Comprehensive orthodontic examination data for each patient"""
     id = db.Column(db.Integer, primary_key=True)
@@ -204,6 +242,11 @@ class OrthodonticExamination(db.Model):
     patient = db.relationship('Patient', backref='orthodontic_examinations')
     user = db.relationship('User', backref='orthodontic_examinations')
     case = db.relationship('Case', backref='orthodontic_examination', uselist=False)
+
+    __table_args__ = (
+        db.Index('ix_orthodontic_examination_user_id_created_at', 'user_id', 'created_at', 'id'),
+        db.Index('ix_orthodontic_examination_patient_id_created_at', 'patient_id', 'created_at'),
+    )
     
     def __repr__(self):
         return f'<OrthodonticExamination {self.full_name} - {self.file_number}>'
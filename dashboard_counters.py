@@ -0,0 +1,139 @@
+"""
+Materialized dashboard counters
+
+The dashboard is the landing page and is reloaded every time the mobile
+shell resumes. Rather than counting patients, cases, this month's cases and
+active patients on each request, DashboardCounters keeps one row per user
+that the dashboard reads with a single primary key lookup:
+
+- Patient and case inserts and deletes adjust the row in the same
+  transaction (the mapper events below), so the counts are exact between
+  recounts.
+- A case written for a patient changes the active patient count only if the
+  patient has no other case in the window, which is checked through the
+  (patient_id, created_at) index.
+- Patients leave the 30-day window and the month rolls over with time rather
+  than with writes, so a row older than DASHBOARD_REFRESH_SECONDS or from an
+  earlier month is recounted when it is read. The recount also repairs any
+  change that bypassed the ORM, such as Query.delete().
+"""
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, event, exists, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config.database import db
+from config.models import Case, DashboardCounters, Patient
+
+DASHBOARD_REFRESH_SECONDS = int(os.environ.get('DASHBOARD_REFRESH_SECONDS', 300))  # Oldest counters served without a recount
+ACTIVE_PATIENT_DAYS = 30
+
+
+def month_bounds(now):
+    """First moment of now's month and of the next month"""
+    start = datetime(now.year, now.month, 1)
+    return start, datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+
+
+def count_dashboard(user_id, now=None):
+    """Recount a user's dashboard totals from the patient and case tables"""
+    now = now or datetime.now()
+    start, end = month_bounds(now)
+    return {
+        'patient_count': Patient.query.filter_by(user_id=user_id).count(),
+        'case_count': Case.query.filter_by(user_id=user_id).count(),
+        'month_start': start,
+        'month_case_count': Case.query.filter(
+            Case.user_id == user_id,
+            Case.created_at >= start,
+            Case.created_at < end
+        ).count(),
+        'active_patient_count': db.session.query(Patient.id).join(Case).filter(
+            Case.user_id == user_id,
+            Case.created_at >= now - timedelta(days=ACTIVE_PATIENT_DAYS)
+        ).distinct().count(),
+        'refreshed_at': now
+    }
+
+
+def refresh_dashboard_counters(user_id, now=None):
+    """Recount a user's dashboard totals and store them"""
+    totals = count_dashboard(user_id, now)
+    counters = db.session.get(DashboardCounters, user_id)
+    if counters is None:
+        counters = DashboardCounters(user_id=user_id)
+        db.session.add(counters)
+    for name, value in totals.items():
+        setattr(counters, name, value)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request created the row first; store the recount over it
+        db.session.rollback()
+        counters = db.session.get(DashboardCounters, user_id)
+        for name, value in totals.items():
+            setattr(counters, name, value)
+        db.session.commit()
+    return counters
+
+
+def get_dashboard_counters(user_id, now=None):
+    """A user's dashboard totals, recounted first if missing or stale"""
+    now = now or datetime.now()
+    counters = db.session.get(DashboardCounters, user_id)
+    if (counters is None or counters.month_start != month_bounds(now)[0] or
+            (now - counters.refreshed_at).total_seconds() > DASHBOARD_REFRESH_SECONDS):
+        counters = refresh_dashboard_counters(user_id, now)
+    return counters
+
+
+def _adjust_for_case(connection, record, delta):
+    """Add delta to the counters a case insert (1) or delete (-1) changes"""
+    counters = DashboardCounters.__table__
+    created_at = record.created_at or datetime.now()
+    values = {
+        'case_count': counters.c.case_count + delta,
+        'month_case_count': counters.c.month_case_count + case(
+            (counters.c.month_start == month_bounds(created_at)[0], delta), else_=0)
+    }
+
+    window_start = datetime.now() - timedelta(days=ACTIVE_PATIENT_DAYS)
+    if record.patient_id and created_at >= window_start:
+        other_recent_case = connection.execute(select(exists().where(
+            Case.patient_id == record.patient_id,
+            Case.user_id == record.user_id,
+            Case.created_at >= window_start,
+            Case.id != record.id
+        ))).scalar()
+        if not other_recent_case:
+            values['active_patient_count'] = counters.c.active_patient_count + delta
+
+    connection.execute(update(counters).where(counters.c.user_id == record.user_id).values(**values))
+
+
+def _adjust_patients(connection, record, delta):
+    counters = DashboardCounters.__table__
+    connection.execute(update(counters).where(counters.c.user_id == record.user_id)
+                       .values(patient_count=counters.c.patient_count + delta))
+
+
+@event.listens_for(Case, 'after_insert')
+def _case_inserted(mapper, connection, record):
+    _adjust_for_case(connection, record, 1)
+
+
+@event.listens_for(Case, 'after_delete')
+def _case_deleted(mapper, connection, record):
+    _adjust_for_case(connection, record, -1)
+
+
+@event.listens_for(Patient, 'after_insert')
+def _patient_inserted(mapper, connection, record):
+    _adjust_patients(connection, record, 1)
+
+
+@event.listens_for(Patient, 'after_delete')
+def _patient_deleted(mapper, connection, record):
+    _adjust_patients(connection, record, -1)
+
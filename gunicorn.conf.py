@@ -0,0 +1,35 @@
+# gunicorn.conf.py - Picked up automatically by `gunicorn app:app`
+# Worker count comes from gunicorn's own WEB_CONCURRENCY handling.
+import os
+
+# AI_PRELOAD=true loads the app, and with it the dental classifier, once in the
+# master process. Workers are forked afterwards and share the memory-mapped
+# model weights copy-on-write, so resident memory stays flat as workers are added.
+preload_app = os.environ.get('AI_PRELOAD', 'false').lower() == 'true'
+
+# With INFERENCE_SOCKET set the model lives in the inference server instead
+remote_inference = bool(os.environ.get('INFERENCE_SOCKET'))
+
+torch_threads = None
+if preload_app and not remote_inference:
+    try:
+        # Keep torch single-threaded while the master loads the model: forking
+        # after OpenMP has started its thread pool deadlocks the workers
+        import torch
+        torch_threads = torch.get_num_threads()
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+
+def post_fork(server, worker):
+    """Restore per-worker state that cannot be inherited across a fork"""
+    if not preload_app or remote_inference:
+        return
+
+    if torch_threads is not None:
+        import torch
+        torch.set_num_threads(torch_threads)
+
+    from app import initialize_background_training
+    initialize_background_training()
@@ -0,0 +1,227 @@
+"""
+Non-destructive image edits
+
+An edited image is a list of operations (rotate, crop) against the untouched
+source upload, stored as a small JSON sidecar. Editing an edited image
+appends to the source's list instead of re-encoding the previous result, so
+however many rotate/crop rounds a photo goes through it is decoded from the
+source and JPEG-encoded once. The rendered result is cached on disk per
+edit, output size and quality; sidecars never change once written, so cached
+renders never go stale. Any render can be rebuilt from its sidecar, so the
+cache is pruned least recently used first once it passes its size or age cap.
+"""
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+EDIT_MARKER = '_edited_'
+
+# Lossless transposes for right-angle rotations (clockwise degrees)
+_TRANSPOSES = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90
+}
+
+
+def operations_from_request(rotation=0, crop_data=None) -> List[Dict[str, object]]:
+    """
+    Operation list for one /edit_image request
+
+    rotation is clockwise degrees. crop_data is the editor's rectangle in the
+    pixels of the displayed image (x, y, width, height, imageWidth,
+    imageHeight); it is stored as fractions so it applies to the source at
+    any resolution. Raises ValueError for malformed input.
+    """
+    operations = []
+    degrees = float(rotation or 0) % 360
+    if degrees:
+        operations.append({'op': 'rotate', 'degrees': degrees})
+
+    if crop_data:
+        image_width = float(crop_data['imageWidth'])
+        image_height = float(crop_data['imageHeight'])
+        if image_width <= 0 or image_height <= 0:
+            raise ValueError('Crop image size must be positive')
+        left = min(max(float(crop_data['x']) / image_width, 0.0), 1.0)
+        top = min(max(float(crop_data['y']) / image_height, 0.0), 1.0)
+        right = min(max(left + float(crop_data['width']) / image_width, left), 1.0)
+        bottom = min(max(top + float(crop_data['height']) / image_height, top), 1.0)
+        operations.append({'op': 'crop', 'box': [left, top, right, bottom]})
+    return operations
+
+
+def compact_operations(operations: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Merge consecutive rotations and consecutive crops into one each"""
+    compacted = []
+    for operation in operations:
+        previous = compacted[-1] if compacted else None
+        if previous and previous['op'] == operation['op'] == 'rotate':
+            degrees = (previous['degrees'] + operation['degrees']) % 360
+            compacted[-1] = {'op': 'rotate', 'degrees': degrees}
+            if not degrees:
+                compacted.pop()
+        elif previous and previous['op'] == operation['op'] == 'crop':
+            # The second box is relative to the first crop
+            left, top, right, bottom = previous['box']
+            inner = operation['box']
+            width, height = right - left, bottom - top
+            compacted[-1] = {'op': 'crop', 'box': [left + inner[0] * width, top + inner[1] * height,
+                                                   left + inner[2] * width, top + inner[3] * height]}
+        else:
+            compacted.append(dict(operation))
+    return compacted
+
+
+def apply_operations(img: Image.Image, operations: List[Dict[str, object]]) -> Image.Image:
+    """Apply an operation list to a decoded image in memory"""
+    for operation in operations:
+        if operation['op'] == 'rotate':
+            degrees = operation['degrees']
+            if degrees in _TRANSPOSES:
+                img = img.transpose(_TRANSPOSES[degrees])
+            else:
+                img = img.rotate(-degrees, resample=Image.Resampling.BICUBIC, expand=True)
+        elif operation['op'] == 'crop':
+            width, height = img.size
+            left, top, right, bottom = operation['box']
+            # Keep at least one pixel so a degenerate rectangle cannot fail the render
+            x0 = min(round(left * width), width - 1)
+            y0 = min(round(top * height), height - 1)
+            img = img.crop((x0, y0, max(round(right * width), x0 + 1), max(round(bottom * height), y0 + 1)))
+        else:
+            raise ValueError(f"Unknown image operation {operation['op']!r}")
+    return img
+
+
+class ImageEditStore:
+    """Operation lists for edited uploads and a disk cache of their renders"""
+
+    def __init__(self, upload_dir: str, edit_dir: str, max_size: Tuple[int, int] = (800, 600), quality: int = 70,
+                 cache_max_bytes: int = 256 * 1024 * 1024, cache_max_age: float = 7 * 24 * 3600,
+                 cache_min_age: float = 600):
+        self.upload_dir = upload_dir
+        self.edit_dir = edit_dir
+        self.render_dir = os.path.join(edit_dir, 'rendered')
+        self.max_size = max_size
+        self.quality = quality
+        self.cache_max_bytes = cache_max_bytes  # Renders beyond this total are evicted, oldest use first
+        self.cache_max_age = cache_max_age  # Seconds a render may go unused before it is evicted
+        self.cache_min_age = cache_min_age  # Renders used more recently are kept, e.g. while a PDF is built from them
+        os.makedirs(self.render_dir, exist_ok=True)
+
+    def _sidecar_path(self, filename: str) -> str:
+        return os.path.join(self.edit_dir, f"{filename}.json")
+
+    def load(self, filename: str) -> Optional[Dict[str, object]]:
+        """The {'source', 'operations'} record of an edited image, or None"""
+        if EDIT_MARKER not in filename or os.path.basename(filename) != filename:
+            return None
+        try:
+            with open(self._sidecar_path(filename)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def create(self, image_filename: str, operations: List[Dict[str, object]]) -> str:
+        """
+        Record an edit of image_filename and return the edited filename
+
+        If image_filename is itself an edit, the new operations are appended
+        to its list against the same source.
+        """
+        record = self.load(image_filename)
+        if record:
+            source, operations = record['source'], record['operations'] + operations
+        else:
+            source = image_filename
+        if not os.path.exists(os.path.join(self.upload_dir, source)):
+            raise FileNotFoundError(source)
+
+        edited_filename = f"{uuid.uuid4()}{EDIT_MARKER}{source}"
+        fd, temp_path = tempfile.mkstemp(suffix='.json', dir=self.edit_dir)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'source': source, 'operations': compact_operations(operations)}, f)
+        os.replace(temp_path, self._sidecar_path(edited_filename))
+        return edited_filename
+
+    def render(self, filename: str, max_size: Optional[Tuple[int, int]] = None,
+               quality: Optional[int] = None) -> Optional[str]:
+        """
+        Path of the edited image encoded as a JPEG, rendering it if needed
+
+        Returns None if filename is not an edit. The source is decoded once,
+        every operation is applied in memory and the result is encoded once.
+        """
+        record = self.load(filename)
+        if record is None:
+            return None
+
+        max_size = max_size or self.max_size
+        quality = quality or self.quality
+        cache_path = os.path.join(self.render_dir,
+                                  f"{os.path.splitext(filename)[0]}_{max_size[0]}x{max_size[1]}_q{quality}.jpg")
+        try:
+            # The modification time records the last use for prune_renders
+            os.utime(cache_path)
+            return cache_path
+        except FileNotFoundError:
+            pass
+
+        with Image.open(os.path.join(self.upload_dir, record['source'])) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            img = apply_operations(img, record['operations'])
+            if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
+                img.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+            # Write to a temporary name first so concurrent requests never read a partial file
+            fd, temp_path = tempfile.mkstemp(suffix='.jpg', dir=self.render_dir)
+            os.close(fd)
+            img.save(temp_path, 'JPEG', quality=quality, optimize=True)
+        os.replace(temp_path, cache_path)
+        logging.info(f"Rendered edited image {filename} at {max_size[0]}x{max_size[1]} q{quality}")
+        self.prune_renders()
+        return cache_path
+
+    def prune_renders(self, now: Optional[float] = None) -> int:
+        """
+        Evict cached renders past the age cap, then the least recently used
+        until the cache fits its size cap; returns the number of files removed
+
+        Renders used within cache_min_age are never evicted, even over the
+        size cap. An evicted render is rebuilt from its sidecar on next use.
+        """
+        now = now if now is not None else time.time()
+        renders = []
+        with os.scandir(self.render_dir) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.name.endswith('.jpg'):
+                        stat = entry.stat()
+                        renders.append((stat.st_mtime, stat.st_size, entry.path))
+                except OSError:
+                    continue  # Removed by another process meanwhile
+
+        total = sum(size for _, size, _ in renders)
+        removed = 0
+        for last_used, size, path in sorted(renders):
+            age = now - last_used
+            if age < self.cache_min_age or (age <= self.cache_max_age and total <= self.cache_max_bytes):
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        if removed:
+            logging.info(f"Evicted {removed} cached edit renders, {total // 1024} KB left")
+        return removed
@@ -0,0 +1,181 @@
+"""
+Patient search index
+
+The patient search box used to OR four ILIKE '%term%' predicates, which
+scans every patient of the user on each keystroke. MRN and name are indexed
+for substring search instead:
+
+- PostgreSQL: a pg_trgm GIN index on the lower-cased "mrn first last" text.
+  LIKE on that expression is answered from the index and matches are ranked
+  by trigram similarity.
+- SQLite: an FTS5 shadow table with the trigram tokenizer keyed by patient
+  id, kept in sync by triggers on patient, ranked by text length (the
+  trigram similarity of a substring match). The owner is indexed too, as a
+  '#<user_id>#' tag, so the user filter is part of the full-text query
+  rather than a lookup of every match in the database.
+
+Trigram indexes need at least three characters, so shorter terms, and
+databases with neither feature, use the ILIKE query with a limit.
+"""
+import logging
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from config.database import db
+from config.models import Patient
+
+
+def _search_text_sql(row=''):
+    """The indexed text of a patient row; row is 'new.' inside triggers"""
+    return f"lower({row}mrn || ' ' || {row}first_name || ' ' || {row}last_name)"
+
+
+SEARCH_TEXT_SQL = _search_text_sql()
+MIN_INDEXED_TERM = 3
+
+_backend: Optional[str] = None  # 'trigram', 'fts5' or None for the ILIKE fallback
+
+def _owner_tag_sql(row=''):
+    """The indexed owner of a patient row; the '#' delimiters keep user 1 from matching user 11"""
+    return f"'#' || {row}user_id || '#'"
+
+
+_SQLITE_SETUP = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS patient_search USING fts5(search_text, owner_tag, tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS patient_search_insert AFTER INSERT ON patient BEGIN
+        INSERT INTO patient_search(rowid, search_text, owner_tag)
+        VALUES (new.id, {_search_text_sql('new.')}, {_owner_tag_sql('new.')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS patient_search_update
+        AFTER UPDATE OF mrn, first_name, last_name, user_id ON patient BEGIN
+        UPDATE patient_search SET search_text = {_search_text_sql('new.')}, owner_tag = {_owner_tag_sql('new.')}
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS patient_search_delete AFTER DELETE ON patient BEGIN
+        DELETE FROM patient_search WHERE rowid = old.id;
+    END""",
+    # Index patients that existed before the table (or that a failed trigger missed)
+    f"""INSERT INTO patient_search(rowid, search_text, owner_tag)
+        SELECT id, {SEARCH_TEXT_SQL}, {_owner_tag_sql()} FROM patient
+        WHERE id NOT IN (SELECT rowid FROM patient_search)"""
+]
+
+# Earlier layouts of patient_search (an unindexed integer owner column) are dropped
+# with their triggers and rebuilt by the backfill above
+_SQLITE_RESET = [
+    "DROP TRIGGER IF EXISTS patient_search_insert",
+    "DROP TRIGGER IF EXISTS patient_search_update",
+    "DROP TRIGGER IF EXISTS patient_search_delete",
+    "DROP TABLE IF EXISTS patient_search"
+]
+
+_POSTGRES_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_patient_search_trgm ON patient USING gin (({SEARCH_TEXT_SQL}) gin_trgm_ops)"
+]
+
+
+def _index_ready(conn, dialect):
+    """Whether the current layout of the search index exists"""
+    if dialect == 'sqlite':
+        layout = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'patient_search'")).scalar()
+        return layout is not None and 'owner_tag' in layout
+    return conn.execute(text(
+        "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_patient_search_trgm'")).scalar() is not None
+
+
+def install_patient_search(create=True):
+    """Create the search index for the current database; run after create_all
+
+    With create=False (SCHEMA_SETUP=false) the index is only looked up, and the
+    ILIKE query is used until a schema setup run has created it.
+    """
+    global _backend
+    dialect = db.engine.dialect.name
+    statements = {'sqlite': _SQLITE_SETUP, 'postgresql': _POSTGRES_SETUP}.get(dialect)
+    if statements is None:
+        logging.info(f"No patient search index for {dialect}; using ILIKE search")
+        return None
+
+    try:
+        with db.engine.begin() as conn:
+            if create:
+                if dialect == 'sqlite' and not _index_ready(conn, dialect):
+                    statements = _SQLITE_RESET + statements
+                for statement in statements:
+                    conn.execute(text(statement))
+            ready = _index_ready(conn, dialect)
+        _backend = ('fts5' if dialect == 'sqlite' else 'trigram') if ready else None
+        if ready:
+            logging.info(f"Patient search index ready ({_backend})")
+        else:
+            logging.warning("Patient search index has not been created yet; using ILIKE search")
+    except Exception as e:
+        # e.g. SQLite built without FTS5 or no privilege to create the pg_trgm extension
+        _backend = None
+        logging.error(f"Could not create patient search index, using ILIKE search: {str(e)}")
+    return _backend
+
+
+def _escape_like(term: str) -> str:
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _ilike_search(user_id: int, term: str, limit: int) -> List[Patient]:
+    pattern = f"%{_escape_like(term)}%"
+    patients = Patient.query.filter(
+        Patient.user_id == user_id,
+        db.or_(
+            Patient.mrn.ilike(pattern, escape='\\'),
+            Patient.first_name.ilike(pattern, escape='\\'),
+            Patient.last_name.ilike(pattern, escape='\\'),
+            (Patient.first_name + ' ' + Patient.last_name).ilike(pattern, escape='\\')
+        )
+    ).limit(limit).all()
+
+    # Exact MRN matches first, then fields that start with the term
+    lowered = term.lower()
+    return sorted(patients, key=lambda patient: (
+        patient.mrn.lower() != lowered,
+        not any(value.lower().startswith(lowered) for value in (patient.mrn, patient.first_name, patient.last_name)),
+        patient.last_name.lower(), patient.first_name.lower()
+    ))
+
+
+def search_patients(user_id: int, term: str, limit: int = 20) -> List[Patient]:
+    """A user's patients whose MRN or name contains term, best match first"""
+    term = ' '.join(term.split())
+    if _backend is None or len(term) < MIN_INDEXED_TERM:
+        return _ilike_search(user_id, term, limit)
+
+    if _backend == 'fts5':
+        # A quoted FTS5 string matches as a substring under the trigram tokenizer. Every
+        # match contains all of the term's trigrams, so trigram similarity falls as the
+        # text gets longer: ordering by length ranks like pg_trgm's similarity() without
+        # the cost of bm25 over every match. The owner tag in the same query keeps other
+        # users' matches out of the result set instead of filtering them row by row.
+        quoted = term.lower().replace('"', '""')
+        rows = db.session.execute(text(
+            "SELECT rowid FROM patient_search WHERE patient_search MATCH :query "
+            "ORDER BY length(search_text), rowid LIMIT :limit"
+        ), {'query': f'owner_tag : "#{int(user_id)}#" AND search_text : "{quoted}"', 'limit': limit})
+    else:
+        rows = db.session.execute(text(
+            f"SELECT id FROM patient WHERE user_id = :user_id AND {SEARCH_TEXT_SQL} LIKE :pattern "
+            f"ORDER BY word_similarity(:term, {SEARCH_TEXT_SQL}) DESC, similarity(:term, {SEARCH_TEXT_SQL}) DESC, id "
+            f"LIMIT :limit"
+        ), {'user_id': user_id, 'pattern': f"%{_escape_like(term.lower())}%", 'term': term.lower(), 'limit': limit})
+
+    ids = [row[0] for row in rows]
+    if not ids:
+        return []
+    # Filtering user_id in Python keeps this a primary key lookup; with it in SQL the
+    # planner may walk the user's (user_id, created_at) index instead
+    patients = {patient.id: patient for patient in Patient.query.filter(Patient.id.in_(ids))
+                if patient.user_id == user_id}
+    # An exact MRN goes first whatever the length of the name around it
+    lowered = term.lower()
+    return sorted((patients[patient_id] for patient_id in ids if patient_id in patients),
+                  key=lambda patient: patient.mrn.lower() != lowered)
@@ -0,0 +1,187 @@
+"""
+Pre-scaled image cache for PDF layouts
+
+RLImage embeds the whole source JPEG and lets the PDF viewer scale it to the
+slot. PrescaledImageCache resamples each source once to the pixel size its
+slot needs at the target DPI and keeps the result on disk, keyed by
+(content hash, pixel box, JPEG encoding), so every layout and every re-render
+that uses the same photo in the same slot reuses one small file.
+
+Each use of a cached file touches its mtime, and prune() evicts by mtime:
+atime would be simpler but stops moving after the first read on relatime
+and noatime mounts.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+POINTS_PER_INCH = 72.0
+TEMP_SUFFIX = '.jpg.part'  # Files still being written; prune() leaves them alone until TEMP_MAX_AGE
+TEMP_MAX_AGE = 3600  # Older temp files were left by a process that died mid-write
+
+
+def file_content_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PrescaledImageCache:
+    """On-disk cache of images resampled to their PDF slot size"""
+
+    def __init__(self, cache_dir: str, dpi: int = 150, quality: int = 80, max_bytes: int = 512 * 1024 * 1024,
+                 subsampling: str = '4:2:0', progressive: bool = False, min_age: float = 600,
+                 max_hashes: int = 4096):
+        self.cache_dir = cache_dir
+        self.dpi = dpi
+        self.quality = quality
+        self.subsampling = subsampling
+        self.progressive = progressive
+        self.max_bytes = max_bytes
+        self.min_age = min_age  # Files used more recently are kept, e.g. while a PDF that embeds them is built
+        self.max_hashes = max_hashes
+        self.hits = 0
+        self.misses = 0
+        # (path, size, mtime_ns) -> content hash, least recently used first
+        self._hashes: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+        self._writes_since_prune = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _content_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(key)
+            if cached is not None:
+                self._hashes.move_to_end(key)
+        if cached is None:
+            cached = file_content_hash(path)
+            with self._lock:
+                self._hashes[key] = cached
+                while len(self._hashes) > self.max_hashes:
+                    self._hashes.popitem(last=False)
+        return cached
+
+    def pixel_box(self, width: float, height: float, dpi: Optional[int] = None) -> Tuple[int, int]:
+        """Pixel size of a slot given in points"""
+        dpi = dpi or self.dpi
+        return (max(1, round(width / POINTS_PER_INCH * dpi)),
+                max(1, round(height / POINTS_PER_INCH * dpi)))
+
+    def get(self, image_path: str, width: float, height: float, dpi: Optional[int] = None,
+            quality: Optional[int] = None, subsampling: Optional[str] = None,
+            progressive: Optional[bool] = None) -> str:
+        """
+        Path of image_path resampled to a width x height point slot
+
+        quality, subsampling ('4:4:4', '4:2:2' or '4:2:0') and progressive
+        set the JPEG encoding and default to the cache's own. Sources that are
+        already no larger than the slot are returned as-is; upscaling would
+        only add bytes. Any failure also falls back to the source path so a
+        layout never loses an image.
+        """
+        quality = quality or self.quality
+        subsampling = subsampling or self.subsampling
+        progressive = self.progressive if progressive is None else progressive
+        try:
+            box = self.pixel_box(width, height, dpi)
+            encoding = f"q{quality}_{subsampling.replace(':', '')}{'p' if progressive else ''}"
+            cache_path = os.path.join(self.cache_dir,
+                                      f"{self._content_hash(image_path)[:40]}_{box[0]}x{box[1]}_{encoding}.jpg")
+            try:
+                os.utime(cache_path)  # Record the use for prune()
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self.hits += 1
+                return cache_path
+
+            with Image.open(image_path) as img:
+                if img.size[0] <= box[0] and img.size[1] <= box[1]:
+                    return image_path
+
+                # Let the JPEG decoder downscale by a power of two before resampling
+                img.draft('RGB', box)
+                if img.mode not in ('RGB', 'L'):
+                    img = img.convert('RGB')
+                resized = img.resize(box, Image.Resampling.LANCZOS)
+
+            # Write to a temporary name first so concurrent renders never read a partial file
+            fd, temp_path = tempfile.mkstemp(suffix=TEMP_SUFFIX, dir=self.cache_dir)
+            os.close(fd)
+            resized.save(temp_path, 'JPEG', quality=quality, optimize=True, subsampling=subsampling,
+                         progressive=progressive)
+            os.replace(temp_path, cache_path)
+
+            with self._lock:
+                self.misses += 1
+                self._writes_since_prune += 1
+                prune = self._writes_since_prune >= 50
+                if prune:
+                    self._writes_since_prune = 0
+            if prune:
+                self.prune()
+            return cache_path
+        except Exception as e:
+            logging.warning(f"Could not pre-scale {image_path} for PDF, embedding original: {e}")
+            return image_path
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Delete the least recently used files until the cache fits in max_bytes;
+        returns the number of files removed
+
+        Files used within min_age are kept even over max_bytes, and temp files
+        are only removed once they are older than TEMP_MAX_AGE.
+        """
+        now = now if now is not None else time.time()
+        entries = []
+        removed = 0
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for entry in scan:
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                        if entry.name.endswith(TEMP_SUFFIX):
+                            if now - stat.st_mtime > TEMP_MAX_AGE:
+                                os.remove(entry.path)
+                                removed += 1
+                        elif entry.name.endswith('.jpg'):
+                            entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    except OSError:
+                        continue  # Removed by another process meanwhile
+        except OSError as e:
+            logging.warning(f"Could not prune PDF image cache {self.cache_dir}: {e}")
+            return removed
+
+        total = sum(size for _, size, _ in entries)
+        for last_used, size, path in sorted(entries):
+            if total <= self.max_bytes or now - last_used < self.min_age:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counters for status endpoints"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'dpi': self.dpi, 'quality': self.quality,
+                    'cache_dir': self.cache_dir}
@@ -0,0 +1,444 @@
+"""
+Slide deck PDF rendering
+
+Builds the ReportLab story for a deck from its compiled template
+(pdf_templates) and renders it to a file, a stream of chunks, or, for
+many-slide decks, in parallel page groups on a process pool. Kept free of
+Flask and the AI stack so pool workers can import it cheaply.
+"""
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, SimpleDocTemplate, PageBreak, Paragraph, Spacer, Image as RLImage
+
+from pdf_image_cache import PrescaledImageCache, file_content_hash
+from pdf_stream import PDFStreamWriter, merge_pdfs, page_count
+from pdf_templates import deck_styles, get_slide_template
+
+PDF_RENDER_PROCESSES = int(os.environ.get('PDF_RENDER_PROCESSES', 0))  # Page-group render processes; 0 or 1 renders in-process
+PDF_PAGE_INDEX_DIR = os.environ.get('PDF_PAGE_INDEX_DIR', os.path.join('uploads', 'pdf_pages'))  # Where each deck's image pages start and what built them
+
+# Image compression profiles selectable per case. dpi sets the pre-scaled pixel size of each
+# slot, max_size the size uploads are stored at before rendering.
+PDF_COMPRESSION_PROFILES = {
+    # Small decks for email and on-screen viewing
+    'screen': {'dpi': 110, 'quality': 70, 'subsampling': '4:2:0', 'progressive': True, 'max_size': (800, 600)},
+    # Office printing
+    'print': {'dpi': 200, 'quality': 85, 'subsampling': '4:2:2', 'progressive': False, 'max_size': (1600, 1200)},
+    # Full print resolution and colour detail for the patient record
+    'archive': {'dpi': 300, 'quality': 92, 'subsampling': '4:4:4', 'progressive': False, 'max_size': (2400, 1800)},
+}
+PDF_COMPRESSION_PROFILE = os.environ.get('PDF_COMPRESSION_PROFILE', 'screen')  # Profile for cases that do not choose one
+
+# Store image and page streams as binary instead of ASCII85 text, which is 25% larger
+rl_config.useA85 = 0
+
+def compression_profile(name=None):
+    """Name and settings of a compression profile, falling back to PDF_COMPRESSION_PROFILE"""
+    if name not in PDF_COMPRESSION_PROFILES:
+        name = PDF_COMPRESSION_PROFILE if PDF_COMPRESSION_PROFILE in PDF_COMPRESSION_PROFILES else 'screen'
+    return name, PDF_COMPRESSION_PROFILES[name]
+
+# Images resampled to their PDF slot size, shared by all templates and worker processes
+pdf_image_cache = PrescaledImageCache(os.environ.get('PDF_IMAGE_CACHE_DIR', os.path.join('uploads', 'pdf_cache')),
+                                      max_bytes=int(os.environ.get('PDF_IMAGE_CACHE_MB', 512)) * 1024 * 1024)
+
+def pdf_image(image_path, width, height, profile=None):
+    """RLImage for a layout slot, backed by a copy pre-scaled to the slot's pixel size under a compression profile"""
+    settings = compression_profile(profile)[1]
+    path = pdf_image_cache.get(image_path, width, height, dpi=settings['dpi'], quality=settings['quality'],
+                               subsampling=settings['subsampling'], progressive=settings['progressive'])
+    return RLImage(path, width=width, height=height)
+
+class _DeferredImage(Flowable):
+    """pdf_image stand-in that looks up the pre-scaled copy only when drawn
+
+    A pool task lays out the whole deck to find its page groups, but only
+    draws its own range. The slot size is known up front, so layout matches
+    RLImage's; the source hashing and cache lookup behind pdf_image happen
+    for the images on the task's pages only.
+    """
+
+    def __init__(self, image_path, width, height, profile=None):
+        super().__init__()
+        self.image_path = image_path
+        self.width = width
+        self.height = height
+        self.profile = profile
+        self.hAlign = 'CENTER'  # RLImage's default
+
+    def wrap(self, available_width, available_height):
+        return self.width, self.height
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        pdf_image(self.image_path, self.width, self.height, self.profile).drawOn(canvas, x, y, _sW)
+
+def new_pdf_document(target, pagesize):
+    """SimpleDocTemplate with the deck's margins, writing to a path or file object"""
+    return SimpleDocTemplate(target, pagesize=pagesize,
+                             topMargin=0.5*inch, bottomMargin=0.5*inch,
+                             leftMargin=0.5*inch, rightMargin=0.5*inch)
+
+def valid_pdf_images(images):
+    """Image paths that exist, in order"""
+    valid_images = []
+    for img in images:
+        if img and isinstance(img, str) and img.strip() and os.path.exists(img):
+            valid_images.append(img)
+        elif img:
+            logging.warning(f"Invalid image path skipped: {img}")
+    return valid_images
+
+def deck_pagesize(orientation):
+    """A4 page size for a deck orientation"""
+    return A4 if orientation == 'portrait' else (A4[1], A4[0])
+
+def build_title_story(case_title, notes, patient_info=None):
+    """Flowables of the deck's title page"""
+    styles = deck_styles()
+
+    story = []
+
+    # Title page matching the medical design
+    story.append(Paragraph(case_title, styles['title']))
+
+    # Add patient information if available
+    if patient_info:
+        story.append(Paragraph(f"Patient: {patient_info['name']}", styles['patient']))
+        story.append(Paragraph(f"MRN: {patient_info['mrn']} | Clinic: {patient_info['clinic']}", styles['visit']))
+        story.append(Paragraph(f"Visit Type: {patient_info['visit_type']}", styles['visit']))
+
+    if notes:
+        # Add patient/case identifier in gray below title
+        story.append(Paragraph(notes[:50] + "..." if len(notes) > 50 else notes, styles['subtitle']))
+    story.append(Spacer(1, 0.5*inch))
+
+    if notes:
+        story.append(Paragraph("Case Notes:", styles['heading']))
+        story.append(Paragraph(notes, styles['normal']))
+
+    story.append(Spacer(1, 0.5*inch))
+    story.append(Paragraph(f"Generated on: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles['normal']))
+
+    return story
+
+def build_pdf_story(images, case_title, notes, template='classic', orientation='portrait', images_per_slide=1, patient_info=None,
+                    profile=None, image=pdf_image):
+    """Build the flowables and page size of a slide deck
+
+    image(path, width, height, profile=...) makes each image flowable.
+    """
+    images = valid_pdf_images(images)
+
+    # Handle case with no valid images - log warning but continue
+    if not images:
+        logging.warning(f"Creating PDF with no valid images for case: {case_title}")
+
+    slide_template = get_slide_template(template, orientation, images_per_slide)
+    story = build_title_story(case_title, notes, patient_info)
+
+    # Add page break before images
+    story.append(PageBreak())
+
+    # Add images based on template (handle empty image list)
+    if images:
+        story.extend(slide_template.layout(images, notes, partial(image, profile=profile)))
+    else:
+        # No images provided - add placeholder message
+        story.append(Paragraph("No images were uploaded for this case.", deck_styles()['heading']))
+        story.append(Spacer(1, 0.5*inch))
+
+    return story, slide_template.pagesize
+
+def create_pdf(images, case_title, notes, output_path, template='classic', orientation='portrait', images_per_slide=1, patient_info=None,
+               profile=None, workers=None):
+    """Create PDF slide deck from images and text
+
+    profile names the image compression profile (default
+    PDF_COMPRESSION_PROFILE). With workers > 1 (default PDF_RENDER_PROCESSES),
+    page groups are rendered on a process pool and merged in page order.
+    """
+    workers = PDF_RENDER_PROCESSES if workers is None else workers
+    try:
+        if workers > 1:
+            partial_path = f"{output_path}.part"
+            try:
+                with open(partial_path, 'wb') as output:
+                    for chunk in render_pdf_chunks(images, case_title, notes, template, orientation, images_per_slide,
+                                                   patient_info, profile, workers=workers):
+                        output.write(chunk)
+                os.replace(partial_path, output_path)
+            finally:
+                if os.path.exists(partial_path):
+                    os.unlink(partial_path)
+        else:
+            story, pagesize = build_pdf_story(images, case_title, notes, template, orientation, images_per_slide, patient_info,
+                                              profile)
+
+            # Build PDF
+            new_pdf_document(output_path, pagesize).build(story)
+
+        record_deck_pages(output_path, images, case_title, notes, template, orientation, images_per_slide, patient_info,
+                          profile)
+        return True
+
+    except Exception as e:
+        logging.error(f"Error creating PDF: {str(e)}")
+        return False
+
+def split_story_pages(story):
+    """Split a story at its PageBreaks into groups that lay out independently"""
+    groups = [[]]
+    for flowable in story:
+        if isinstance(flowable, PageBreak):
+            groups.append([])
+        else:
+            groups[-1].append(flowable)
+    return [group for group in groups if group]
+
+def render_story_group(group, pagesize):
+    """Render one page group to PDF bytes"""
+    buffer = io.BytesIO()
+    new_pdf_document(buffer, pagesize).build(group)
+    return buffer.getvalue()
+
+def _render_page_range(render_args, start, stop):
+    """Pool task: render page groups start..stop of a deck as one PDF
+
+    The whole story is laid out to find the groups, with deferred images so
+    only this range's images are read.
+    """
+    story, pagesize = build_pdf_story(*render_args, image=_DeferredImage)
+    flowables = []
+    for group in split_story_pages(story)[start:stop]:
+        if flowables:
+            flowables.append(PageBreak())
+        flowables.extend(group)
+    return render_story_group(flowables, pagesize)
+
+_render_process_pool = None
+_render_process_pool_lock = threading.Lock()
+
+def get_render_process_pool(workers):
+    """Process pool for page-group rendering
+
+    Workers are spawned, not forked, so they never inherit Flask, database
+    connections or a torch thread pool from the web process.
+    """
+    global _render_process_pool
+    with _render_process_pool_lock:
+        if _render_process_pool is None:
+            _render_process_pool = ProcessPoolExecutor(max_workers=workers,
+                                                       mp_context=multiprocessing.get_context('spawn'))
+        return _render_process_pool
+
+def render_pdf_chunks(images, case_title, notes, template='classic', orientation='portrait', images_per_slide=1,
+                      patient_info=None, profile=None, workers=0):
+    """
+    Yield a deck's PDF bytes in page order, one page group at a time
+
+    With workers > 1 the groups are split into contiguous ranges rendered
+    on the process pool; merge order follows the ranges, so the title page
+    stays first whichever range finishes first.
+    """
+    render_args = (images, case_title, notes, template, orientation, images_per_slide, patient_info, profile)
+    # Building the story here also warms the pre-scaled image cache for the workers
+    story, pagesize = build_pdf_story(*render_args)
+    groups = split_story_pages(story)
+
+    if workers <= 1 or len(groups) < 2:
+        return merge_pdfs(render_story_group(group, pagesize) for group in groups)
+
+    # A few ranges per worker so one slow range does not leave the others idle
+    tasks = min(len(groups), workers * 2)
+    bounds = [round(index * len(groups) / tasks) for index in range(tasks + 1)]
+    pool = get_render_process_pool(workers)
+    futures = [pool.submit(_render_page_range, render_args, start, stop) for start, stop in zip(bounds, bounds[1:])]
+    return merge_pdfs(future.result() for future in futures)
+
+def stream_pdf(images, case_title, notes, template='classic', orientation='portrait', images_per_slide=1,
+               patient_info=None, profile=None, write_through=None, on_complete=None, workers=0):
+    """
+    Generate a slide deck as a stream of PDF byte chunks
+
+    The story is split at its PageBreaks and each page group is rendered
+    and written out before the next one is laid out, so the download starts
+    after the title page and only one group is held in memory. With
+    write_through, the same bytes are saved to that path; if the client
+    disconnects, the rest of the deck is still rendered to storage.
+    on_complete(success) runs once the deck is finished or has failed,
+    including when building the story raises.
+    """
+    partial_path = f"{write_through}.part" if write_through else None
+    output = None
+    success = False
+    try:
+        chunks = render_pdf_chunks(images, case_title, notes, template, orientation, images_per_slide, patient_info,
+                                   profile, workers=workers)
+        output = open(partial_path, 'wb') if partial_path else None
+        for chunk in chunks:
+            if output:
+                output.write(chunk)
+            yield chunk
+        success = True
+    except GeneratorExit:
+        if output:
+            logging.info(f"Client disconnected, finishing {write_through} for storage")
+            try:
+                for chunk in chunks:
+                    output.write(chunk)
+                success = True
+            except Exception as e:
+                logging.error(f"Error finishing {write_through} after disconnect: {str(e)}")
+        raise
+    except Exception as e:
+        logging.error(f"Error streaming PDF: {str(e)}")
+    finally:
+        if output:
+            output.close()
+        if partial_path:
+            if success:
+                os.replace(partial_path, write_through)
+                record_deck_pages(write_through, images, case_title, notes, template, orientation, images_per_slide,
+                                  patient_info, profile)
+            elif os.path.exists(partial_path):
+                os.unlink(partial_path)
+        if on_complete:
+            on_complete(success)
+
+def deck_layout_key(image_hashes, template, orientation, images_per_slide, notes, profile=None):
+    """Key of a deck's image pages: the source image hashes plus every parameter their layout depends on"""
+    profile, settings = compression_profile(profile)
+    parts = {
+        'images': image_hashes,
+        'template': template,
+        'orientation': orientation,
+        'images_per_slide': images_per_slide,
+        'profile': profile,
+        'encoding': {key: value for key, value in settings.items() if key != 'max_size'}
+    }
+    if template == 'modern':
+        # The modern layout repeats the notes beside every image
+        parts['notes'] = notes
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+def deck_index_path(pdf_path):
+    return os.path.join(PDF_PAGE_INDEX_DIR, f"{os.path.basename(pdf_path)}.json")
+
+def _write_deck_index(pdf_path, index):
+    os.makedirs(PDF_PAGE_INDEX_DIR, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix='.json', dir=PDF_PAGE_INDEX_DIR)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(index, f)
+    os.replace(temp_path, deck_index_path(pdf_path))
+
+def record_deck_pages(pdf_path, images, case_title, notes, template='classic', orientation='portrait', images_per_slide=1,
+                      patient_info=None, profile=None):
+    """
+    Remember where a rendered deck's image pages start and what they were built from
+
+    Uploaded images are deleted once a case is rendered, so this index is
+    what lets rerender_deck_text reuse the image pages of the existing PDF.
+    """
+    try:
+        image_hashes = [file_content_hash(path) for path in valid_pdf_images(images)]
+        title_pdf = render_story_group(build_title_story(case_title, notes, patient_info), deck_pagesize(orientation))
+        _write_deck_index(pdf_path, {
+            'layout_key': deck_layout_key(image_hashes, template, orientation, images_per_slide, notes, profile),
+            'image_hashes': image_hashes,
+            'title_pages': page_count(title_pdf)
+        })
+    except Exception as e:
+        logging.warning(f"Could not index pages of {pdf_path}; text edits will need a full render: {e}")
+
+def index_rendered_deck(pdf_path, case_title, notes, template='classic', orientation='portrait', images_per_slide=1,
+                        patient_info=None, profile=None):
+    """
+    Page index for a deck rendered before decks were indexed
+
+    The deck's source images are gone, so the index has no image hashes and
+    trusts that the deck was built from the given layout parameters; the
+    number of title pages comes from rendering the title story again from the
+    title and notes the deck was rendered with. Returns the index, or None
+    when the deck cannot be indexed.
+    """
+    try:
+        title_pages = page_count(render_story_group(build_title_story(case_title, notes, patient_info),
+                                                    deck_pagesize(orientation)))
+        with open(pdf_path, 'rb') as f:
+            deck_pages = page_count(f.read())
+        if deck_pages <= title_pages:
+            # Every deck has at least one page after the title, even without images
+            logging.warning(f"{pdf_path} has {deck_pages} pages, expected more than {title_pages} title pages")
+            return None
+        index = {
+            'layout_key': deck_layout_key(None, template, orientation, images_per_slide, notes, profile),
+            'image_hashes': None,
+            'title_pages': title_pages
+        }
+        _write_deck_index(pdf_path, index)
+        return index
+    except Exception as e:
+        logging.warning(f"Could not index pages of {pdf_path}: {e}")
+        return None
+
+def rerender_deck_text(pdf_path, case_title, notes, template='classic', orientation='portrait', images_per_slide=1,
+                       patient_info=None, profile=None, old_title=None, old_notes=None):
+    """
+    Re-render only the title page of an existing deck
+
+    The new title page is spliced in front of the image pages of the PDF
+    already on disk. A deck without a page index is indexed first from
+    old_title and old_notes, the text it was rendered with. Returns False
+    when the deck cannot be indexed or its image pages depend on something
+    that changed (the template, the compression profile, or the notes under
+    the modern layout); those decks need a full create_pdf.
+    """
+    try:
+        with open(deck_index_path(pdf_path)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = None
+        if old_title is not None:
+            index = index_rendered_deck(pdf_path, old_title, old_notes, template, orientation, images_per_slide,
+                                        patient_info, profile)
+        if index is None:
+            logging.info(f"No page index for {pdf_path}, cannot re-render its text incrementally")
+            return False
+
+    if deck_layout_key(index['image_hashes'], template, orientation, images_per_slide, notes, profile) != index['layout_key']:
+        logging.info(f"Image pages of {pdf_path} depend on changed layout parameters, cannot re-render incrementally")
+        return False
+
+    try:
+        with open(pdf_path, 'rb') as f:
+            existing = f.read()
+        title_pdf = render_story_group(build_title_story(case_title, notes, patient_info), deck_pagesize(orientation))
+
+        writer = PDFStreamWriter()
+        data = b''.join([writer.header(), writer.add_document(title_pdf),
+                         writer.add_document(existing, first_page=index['title_pages']), writer.finish()])
+
+        fd, temp_path = tempfile.mkstemp(suffix='.pdf', dir=os.path.dirname(pdf_path) or '.')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, pdf_path)
+
+        index['title_pages'] = page_count(title_pdf)
+        _write_deck_index(pdf_path, index)
+        return True
+    except Exception as e:
+        logging.error(f"Error re-rendering text of {pdf_path}: {str(e)}")
+        return False
@@ -0,0 +1,264 @@
+"""
+Incremental PDF writer for streaming slide decks
+
+ReportLab serializes a whole document in memory when it saves, so a deck can
+only be sent once every page is laid out. To stream, the deck is rendered as
+a sequence of small ReportLab documents (page groups) and PDFStreamWriter
+splices their objects into one PDF as each group is produced. Only the
+xref table and page tree are written at the end.
+
+The parser handles the subset of PDF that ReportLab itself writes: a single
+classic xref table, direct /Length values and a flat page tree.
+"""
+import re
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+_OBJ_HEADER = re.compile(rb'(\d+) 0 obj\s*')
+_REF = re.compile(rb'(\d+) 0 R\b')
+_LENGTH = re.compile(rb'/Length (\d+)')
+_STARTXREF = re.compile(rb'startxref\s+(\d+)\s+%%EOF\s*$')
+_TRAILER_REF = rb'/%s (\d+) 0 R'
+
+
+def _string_end(data: bytes, start: int) -> int:
+    """Index just past the literal string opening at data[start] == '('"""
+    depth = 0
+    i = start
+    while i < len(data):
+        char = data[i:i + 1]
+        if char == b'\\':
+            i += 2
+            continue
+        if char == b'(':
+            depth += 1
+        elif char == b')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError("Unterminated PDF string")
+
+
+def _split_strings(data: bytes) -> Iterator[Tuple[bool, bytes]]:
+    """Yield (is_string, segment) so references are never rewritten inside strings"""
+    position = 0
+    while True:
+        start = data.find(b'(', position)
+        if start < 0:
+            yield False, data[position:]
+            return
+        end = _string_end(data, start)
+        yield False, data[position:start]
+        yield True, data[start:end]
+        position = end
+
+
+def _dictionary_end(data: bytes, start: int) -> int:
+    """Index just past the dictionary opening at data[start:start + 2] == '<<'"""
+    depth = 0
+    i = start
+    while i < len(data):
+        if data[i:i + 1] == b'(':
+            i = _string_end(data, i)
+            continue
+        pair = data[i:i + 2]
+        if pair == b'<<':
+            depth += 1
+            i += 2
+        elif pair == b'>>':
+            depth -= 1
+            i += 2
+            if depth == 0:
+                return i
+        else:
+            i += 1
+    raise ValueError("Unterminated PDF dictionary")
+
+
+def _rewrite_refs(data: bytes, mapping: Dict[int, int]) -> bytes:
+    """Renumber 'N 0 R' references outside string literals"""
+    def renumber(match):
+        return b'%d 0 R' % mapping[int(match.group(1))]
+
+    return b''.join(segment if is_string else _REF.sub(renumber, segment)
+                    for is_string, segment in _split_strings(data))
+
+
+class _ParsedPDF:
+    """Objects, page order and info dictionary of one ReportLab document"""
+
+    def __init__(self, pdf: bytes):
+        match = _STARTXREF.search(pdf)
+        if not match:
+            raise ValueError("PDF has no startxref")
+        xref_lines = pdf[int(match.group(1)):].split(b'trailer', 1)
+        rows = xref_lines[0].split()
+        # rows: b'xref', first, count, then (offset, generation, flag) triples
+        first, count = int(rows[1]), int(rows[2])
+        self.offsets = {}
+        for index in range(count):
+            offset, _, flag = rows[3 + index * 3:6 + index * 3]
+            if flag == b'n':
+                self.offsets[first + index] = int(offset)
+
+        trailer = xref_lines[1]
+        self.root_id = int(re.search(_TRAILER_REF % b'Root', trailer).group(1))
+        info = re.search(_TRAILER_REF % b'Info', trailer)
+        self.info_id = int(info.group(1)) if info else None
+
+        self.objects = {number: self._read_object(pdf, offset) for number, offset in self.offsets.items()}
+        catalog = self.objects[self.root_id][0]
+        self.pages_id = int(re.search(_TRAILER_REF % b'Pages', catalog).group(1))
+        kids = re.search(rb'/Kids \[([^\]]*)\]', self.objects[self.pages_id][0]).group(1)
+        self.page_ids = [int(number) for number in _REF.findall(kids)]
+
+    def reachable(self, roots: Iterable[int], skipped: Set[int]) -> Set[int]:
+        """Object numbers referenced, directly or indirectly, from roots"""
+        found = set()
+        pending = [number for number in roots if number not in skipped]
+        while pending:
+            number = pending.pop()
+            if number in found:
+                continue
+            found.add(number)
+            for is_string, segment in _split_strings(self.objects[number][0]):
+                if not is_string:
+                    pending.extend(ref for ref in map(int, _REF.findall(segment))
+                                   if ref not in skipped and ref in self.objects)
+        return found
+
+    @staticmethod
+    def _read_object(pdf: bytes, offset: int) -> Tuple[bytes, bytes]:
+        """Return (dictionary or value, raw stream section) of the object at offset"""
+        header = _OBJ_HEADER.match(pdf, offset)
+        start = header.end()
+        if pdf[start:start + 2] != b'<<':
+            return pdf[start:pdf.index(b'endobj', start)].rstrip(), b''
+
+        end = _dictionary_end(pdf, start)
+        dictionary = pdf[start:end]
+        rest = pdf[end:end + 16].lstrip()
+        if not rest.startswith(b'stream'):
+            return dictionary, b''
+
+        data_start = pdf.index(b'stream', end) + len(b'stream')
+        data_start += 2 if pdf[data_start:data_start + 2] == b'\r\n' else 1
+        length = int(_LENGTH.search(dictionary).group(1))
+        return dictionary, pdf[data_start:data_start + length]
+
+
+def _object_bytes(number: int, body: bytes, stream: bytes = b'') -> bytes:
+    if stream:
+        return b'%d 0 obj\n%s\nstream\n%s\nendstream\nendobj\n' % (number, body, stream)
+    return b'%d 0 obj\n%s\nendobj\n' % (number, body)
+
+
+class PDFStreamWriter:
+    """
+    Write one PDF from a sequence of ReportLab-rendered page groups
+
+    Call header() once, add_document() for each group in page order, then
+    finish(); each returns the bytes to append to the output. Objects are
+    written as soon as their group is added, so nothing but the object
+    offsets and page ids is kept between groups.
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self):
+        self.position = 0
+        self.next_id = 3
+        self.object_offsets: Dict[int, int] = {}
+        self.page_ids: List[int] = []
+        self.info = None
+
+    def _emit(self, chunks: List[bytes], data: bytes):
+        chunks.append(data)
+        self.position += len(data)
+
+    def _emit_object(self, chunks: List[bytes], number: int, body: bytes, stream: bytes = b''):
+        self.object_offsets[number] = self.position
+        self._emit(chunks, _object_bytes(number, body, stream))
+
+    def header(self) -> bytes:
+        chunks = []
+        self._emit(chunks, b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+        return b''.join(chunks)
+
+    def add_document(self, pdf: bytes, first_page: int = 0) -> bytes:
+        """
+        Append the pages of a ReportLab PDF and return the bytes written
+
+        With first_page, the leading pages are dropped along with any object
+        only they used. The document is fully serialized before the writer's
+        state changes, so a document that raises leaves the writer as it was
+        and the next one can still be added.
+        """
+        parsed = _ParsedPDF(pdf)
+        skipped = {parsed.root_id, parsed.pages_id, parsed.info_id}
+        page_ids = parsed.page_ids[first_page:]
+        numbers = sorted(parsed.reachable(page_ids, skipped) if first_page else set(parsed.objects) - skipped)
+        mapping = {parsed.pages_id: self.PAGES_ID}
+        mapping.update((number, self.next_id + index) for index, number in enumerate(numbers))
+
+        chunks = []
+        offsets = {}
+        position = self.position
+        for number in numbers:
+            dictionary, stream = parsed.objects[number]
+            data = _object_bytes(mapping[number], _rewrite_refs(dictionary, mapping), stream)
+            offsets[mapping[number]] = position
+            chunks.append(data)
+            position += len(data)
+        new_page_ids = [mapping[number] for number in page_ids]
+        info = self.info
+        if info is None and parsed.info_id is not None:
+            info = parsed.objects[parsed.info_id][0]
+
+        self.position = position
+        self.next_id += len(numbers)
+        self.object_offsets.update(offsets)
+        self.page_ids.extend(new_page_ids)
+        self.info = info
+        return b''.join(chunks)
+
+    def finish(self) -> bytes:
+        """Write the page tree, catalog, info, xref table and trailer"""
+        chunks = []
+        kids = b' '.join(b'%d 0 R' % number for number in self.page_ids)
+        self._emit_object(chunks, self.PAGES_ID,
+                          b'<< /Count %d /Kids [ %s ] /Type /Pages >>' % (len(self.page_ids), kids))
+        self._emit_object(chunks, self.CATALOG_ID,
+                          b'<< /PageMode /UseNone /Pages %d 0 R /Type /Catalog >>' % self.PAGES_ID)
+
+        info_id = None
+        if self.info is not None:
+            info_id = self.next_id
+            self.next_id += 1
+            self._emit_object(chunks, info_id, self.info)
+
+        xref_offset = self.position
+        entries = [b'xref\n0 %d\n' % self.next_id, b'0000000000 65535 f \n']
+        for number in range(1, self.next_id):
+            entries.append(b'%010d 00000 n \n' % self.object_offsets[number])
+        trailer = b'trailer\n<< /Root %d 0 R /Size %d' % (self.CATALOG_ID, self.next_id)
+        if info_id is not None:
+            trailer += b' /Info %d 0 R' % info_id
+        entries.append(trailer + b' >>\nstartxref\n%d\n%%%%EOF\n' % xref_offset)
+        self._emit(chunks, b''.join(entries))
+        return b''.join(chunks)
+
+
+def merge_pdfs(documents: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield one PDF's bytes, chunk by chunk, from ReportLab page-group PDFs in order"""
+    writer = PDFStreamWriter()
+    yield writer.header()
+    for document in documents:
+        yield writer.add_document(document)
+    yield writer.finish()
+
+
+def page_count(pdf: bytes) -> int:
+    """Number of pages in a ReportLab PDF"""
+    return len(_ParsedPDF(pdf).page_ids)
@@ -0,0 +1,411 @@
+"""
+Slide deck templates as data
+
+Each entry in TEMPLATES describes a layout declaratively: how many images a
+slide holds, the slot each image is fitted into, and how the slide is
+arranged ('stack', 'sidebar', 'row' or 'sections'). get_slide_template
+compiles a spec once per (template, orientation, images_per_slide) into a
+SlideTemplate holding ready-made paragraph styles, table styles and slot
+geometry, and every later render reuses it. Only supported orientations and
+image counts reach the cache key, so it stays a handful of entries. Sizes in specs are inches;
+paddings are points.
+"""
+import logging
+import threading
+
+from PIL import Image
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import PageBreak, Paragraph, Spacer, Table, TableStyle
+
+DEFAULT_TEMPLATE = 'classic'
+
+# Grid lines and tight padding around the medical layout's image cells
+_MEDICAL_CELLS = [
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 2),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+]
+
+TEMPLATES = {
+    'classic': {
+        'description': 'One image per slide',
+        'images_per_slide': 1,
+        'heading': 'Slide {number}',
+        'body': 'stack',
+        'slot': (5, 4),
+        'space_after': 0.3,
+        'error_text': 'Error loading image {number}',
+    },
+    'modern': {
+        'description': 'One image per slide with the case notes beside it',
+        'images_per_slide': 1,
+        'heading': 'Slide {number}',
+        'body': 'sidebar',
+        'slot': (4.5, 3.5),
+        'fit': 'aspect',
+        'sidebar': {'width': 2, 'gap': 0.5, 'default_text': 'Image {number} description'},
+        'table_style': [
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (1, 0), (1, 0), 10),
+        ],
+        'space_after': 0.3,
+        'error_text': 'Error loading image {number}',
+    },
+    'grid': {
+        'description': 'Several images stacked on each slide',
+        'images_per_slide': None,  # Chosen per case
+        'heading': 'Slide {number}',
+        'body': 'stack',
+        'slot': (5, 3),
+        'slots_by_count': {2: (3, 2), 4: (2.5, 1.5), 6: (2, 1.2)},
+        'image_space_after': 0.2,
+        'space_after': 0.3,
+    },
+    'timeline': {
+        'description': 'Images in order as numbered steps on continuous pages',
+        'images_per_slide': 1,
+        'heading': 'Step {number}',
+        'heading_style': 'timeline',
+        'body': 'stack',
+        'slot': (5, 3),
+        'fit': 'aspect',
+        'space_after': 0.5,
+        'connector': {'text': '↓', 'space_after': 0.2},
+        'page_break': False,
+        'error_text': 'Error loading image {number}',
+    },
+    'comparison': {
+        'description': 'Pairs of images side by side',
+        'images_per_slide': 2,
+        'heading': 'Comparison {number}',
+        'body': 'row',
+        'slot': (3, 2.5),
+        'columns': [3.5, 3.5],
+        'table_style': [
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ],
+        'space_after': 0.3,
+        'error_text': 'Error loading comparison {number}',
+    },
+    'medical': {
+        'description': 'Single-page case presentation with extra-oral and intra-oral sections',
+        'body': 'sections',
+        'column_width': 2.3,
+        'column_count': 3,
+        'table_style': _MEDICAL_CELLS,
+        'centered_style': [
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ],
+        'sections': [
+            {'title': 'Extra-oral', 'images': 3, 'rows': [
+                {'slots': 3, 'slot': (2.2, 1.8), 'space_after': 0.3},
+            ]},
+            {'title': 'Intra oral:', 'images': 5, 'rows': [
+                {'slots': 3, 'slot': (2.2, 1.6), 'space_after': 0.15},
+                {'slots': 2, 'slot': (2.2, 1.6), 'centered': True},
+            ]},
+        ],
+    },
+}
+
+_deck_styles = None
+_compiled = {}
+_lock = threading.Lock()
+
+
+def deck_styles():
+    """Paragraph styles shared by every deck, built once per process"""
+    global _deck_styles
+    with _lock:
+        if _deck_styles is None:
+            styles = getSampleStyleSheet()
+            _deck_styles = {
+                'normal': styles['Normal'],
+                'title': ParagraphStyle(
+                    'CustomTitle',
+                    parent=styles['Title'],
+                    fontSize=24,
+                    spaceAfter=12,
+                    spaceBefore=12,
+                    alignment=1,  # Center alignment
+                    textColor=colors.Color(int(0.8*255), int(0.6*255), int(0.2*255)),
+                    fontName='Helvetica-Bold'
+                ),
+                'patient': ParagraphStyle(
+                    'PatientInfo',
+                    parent=styles['Normal'],
+                    fontSize=20,
+                    spaceAfter=8,
+                    alignment=1,
+                    textColor=colors.Color(int(0.4*255), int(0.4*255), int(0.4*255)),
+                    fontName='Helvetica-Bold'
+                ),
+                'visit': ParagraphStyle(
+                    'VisitInfo',
+                    parent=styles['Normal'],
+                    fontSize=18,
+                    spaceAfter=16,
+                    alignment=1,
+                    textColor=colors.Color(int(0.6*255), int(0.6*255), int(0.6*255)),
+                    fontName='Helvetica'
+                ),
+                'subtitle': ParagraphStyle(
+                    'Subtitle',
+                    parent=styles['Normal'],
+                    fontSize=12,
+                    spaceAfter=24,
+                    alignment=1,
+                    textColor=colors.Color(int(0.5*255), int(0.5*255), int(0.5*255)),
+                    fontName='Helvetica'
+                ),
+                'heading': ParagraphStyle(
+                    'CustomHeading',
+                    parent=styles['Heading2'],
+                    fontSize=14,
+                    spaceAfter=8,
+                    spaceBefore=16,
+                    textColor=colors.Color(int(0.3*255), int(0.3*255), int(0.3*255)),
+                    fontName='Helvetica-Bold'
+                ),
+                'timeline': ParagraphStyle(
+                    'Timeline',
+                    parent=styles['Normal'],
+                    fontSize=12,
+                    textColor='blue',
+                    leftIndent=20
+                ),
+                'section': ParagraphStyle(
+                    'SectionHeader',
+                    parent=styles['Normal'],
+                    fontSize=11,
+                    textColor=colors.gray,
+                    spaceAfter=6,
+                    fontName='Helvetica',
+                    alignment=TA_LEFT
+                ),
+            }
+        return _deck_styles
+
+
+class SlideTemplate:
+    """A template spec compiled for one orientation and slide size"""
+
+    def __init__(self, name, spec, orientation='portrait', images_per_slide=1):
+        self.name = name
+        self.spec = spec
+        self.pagesize = A4 if orientation == 'portrait' else (A4[1], A4[0])
+        self.styles = deck_styles()
+        self.body = spec.get('body', 'stack')
+        self.images_per_slide = max(1, spec.get('images_per_slide') or images_per_slide or 1)
+        self.heading_style = self.styles[spec.get('heading_style', 'heading')]
+        self.page_break = spec.get('page_break', True)
+
+        slot = spec.get('slots_by_count', {}).get(self.images_per_slide, spec.get('slot', (5, 4)))
+        self.slot = (slot[0] * inch, slot[1] * inch)
+        self.image_space_after = spec.get('image_space_after')
+        self.space_after = spec.get('space_after')
+        self.table_style = TableStyle(spec['table_style']) if 'table_style' in spec else None
+        self.columns = [width * inch for width in spec.get('columns', [])]
+
+        if self.body == 'sections':
+            self._compile_sections()
+
+    def _compile_sections(self):
+        """Precompute row geometry and table styles of a sectioned layout"""
+        column = self.spec['column_width'] * inch
+        count = self.spec['column_count']
+        self.sections = []
+        for section in self.spec['sections']:
+            rows = []
+            for row in section['rows']:
+                compiled = {
+                    'slots': row['slots'],
+                    'slot': (row['slot'][0] * inch, row['slot'][1] * inch),
+                    'space_after': row.get('space_after'),
+                    'centered': row.get('centered', False)
+                }
+                if compiled['centered']:
+                    # Images in the middle columns, blank columns either side splitting the leftover width
+                    compiled['layouts'] = {}
+                    for used in range(1, row['slots'] + 1):
+                        side = column * (count - used) / 2
+                        widths = [side] + [column] * used + [side]
+                        style = TableStyle(self.spec['centered_style'] +
+                                           [('GRID', (1, 0), (used, 0), 0.5, colors.lightgrey)])
+                        compiled['layouts'][used] = (widths, style)
+                else:
+                    compiled['widths'] = [column] * count
+                rows.append(compiled)
+            self.sections.append({'title': section['title'], 'images': section['images'], 'rows': rows})
+
+    def fit(self, image_path):
+        """Slot size for an image, keeping its aspect ratio for 'aspect' templates"""
+        width, height = self.slot
+        if self.spec.get('fit') != 'aspect':
+            return width, height
+
+        with Image.open(image_path) as img:
+            aspect_ratio = img.size[0] / img.size[1]
+        max_height = height
+        height = width / aspect_ratio
+        if height > max_height:
+            height = max_height
+            width = height * aspect_ratio
+        return width, height
+
+    def layout(self, images, notes, image):
+        """
+        Flowables for the image pages of a deck
+
+        image(path, width, height) returns the flowable for one slot, so the
+        caller decides how images are embedded.
+        """
+        if self.body == 'sections':
+            return self._layout_sections(images, image)
+
+        story = []
+        per_slide = self.images_per_slide
+        error_text = self.spec.get('error_text')
+        for number, start in enumerate(range(0, len(images), per_slide), 1):
+            slide = images[start:start + per_slide]
+            last = start + per_slide >= len(images)
+            story.append(Paragraph(self.spec['heading'].format(number=number), self.heading_style))
+            try:
+                self._layout_slide(story, slide, number, notes, image, catch=error_text is None)
+                if self.space_after is not None:
+                    story.append(Spacer(1, self.space_after*inch))
+                if not last:
+                    connector = self.spec.get('connector')
+                    if connector:
+                        story.append(Paragraph(connector['text'], self.styles['normal']))
+                        story.append(Spacer(1, connector['space_after']*inch))
+                    if self.page_break:
+                        story.append(PageBreak())
+            except Exception as e:
+                if error_text is None:
+                    raise
+                logging.error(f"Error adding slide {number} of {self.name} template: {str(e)}")
+                story.append(Paragraph(error_text.format(number=number), self.styles['normal']))
+
+        return story
+
+    def _layout_slide(self, story, slide, number, notes, image, catch=False):
+        if self.body == 'stack':
+            for image_path in slide:
+                try:
+                    width, height = self.fit(image_path)
+                    story.append(image(image_path, width, height))
+                    if self.image_space_after is not None:
+                        story.append(Spacer(1, self.image_space_after*inch))
+                except Exception as e:
+                    if not catch:
+                        raise
+                    logging.error(f"Error adding image {image_path}: {str(e)}")
+
+        elif self.body == 'sidebar':
+            sidebar = self.spec['sidebar']
+            width, height = self.fit(slide[0])
+            note_para = Paragraph(notes if notes else sidebar['default_text'].format(number=number),
+                                  self.styles['normal'])
+            table = Table([[image(slide[0], width, height), note_para]],
+                          colWidths=[width + sidebar['gap']*inch, sidebar['width']*inch])
+            table.setStyle(self.table_style)
+            story.append(table)
+
+        elif self.body == 'row':
+            cells = [image(image_path, *self.fit(image_path)) for image_path in slide]
+            cells += [""] * (len(self.columns) - len(cells))
+            table = Table([cells], colWidths=self.columns)
+            table.setStyle(self.table_style)
+            story.append(table)
+
+        else:
+            raise ValueError(f"Unknown template body '{self.body}'")
+
+    def _image_cells(self, paths, slot, image):
+        cells = []
+        for image_path in paths:
+            try:
+                cells.append(image(image_path, *slot))
+            except Exception as e:
+                logging.error(f"Error adding image {image_path}: {str(e)}")
+                cells.append("")
+        return cells
+
+    def _layout_sections(self, images, image):
+        story = []
+        offset = 0
+        for section in self.sections:
+            remaining = images[offset:offset + section['images']]
+            offset += section['images']
+            if not remaining:
+                continue
+
+            story.append(Paragraph(section['title'], self.styles['section']))
+            story.append(Spacer(1, 0.15*inch))
+            for row in section['rows']:
+                row_images, remaining = remaining[:row['slots']], remaining[row['slots']:]
+                if not row_images:
+                    break
+                cells = self._image_cells(row_images, row['slot'], image)
+                if row['centered']:
+                    widths, style = row['layouts'][len(cells)]
+                    cells = [""] + cells + [""]
+                else:
+                    widths, style = row['widths'], self.table_style
+                    cells += [""] * (len(widths) - len(cells))
+
+                table = Table([cells], colWidths=widths)
+                table.setStyle(style)
+                story.append(table)
+                if row['space_after'] is not None:
+                    story.append(Spacer(1, row['space_after']*inch))
+
+        return story
+
+
+def _slide_image_count(spec, images_per_slide):
+    """Supported images per slide for a spec, at most the count asked for
+
+    Specs with a fixed count ignore the request; the grid supports one image
+    or any count in its slots_by_count.
+    """
+    if spec.get('images_per_slide', 1) is not None:
+        return spec.get('images_per_slide', 1)
+    try:
+        requested = max(1, int(images_per_slide or 1))
+    except (TypeError, ValueError):
+        requested = 1
+    return max(count for count in {1, *spec.get('slots_by_count', {})} if count <= requested)
+
+
+def get_slide_template(name, orientation='portrait', images_per_slide=1):
+    """Compiled template for a deck, built on first use and shared afterwards
+
+    Unknown names fall back to DEFAULT_TEMPLATE. The arguments come from form
+    input, so they are reduced to the layouts that actually differ before
+    they key the cache.
+    """
+    if name not in TEMPLATES:
+        name = DEFAULT_TEMPLATE
+    orientation = 'portrait' if orientation == 'portrait' else 'landscape'
+    images_per_slide = _slide_image_count(TEMPLATES[name], images_per_slide)
+    key = (name, orientation, images_per_slide)
+    template = _compiled.get(key)
+    if template is None:
+        template = SlideTemplate(name, TEMPLATES[name], orientation, images_per_slide)
+        with _lock:
+            template = _compiled.setdefault(key, template)
+    return template